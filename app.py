@@ -8,13 +8,26 @@ It defines routes for three calculators:
   - Calculator 3: Monthly Savings Potential Calculator.
 """
 
+import io
 import os
 import datetime
-from flask import Flask, render_template, request, redirect, flash, url_for, session
+import secrets
+from flask import Flask, render_template, request, redirect, url_for, session, abort, jsonify, Response, send_from_directory, stream_with_context
 from dotenv import load_dotenv
 
 # Import utilities
-from utils import parse_localized_number, calculate_calculator1, calculate_calculator2, calculate_calculator3
+from assets import AssetManifest, ENCODINGS, IMMUTABLE_MAX_AGE, content_type
+from backtest import backtest_calculator1, load_return_series, summarize_backtest
+from bulk import BULK_CALCULATORS, iter_bulk_results
+from drawdown import calculate_drawdown
+from jobs import JOB_KINDS, JobQueueFull, JobRunner, JobStore, bulk_row_limit
+from metrics import SlowRequestProfiler, flash_calculation_error, flash_validation_error, lap, metrics
+from result_cache import ResultCache
+from session_store import SQLiteSessionInterface
+from statements import CategoryMatcher, summarize_statement
+import numpy as np
+
+from utils import growth_factor_cache, parse_localized_number, format_currency, calculate_calculator1, calculate_calculator1_simulation, calculate_calculator2, calculate_calculator3, calculate_time_to_fi, iter_calculator1_projection, legacy_cash_flows, sensitivity_grid, warm_growth_factor_cache, DURATIONS, MAX_PROJECTION_YEARS, SENSITIVITY_METRICS
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +36,72 @@ app = Flask(__name__)
 # Use environment variable for secret key
 app.secret_key = os.environ.get('SECRET_KEY', 'default_fallback_key')
 
+# Session backend: 'sqlite' keeps form state server-side and only an opaque ID in the cookie,
+# 'cookie' falls back to Flask's signed-cookie sessions
+if os.environ.get('SESSION_BACKEND', 'sqlite') == 'sqlite':
+    app.session_interface = SQLiteSessionInterface(
+        os.environ.get('SESSION_STORE_PATH', os.path.join(app.instance_path, 'sessions.sqlite3')),
+        cleanup_interval=int(os.environ.get('SESSION_CLEANUP_INTERVAL', 300)))
+
+# Per-phase timing histograms and counters exported at /metrics; setting PROFILE_SLOW_REQUEST_MS
+# also samples the stacks of requests slower than that many milliseconds
+slow_request_ms = os.environ.get('PROFILE_SLOW_REQUEST_MS')
+metrics.init_app(app, profiler=SlowRequestProfiler(
+    float(slow_request_ms),
+    interval_ms=float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5)),
+    output_dir=os.environ.get('PROFILE_OUTPUT_DIR') or None) if slow_request_ms else None)
+
+# Fingerprinted, precompressed static assets produced by `python assets.py`
+asset_manifest = AssetManifest()
+app.jinja_env.globals['asset_url'] = lambda path: asset_manifest.url(path, url_for)
+
+# Pre-compute growth factors for the common rates so every gunicorn worker starts warm
+warm_growth_factor_cache()
+
+# Result cache shared by all gunicorn workers through a SQLite file in the instance folder
+result_cache = ResultCache(os.environ.get('RESULT_CACHE_PATH', os.path.join(app.instance_path, 'result_cache.sqlite3')),
+                           max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 10000)),
+                           ttl=int(os.environ.get('RESULT_CACHE_TTL', 3600)))
+
+# Historical monthly returns for backtests: optional local data file, memory-mapped once per worker.
+# Without it the backtest section of the result page is hidden and the endpoint answers 404.
+return_series = load_return_series(os.environ.get('BACKTEST_RETURNS_PATH', os.path.join(app.root_path, 'data', 'returns.npy')))
+if return_series is None:
+    app.logger.info("No backtest return series configured (BACKTEST_RETURNS_PATH); historical backtests are disabled.")
+
+# Background jobs: state and results in a SQLite file shared by all gunicorn workers,
+# each worker running the jobs it accepts in its own bounded process pool
+job_store = JobStore(os.environ.get('JOB_STORE_PATH', os.path.join(app.instance_path, 'jobs.sqlite3')),
+                     ttl=int(os.environ.get('JOB_RESULT_TTL', 3600)),
+                     max_result_bytes=int(os.environ.get('JOB_RESULT_MAX_BYTES', 64 * 1024 * 1024)))
+job_runner = JobRunner(job_store, max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+                       max_queued=int(os.environ.get('JOB_MAX_QUEUED', 16)), metrics=metrics)
+
+# Expense category rules are compiled once per worker
+statement_matcher = CategoryMatcher()
+
+# Upper bound for Monte Carlo paths accepted from the Calculator 1 form
+MAX_SIMULATION_PATHS = 200000
+
+# The synchronous drawdown endpoint takes MAX_SIMULATION_PATHS paths over at most this many retirement years;
+# longer retirements get proportionally fewer paths, and larger runs go to the calculator1_drawdown job
+DRAWDOWN_REFERENCE_YEARS = 30
+
+# Chart data is a pure function of its query string (and the current year), so the browser may reuse it for this long
+CHART_DATA_MAX_AGE = 3600
+# Bump when the chart data format changes so old ETags stop matching
+CHART_DATA_VERSION = 1
+
+# Upper bound for the number of rates and of savings levels in a sensitivity grid
+MAX_SENSITIVITY_STEPS = 500
+
+# Background jobs accept larger inputs than the synchronous routes
+MAX_JOB_SIMULATION_PATHS = 1000000
+MAX_JOB_CSV_BYTES = 10 * 1024 * 1024
+
+# Upper bound for the number of dated extra deposits and withdrawals in Calculator 2
+MAX_CASH_FLOWS = 50
+
 # -------------------------------------------------------------
 # Home Page Route
 # -------------------------------------------------------------
@@ -47,12 +126,20 @@ def calculator1_index():
     annual_rate = session.get('annual_rate', '6,00')
     safe_withdrawal_rate = session.get('safe_withdrawal_rate', '4,00')
     birth_year = session.get('birth_year', '')
+    simulation_mode = session.get('simulation_mode', False)
+    volatility = session.get('volatility', '15,00')
+    simulation_paths = session.get('simulation_paths', '10000')
+    simulation_seed = session.get('simulation_seed', '')
     return render_template('calculator1_index.html',
                            monthly_savings=monthly_savings,
                            initial_investment=initial_investment,
                            annual_rate=annual_rate,
                            safe_withdrawal_rate=safe_withdrawal_rate,
-                           birth_year=birth_year)
+                           birth_year=birth_year,
+                           simulation_mode=simulation_mode,
+                           volatility=volatility,
+                           simulation_paths=simulation_paths,
+                           simulation_seed=simulation_seed)
 
 @app.route('/calculator-1-user-set-monthly-investment/calculate', methods=['POST'])
 def calculator1_calculate():
@@ -65,6 +152,10 @@ def calculator1_calculate():
     annual_rate_str = request.form.get('annual_rate', '').strip()
     safe_withdrawal_rate_str = request.form.get('safe_withdrawal_rate', '').strip()
     birth_year_str = request.form.get('birth_year', '').strip()
+    simulation_mode = request.form.get('simulation_mode') == 'on'
+    volatility_str = request.form.get('volatility', '').strip()
+    simulation_paths_str = request.form.get('simulation_paths', '').strip()
+    simulation_seed_str = request.form.get('simulation_seed', '').strip()
     
     # Read period-specific savings from form
     period_savings_strs = request.form.getlist('period_savings')
@@ -84,6 +175,10 @@ def calculator1_calculate():
     session['birth_year'] = birth_year_str
     session['period_savings'] = period_savings_strs
     session['period_extra_deposits'] = period_extra_deposits_strs
+    session['simulation_mode'] = simulation_mode
+    session['volatility'] = volatility_str if volatility_str else "15,00"
+    session['simulation_paths'] = simulation_paths_str if simulation_paths_str else "10000"
+    session['simulation_seed'] = simulation_seed_str
 
     monthly_savings = parse_localized_number(monthly_savings_str) if monthly_savings_str else 0.0
     initial_investment = parse_localized_number(initial_investment_str) if initial_investment_str else 0.0
@@ -108,39 +203,585 @@ def calculator1_calculate():
         try:
             birth_year = int(birth_year_str)
             if birth_year < 1900 or birth_year > current_year:
-                flash(f"O ano de nascimento deve ser entre 1900 e {current_year}.", "danger")
+                flash_validation_error(f"O ano de nascimento deve ser entre 1900 e {current_year}.", "danger")
                 return redirect(url_for('calculator1_index'))
         except ValueError:
-            flash("Por favor, insira um ano de nascimento válido.", "danger")
+            flash_validation_error("Por favor, insira um ano de nascimento válido.", "danger")
             return redirect(url_for('calculator1_index'))
 
     if annual_rate is None or annual_rate <= 0:
-        flash("Por favor, insira uma Taxa de Retorno Anual válida e maior que 0.", "danger")
+        flash_validation_error("Por favor, insira uma Taxa de Retorno Anual válida e maior que 0.", "danger")
         return redirect(url_for('calculator1_index'))
     if safe_withdrawal_rate is None or safe_withdrawal_rate <= 0:
-        flash("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.", "danger")
+        flash_validation_error("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.", "danger")
         return redirect(url_for('calculator1_index'))
     if all(val <= 0 for val in period_savings) and all(val <= 0 for val in period_extra_deposits) and initial_investment <= 0:
-        flash("Por favor, forneça um valor para a Economia Mensal, Aporte Extra ou Investimento Inicial.", "danger")
+        flash_validation_error("Por favor, forneça um valor para a Economia Mensal, Aporte Extra ou Investimento Inicial.", "danger")
         return redirect(url_for('calculator1_index'))
 
+    volatility = None
+    simulation_paths = None
+    simulation_seed = None
+    if simulation_mode:
+        volatility = parse_localized_number(volatility_str) if volatility_str else 15.0
+        if volatility is None or volatility < 0:
+            flash_validation_error("Por favor, insira uma Volatilidade Anual válida (maior ou igual a 0).", "danger")
+            return redirect(url_for('calculator1_index'))
+        try:
+            simulation_paths = int(simulation_paths_str) if simulation_paths_str else 10000
+            simulation_seed = int(simulation_seed_str) if simulation_seed_str else None
+        except ValueError:
+            flash_validation_error("Por favor, insira valores inteiros para o Número de Simulações e a Semente.", "danger")
+            return redirect(url_for('calculator1_index'))
+        if simulation_paths < 1 or simulation_paths > MAX_SIMULATION_PATHS:
+            flash_validation_error(f"O Número de Simulações deve ser entre 1 e {MAX_SIMULATION_PATHS}.", "danger")
+            return redirect(url_for('calculator1_index'))
+        if simulation_seed is not None and simulation_seed < 0:
+            flash_validation_error("A Semente deve ser um número inteiro não negativo.", "danger")
+            return redirect(url_for('calculator1_index'))
+
     # Check if user customized savings (different savings than global, or any non-zero extra deposits)
     has_custom_savings = any(s != monthly_savings_str for s in period_savings_strs) or \
                          any(e != "0,00" and e != "" for e in period_extra_deposits_strs)
+    lap('parse')
+
+    # Unseeded simulations still differ between submissions, but get a random seed of their own
+    # so the chart data endpoint reproduces exactly the bands shown in the table
+    if simulation_mode and simulation_seed is None:
+        simulation_seed = secrets.randbelow(2 ** 32)
+    inputs = {
+        "period_savings": period_savings, "initial_investment": initial_investment,
+        "annual_rate": annual_rate, "safe_withdrawal_rate": safe_withdrawal_rate,
+        "birth_year": birth_year, "period_extra_deposits": period_extra_deposits,
+        "simulation": [volatility, simulation_paths, simulation_seed] if simulation_mode else None,
+    }
 
     try:
-        results = calculate_calculator1(period_savings, initial_investment, annual_rate, safe_withdrawal_rate, birth_year, current_year, period_extra_deposits)
+        results, simulation = _calculator1_results(inputs, current_year)
     except ValueError:
-        flash("Ocorreu um erro durante o cálculo.", "danger")
+        flash_calculation_error("Ocorreu um erro durante o cálculo.", "danger")
         return redirect(url_for('calculator1_index'))
+    lap('calculate')
+
+    # Per-milestone state for the incremental update endpoint: edits to one period only recompute from there on
+    session['calculator1_state'] = {
+        "initial_investment": initial_investment, "annual_rate": annual_rate,
+        "safe_withdrawal_rate": safe_withdrawal_rate, "birth_year": birth_year, "current_year": current_year,
+        "period_savings": period_savings, "period_extra_deposits": period_extra_deposits,
+        "future_values": [row["future_value_raw"] for row in results],
+    }
+
+    chart_url = url_for('calculator1_chart_data',
+                        monthly_savings=monthly_savings_str, initial_investment=initial_investment_str,
+                        annual_rate=annual_rate_str, safe_withdrawal_rate=safe_withdrawal_rate_str,
+                        birth_year=birth_year_str, period_savings=period_savings_strs,
+                        period_extra_deposits=period_extra_deposits_strs,
+                        **({"simulation_mode": "on", "volatility": volatility_str, "simulation_paths": simulation_paths,
+                            "simulation_seed": simulation_seed} if simulation_mode else {}))
 
     return render_template('result.html', results=results,
+                           simulation=simulation,
                            monthly_savings=session['monthly_savings'],
                            initial_investment=session['initial_investment'],
                            annual_rate=session['annual_rate'],
                            safe_withdrawal_rate=session['safe_withdrawal_rate'],
                            birth_year=session['birth_year'],
-                           has_custom_savings=has_custom_savings)
+                           simulation_mode=session['simulation_mode'],
+                           volatility=session['volatility'],
+                           simulation_paths=session['simulation_paths'],
+                           simulation_seed=session['simulation_seed'],
+                           max_projection_years=MAX_PROJECTION_YEARS,
+                           has_custom_savings=has_custom_savings,
+                           chart_url=chart_url,
+                           backtest_assets=return_series.assets if return_series else None)
+
+@app.route('/calculator-1-user-set-monthly-investment/update', methods=['POST'])
+def calculator1_update():
+    """
+    Applies edits to the period savings and extra deposits of the last Calculator 1 result without a full recalculation.
+    Takes only the changed periods as parallel form lists: 'period' (row index), 'period_savings' and
+    'period_extra_deposits' (same format as the form). Recomputes from the first changed milestone on,
+    starting from the future value stored in the session, and returns only those rows.
+    Answers 409 when the session holds no result to update.
+    """
+    state = session.get('calculator1_state')
+    if not state or state["current_year"] != datetime.date.today().year:
+        return jsonify(error="Recalcule o formulário para continuar editando os períodos."), 409
+
+    periods = request.form.getlist('period')
+    savings_strs = request.form.getlist('period_savings')
+    extra_strs = request.form.getlist('period_extra_deposits')
+    if not periods or len(savings_strs) != len(periods) or len(extra_strs) != len(periods):
+        return jsonify(error="Informe o período, o aporte mensal e o aporte extra de cada alteração."), 400
+
+    period_savings = list(state["period_savings"])
+    period_extra_deposits = list(state["period_extra_deposits"])
+    changed = []
+    for period_str, savings_str, extra_str in zip(periods, savings_strs, extra_strs):
+        try:
+            period = int(period_str)
+        except ValueError:
+            period = -1
+        savings = parse_localized_number(savings_str.strip())
+        extra = parse_localized_number(extra_str.strip())
+        if period < 0 or period >= len(DURATIONS):
+            return jsonify(error="Período inválido."), 400
+        if savings is None or extra is None:
+            return jsonify(error="Por favor, insira valores numéricos válidos."), 400
+        period_savings[period] = savings
+        period_extra_deposits[period] = extra
+        changed.append(period)
+    lap('parse')
+
+    start_index = min(changed)
+    start_value = state["future_values"][start_index - 1] if start_index > 0 else state["initial_investment"]
+    try:
+        rows = calculate_calculator1(period_savings, state["initial_investment"], state["annual_rate"],
+                                     state["safe_withdrawal_rate"], state["birth_year"], state["current_year"],
+                                     period_extra_deposits, start_index=start_index, start_value=start_value)
+    except ValueError:
+        return jsonify(error="Ocorreu um erro durante o cálculo."), 400
+    lap('calculate')
+
+    state = dict(state, period_savings=period_savings, period_extra_deposits=period_extra_deposits,
+                 future_values=state["future_values"][:start_index] + [row["future_value_raw"] for row in rows])
+    session['calculator1_state'] = state
+
+    return jsonify(start_index=start_index, rows=[
+        {"index": start_index + i, "years": row["years"],
+         "future_value_raw": row["future_value_raw"], "future_value": row["future_value"],
+         "monthly_income_raw": row["monthly_income_raw"], "monthly_income": row["monthly_income"]}
+        for i, row in enumerate(rows)])
+
+def _calculator1_results(inputs, current_year):
+    """
+    Returns (results, simulation) for parsed Calculator 1 inputs, going through the shared result cache.
+    inputs["simulation"] is None or [volatility, paths, seed]; raises ValueError when the calculation fails.
+    """
+    cache_key = result_cache.make_key('calculator1', inputs, current_year)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached["results"], cached["simulation"]
+
+    results = calculate_calculator1(inputs["period_savings"], inputs["initial_investment"], inputs["annual_rate"],
+                                    inputs["safe_withdrawal_rate"], inputs["birth_year"], current_year,
+                                    inputs["period_extra_deposits"])
+    simulation = None
+    if inputs["simulation"] is not None:
+        volatility, simulation_paths, simulation_seed = inputs["simulation"]
+        simulation = calculate_calculator1_simulation(inputs["period_savings"], inputs["initial_investment"],
+                                                      inputs["annual_rate"], inputs["safe_withdrawal_rate"],
+                                                      volatility, simulation_paths, simulation_seed,
+                                                      inputs["birth_year"], current_year, inputs["period_extra_deposits"])
+    result_cache.set(cache_key, {"results": results, "simulation": simulation})
+    return results, simulation
+
+def _calculator1_inputs_from_args(args):
+    """
+    Parses Calculator 1 inputs from query-string arguments (same names and rules as the form).
+    Returns a dict of parsed values or raises ValueError with a user-facing message.
+    """
+    monthly_savings_str = args.get('monthly_savings', '').strip()
+    initial_investment_str = args.get('initial_investment', '').strip()
+    annual_rate_str = args.get('annual_rate', '').strip()
+    safe_withdrawal_rate_str = args.get('safe_withdrawal_rate', '').strip()
+    birth_year_str = args.get('birth_year', '').strip()
+
+    monthly_savings = parse_localized_number(monthly_savings_str) if monthly_savings_str else 0.0
+    initial_investment = parse_localized_number(initial_investment_str) if initial_investment_str else 0.0
+    annual_rate = parse_localized_number(annual_rate_str) if annual_rate_str else None
+    safe_withdrawal_rate = parse_localized_number(safe_withdrawal_rate_str) if safe_withdrawal_rate_str else 4.0
+
+    if monthly_savings is None or initial_investment is None:
+        raise ValueError("Por favor, insira valores numéricos válidos.")
+    if annual_rate is None or annual_rate <= 0:
+        raise ValueError("Por favor, insira uma Taxa de Retorno Anual válida e maior que 0.")
+    if safe_withdrawal_rate is None or safe_withdrawal_rate <= 0:
+        raise ValueError("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.")
+
+    period_savings_strs = args.getlist('period_savings') or [monthly_savings_str] * len(DURATIONS)
+    period_extra_deposits_strs = args.getlist('period_extra_deposits') or ["0,00"] * len(DURATIONS)
+    if len(period_savings_strs) != len(DURATIONS) or len(period_extra_deposits_strs) != len(DURATIONS):
+        raise ValueError(f"Informe {len(DURATIONS)} valores por período.")
+
+    period_savings = []
+    for s in period_savings_strs:
+        val = parse_localized_number(s)
+        period_savings.append(val if val is not None else monthly_savings)
+    period_extra_deposits = []
+    for e in period_extra_deposits_strs:
+        val = parse_localized_number(e)
+        period_extra_deposits.append(val if val is not None else 0.0)
+
+    birth_year = None
+    current_year = datetime.date.today().year
+    if birth_year_str:
+        try:
+            birth_year = int(birth_year_str)
+        except ValueError:
+            raise ValueError("Por favor, insira um ano de nascimento válido.")
+        if birth_year < 1900 or birth_year > current_year:
+            raise ValueError(f"O ano de nascimento deve ser entre 1900 e {current_year}.")
+
+    return {
+        "monthly_savings": monthly_savings,
+        "initial_investment": initial_investment,
+        "annual_rate": annual_rate,
+        "safe_withdrawal_rate": safe_withdrawal_rate,
+        "period_savings": period_savings,
+        "period_extra_deposits": period_extra_deposits,
+        "birth_year": birth_year,
+        "current_year": current_year,
+    }
+
+def _calculator1_simulation_from_args(args, max_paths=MAX_SIMULATION_PATHS):
+    """
+    Parses the optional Monte Carlo query arguments of Calculator 1.
+    Returns None when simulation_mode is off, otherwise [volatility, paths, seed]; raises ValueError with a user-facing message.
+    """
+    if args.get('simulation_mode') != 'on':
+        return None
+    volatility_str = args.get('volatility', '').strip()
+    volatility = parse_localized_number(volatility_str) if volatility_str else 15.0
+    if volatility is None or volatility < 0:
+        raise ValueError("Por favor, insira uma Volatilidade Anual válida (maior ou igual a 0).")
+    try:
+        simulation_paths = int(args.get('simulation_paths') or 10000)
+        simulation_seed = int(args['simulation_seed'])
+    except (KeyError, ValueError):
+        raise ValueError("Por favor, insira valores inteiros para o Número de Simulações e a Semente.")
+    if simulation_paths < 1 or simulation_paths > max_paths:
+        raise ValueError(f"O Número de Simulações deve ser entre 1 e {max_paths}.")
+    if simulation_seed < 0:
+        raise ValueError("A Semente deve ser um número inteiro não negativo.")
+    return [volatility, simulation_paths, simulation_seed]
+
+def _int_arg(args, name, default=None):
+    """
+    Parses an optional integer query-string argument; an absent or empty value gives default.
+    Raises ValueError naming the argument when the value is not an integer.
+    """
+    value = args.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"O parâmetro '{name}' deve ser um número inteiro.")
+
+def _conditional_response(name, inputs, current_year, build_response):
+    """
+    Answers a GET whose body only depends on the given inputs and year.
+    The strong ETag is the hash of those inputs, so a matching If-None-Match gets a 304 without calling build_response().
+    """
+    etag = result_cache.make_key(name, {"version": CHART_DATA_VERSION, "inputs": inputs}, current_year)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build_response()
+    response.set_etag(etag)
+    # The query string carries the user's savings, investments and birth year: browser cache only
+    response.cache_control.private = True
+    response.cache_control.max_age = CHART_DATA_MAX_AGE
+    return response
+
+def _conditional_json(name, inputs, current_year, build):
+    """
+    Same as _conditional_response for JSON bodies; build returns the JSON-serializable payload.
+    """
+    return _conditional_response(name, inputs, current_year, lambda: jsonify(build()))
+
+@app.route('/calculator-1-user-set-monthly-investment/chart-data')
+def calculator1_chart_data():
+    """
+    Returns the series of the Calculator 1 result chart as JSON columns.
+    Takes the same inputs as the form in the query string (simulations also need simulation_seed),
+    and answers repeat requests with 304 Not Modified.
+    """
+    try:
+        inputs = _calculator1_inputs_from_args(request.args)
+        simulation_params = _calculator1_simulation_from_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    current_year = inputs["current_year"]
+    inputs = {
+        "period_savings": inputs["period_savings"], "initial_investment": inputs["initial_investment"],
+        "annual_rate": inputs["annual_rate"], "safe_withdrawal_rate": inputs["safe_withdrawal_rate"],
+        "birth_year": inputs["birth_year"], "period_extra_deposits": inputs["period_extra_deposits"],
+        "simulation": simulation_params,
+    }
+
+    def build():
+        results, simulation = _calculator1_results(inputs, current_year)
+        return {
+            "years": [r["years"] for r in results],
+            "future_value": [r["future_value_raw"] for r in results],
+            "monthly_income": [r["monthly_income_raw"] for r in results],
+            "age": [r["age"] for r in results],
+            "future_year": [r["future_year"] for r in results],
+            "p10_future_value": [r["p10_future_value_raw"] for r in simulation or []],
+            "p90_future_value": [r["p90_future_value_raw"] for r in simulation or []],
+        }
+
+    try:
+        return _conditional_json('calculator1-chart', inputs, current_year, build)
+    except ValueError:
+        return jsonify(error="Ocorreu um erro durante o cálculo."), 400
+
+@app.route('/calculator-1-user-set-monthly-investment/backtest')
+def calculator1_backtest():
+    """
+    Replays the Calculator 1 contribution schedule against every historical start month of the local return series.
+    Takes the same inputs as the form in the query string (annual_rate is ignored), plus optional
+    'weights' (one per asset of the series, in %) for a portfolio rebalanced monthly.
+    Returns per-milestone percentiles, worst and best outcomes and the start months of the worst and best windows.
+    """
+    if return_series is None:
+        # Not an outage: the feature is simply not enabled on this server
+        return jsonify(error="O backtest histórico não está disponível neste servidor."), 404
+    try:
+        inputs = _calculator1_inputs_from_args(request.args)
+        weights_strs = request.args.getlist('weights')
+        weights = [parse_localized_number(w) for w in weights_strs] if weights_strs else list(return_series.default_weights)
+        if any(w is None for w in weights):
+            raise ValueError("Por favor, insira pesos numéricos válidos.")
+        weights = return_series.normalize_weights(weights).tolist()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    def build():
+        backtest = backtest_calculator1(return_series, inputs["initial_investment"], inputs["period_savings"],
+                                        inputs["period_extra_deposits"], weights)
+        return {
+            "assets": return_series.assets,
+            "weights": weights,
+            "first_month": return_series.month_label(0),
+            "last_month": return_series.month_label(return_series.months - 1),
+            "source": return_series.source,
+            "rows": summarize_backtest(return_series, backtest, inputs["safe_withdrawal_rate"]),
+        }
+
+    try:
+        return _conditional_json('calculator1-backtest', dict(inputs, annual_rate=None, weights=weights,
+                                                              series=return_series.version),
+                                 inputs["current_year"], build)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+def _calculator1_drawdown_from_args(args, safe_withdrawal_rate, max_paths=MAX_SIMULATION_PATHS, synchronous=False):
+    """
+    Parses the retirement drawdown arguments of Calculator 1 (see calculator1_drawdown).
+    With synchronous=True the number of paths is also capped by the retirement length (see DRAWDOWN_REFERENCE_YEARS).
+    Returns a dict of parsed values or raises ValueError with a user-facing message.
+    """
+    def number(name, default):
+        value = args.get(name, '').strip()
+        parsed = parse_localized_number(value) if value else default
+        if parsed is None:
+            raise ValueError("Por favor, insira valores numéricos válidos.")
+        return parsed
+
+    years = _int_arg(args, 'years', 25)
+    retirement_years = _int_arg(args, 'retirement_years', 30)
+    withdrawal_rate = number('withdrawal_rate', safe_withdrawal_rate)
+    inflation = number('inflation', 4.0)
+    success_target = number('success_target', 90.0)
+    volatility = number('volatility', 15.0)
+    simulation_paths = _int_arg(args, 'simulation_paths', 10000)
+    simulation_seed = _int_arg(args, 'simulation_seed', 0)
+
+    if years not in DURATIONS:
+        raise ValueError(f"O marco deve ser um destes: {', '.join(str(d) for d in DURATIONS)} anos.")
+    if retirement_years < 1 or retirement_years > MAX_PROJECTION_YEARS:
+        raise ValueError(f"A duração da aposentadoria deve ser entre 1 e {MAX_PROJECTION_YEARS} anos.")
+    if withdrawal_rate <= 0:
+        raise ValueError("Por favor, insira uma Taxa de Retirada válida e maior que 0.")
+    if inflation <= -100:
+        raise ValueError("Por favor, insira uma Inflação Anual válida.")
+    if success_target <= 0 or success_target > 100:
+        raise ValueError("A probabilidade de sucesso alvo deve ser maior que 0% e no máximo 100%.")
+    if volatility < 0:
+        raise ValueError("Por favor, insira uma Volatilidade Anual válida (maior ou igual a 0).")
+    if simulation_paths < 1 or simulation_paths > max_paths:
+        raise ValueError(f"O Número de Simulações deve ser entre 1 e {max_paths}.")
+    if simulation_seed < 0:
+        raise ValueError("A Semente deve ser um número inteiro não negativo.")
+    if synchronous:
+        max_paths = min(max_paths, max_paths * DRAWDOWN_REFERENCE_YEARS // retirement_years)
+        if simulation_paths > max_paths:
+            raise ValueError(f"Com {retirement_years} anos de aposentadoria, o Número de Simulações deve ser no máximo "
+                             f"{max_paths}; para mais simulações, envie o cálculo em segundo plano "
+                             f"(POST {url_for('job_submit', kind='calculator1_drawdown')}).")
+
+    return {
+        "years": years, "retirement_years": retirement_years, "withdrawal_rate": withdrawal_rate,
+        "inflation": inflation, "success_target": success_target, "volatility": volatility,
+        "paths": simulation_paths, "seed": simulation_seed,
+    }
+
+@app.route('/calculator-1-user-set-monthly-investment/drawdown')
+def calculator1_drawdown():
+    """
+    Simulates the retirement that starts from the Calculator 1 future value at one milestone.
+    Takes the same inputs as the form in the query string (annual_rate is the mean return during retirement,
+    volatility, simulation_paths and simulation_seed drive the simulated paths), plus:
+      - years: milestone whose future value starts the retirement (one of DURATIONS, default 25)
+      - retirement_years: length of the retirement (1 to MAX_PROJECTION_YEARS, default 30)
+        (beyond DRAWDOWN_REFERENCE_YEARS, simulation_paths is capped proportionally; use the job for larger runs)
+      - withdrawal_rate: annual withdrawal in % of the starting balance (default: safe_withdrawal_rate)
+      - inflation: annual inflation in %, applied to the withdrawals every month (default 4)
+      - success_target: survival probability in % the solved safe withdrawal rate must reach (default 90)
+    Returns the survival probability, median ending balances, the solved safe withdrawal rate and a survival curve.
+    """
+    try:
+        inputs = _calculator1_inputs_from_args(request.args)
+        drawdown_inputs = _calculator1_drawdown_from_args(request.args, inputs["safe_withdrawal_rate"], synchronous=True)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    current_year = inputs["current_year"]
+    calculator1_inputs = {
+        "period_savings": inputs["period_savings"], "initial_investment": inputs["initial_investment"],
+        "annual_rate": inputs["annual_rate"], "safe_withdrawal_rate": inputs["safe_withdrawal_rate"],
+        "birth_year": inputs["birth_year"], "period_extra_deposits": inputs["period_extra_deposits"],
+        "simulation": None,
+    }
+
+    def build():
+        results, _ = _calculator1_results(calculator1_inputs, current_year)
+        milestone = results[DURATIONS.index(drawdown_inputs["years"])]
+        drawdown = calculate_drawdown(milestone["future_value_raw"], drawdown_inputs["withdrawal_rate"],
+                                      inputs["annual_rate"], drawdown_inputs["volatility"], drawdown_inputs["inflation"],
+                                      drawdown_inputs["retirement_years"], drawdown_inputs["success_target"],
+                                      drawdown_inputs["paths"], drawdown_inputs["seed"])
+        return dict(drawdown, years=drawdown_inputs["years"], age=milestone["age"], future_year=milestone["future_year"])
+
+    try:
+        return _conditional_json('calculator1-drawdown', dict(calculator1_inputs, drawdown=drawdown_inputs),
+                                 current_year, build)
+    except ValueError:
+        return jsonify(error="Ocorreu um erro durante o cálculo."), 400
+
+@app.route('/calculator-1-user-set-monthly-investment/projection')
+def calculator1_projection():
+    """
+    Returns the Calculator 1 trajectory as JSON columns at monthly or yearly resolution.
+    Takes the same inputs as the form in the query string, plus:
+      - horizon: number of years to project (1 to MAX_PROJECTION_YEARS, default 50)
+      - resolution: 'monthly' or 'yearly' (default 'yearly')
+      - start / stop: window of points to return, in the chosen resolution (point 0 is today)
+    """
+    try:
+        inputs = _calculator1_inputs_from_args(request.args)
+        horizon = _int_arg(request.args, 'horizon', 50)
+        resolution = request.args.get('resolution', 'yearly')
+        start = _int_arg(request.args, 'start', 0)
+        stop = _int_arg(request.args, 'stop')
+        if horizon < 1 or horizon > MAX_PROJECTION_YEARS:
+            raise ValueError(f"O horizonte deve ser entre 1 e {MAX_PROJECTION_YEARS} anos.")
+        if resolution not in ('monthly', 'yearly'):
+            raise ValueError("A resolução deve ser 'monthly' ou 'yearly'.")
+        if start < 0 or (stop is not None and stop < start):
+            raise ValueError("Janela de pontos inválida.")
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    def build():
+        series = {"months": [], "future_value": [], "monthly_income": [], "age": [], "future_year": []}
+        for point in iter_calculator1_projection(inputs["initial_investment"], inputs["annual_rate"],
+                                                 inputs["safe_withdrawal_rate"], inputs["period_savings"],
+                                                 inputs["period_extra_deposits"], horizon, resolution, start, stop):
+            series["months"].append(point["month"])
+            series["future_value"].append(point["future_value"])
+            series["monthly_income"].append(point["monthly_income"])
+            if inputs["birth_year"]:
+                series["age"].append(inputs["current_year"] - inputs["birth_year"] + point["month"] // 12)
+                series["future_year"].append(inputs["current_year"] + point["month"] // 12)
+        return dict(resolution=resolution, horizon=horizon, start=start, **series)
+
+    return _conditional_json('calculator1-projection', dict(inputs, horizon=horizon, resolution=resolution,
+                                                            start=start, stop=stop),
+                             inputs["current_year"], build)
+
+@app.route('/calculator-1-user-set-monthly-investment/sensitivity')
+def calculator1_sensitivity():
+    """
+    Returns the Calculator 1 future value or monthly income at one milestone over a grid of
+    annual rates x constant monthly savings, computed in one vectorized pass.
+    Query arguments:
+      - initial_investment, safe_withdrawal_rate: same format as the form
+      - years: milestone in years (1 to MAX_PROJECTION_YEARS, default 20)
+      - metric: 'future_value' (default) or 'monthly_income'
+      - rate_min, rate_max, rate_steps: annual rate axis in % (default 2 to 12, 200 steps)
+      - savings_min, savings_max, savings_steps: monthly savings axis (default 0 to 10.000, 200 steps)
+      - format: 'json' (default) or 'binary'
+    The JSON body holds the axes and the grid rounded to whole currency units, row-major, with every row
+    delta-encoded (first value, then differences between neighbours). The binary body is the grid as
+    little-endian float32, row-major, with its shape in the X-Grid-Shape header (rates,savings).
+    """
+    args = request.args
+    try:
+        def number(name, default):
+            value = args.get(name, '').strip()
+            parsed = parse_localized_number(value) if value else default
+            if parsed is None:
+                raise ValueError("Por favor, insira valores numéricos válidos.")
+            return parsed
+
+        initial_investment = number('initial_investment', 0.0)
+        safe_withdrawal_rate = number('safe_withdrawal_rate', 4.0)
+        rate_min, rate_max = number('rate_min', 2.0), number('rate_max', 12.0)
+        savings_min, savings_max = number('savings_min', 0.0), number('savings_max', 10000.0)
+        years = _int_arg(args, 'years', 20)
+        rate_steps = _int_arg(args, 'rate_steps', 200)
+        savings_steps = _int_arg(args, 'savings_steps', 200)
+        metric = args.get('metric', 'future_value')
+        output_format = args.get('format', 'json')
+
+        if years < 1 or years > MAX_PROJECTION_YEARS:
+            raise ValueError(f"O horizonte deve ser entre 1 e {MAX_PROJECTION_YEARS} anos.")
+        if metric not in SENSITIVITY_METRICS:
+            raise ValueError(f"A métrica deve ser {' ou '.join(SENSITIVITY_METRICS)}.")
+        if output_format not in ('json', 'binary'):
+            raise ValueError("O formato deve ser 'json' ou 'binary'.")
+        if safe_withdrawal_rate <= 0:
+            raise ValueError("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.")
+        if rate_min <= 0 or rate_max < rate_min:
+            raise ValueError("O intervalo de taxas deve ser maior que 0 e crescente.")
+        if initial_investment < 0 or savings_min < 0 or savings_max < savings_min:
+            raise ValueError("O intervalo de aportes deve ser maior ou igual a 0 e crescente.")
+        for steps in (rate_steps, savings_steps):
+            if steps < 1 or steps > MAX_SENSITIVITY_STEPS:
+                raise ValueError(f"O número de pontos por eixo deve ser entre 1 e {MAX_SENSITIVITY_STEPS}.")
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    inputs = {
+        "initial_investment": initial_investment, "safe_withdrawal_rate": safe_withdrawal_rate,
+        "years": years, "metric": metric, "format": output_format,
+        "rates": [rate_min, rate_max, rate_steps], "savings": [savings_min, savings_max, savings_steps],
+    }
+
+    def build_response():
+        rates = np.linspace(rate_min, rate_max, rate_steps)
+        savings = np.linspace(savings_min, savings_max, savings_steps)
+        grid = sensitivity_grid(initial_investment, rates, savings, safe_withdrawal_rate, years, metric)
+        # Results beyond 2**53 can no longer be represented exactly as JSON integers
+        if not np.all(np.abs(grid) < 2 ** 53):
+            raise ValueError("Os valores da grade são grandes demais; reduza a taxa máxima ou o horizonte.")
+        if output_format == 'binary':
+            response = Response(grid.astype('<f4').tobytes(), mimetype='application/octet-stream')
+            response.headers['X-Grid-Shape'] = f'{rate_steps},{savings_steps}'
+            return response
+        values = np.rint(grid).astype(np.int64)
+        return jsonify(shape=[rate_steps, savings_steps], metric=metric, years=years,
+                       rates=np.round(rates, 4).tolist(), savings=np.round(savings, 2).tolist(),
+                       encoding='row-delta', values=np.diff(values, axis=1, prepend=0).ravel().tolist())
+
+    try:
+        return _conditional_response('calculator1-sensitivity', inputs, None, build_response)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
 
 # -------------------------------------------------------------
 # Calculator 2: Future Monthly Income Calculator
@@ -155,16 +796,19 @@ def calculator2_index():
     annual_rate = session.get('annual_rate_c2', '6,00')
     safe_withdrawal_rate = session.get('safe_withdrawal_rate_c2', '4,00')
     birth_year = session.get('birth_year_c2', '')
-    extra_deposit = session.get('extra_deposit_c2', '0,00')
-    extra_deposit_year = session.get('extra_deposit_year_c2', '')
+    cash_flows = session.get('cash_flows_c2')
+    if cash_flows is None and session.get('extra_deposit_year_c2'):
+        # Sessions saved by the single extra deposit form: the deposit was made at the end of its year
+        cash_flows = [[session.get('extra_deposit_c2', '0,00'), session['extra_deposit_year_c2'], '12']]
+    monthly_contribution = session.get('monthly_contribution_c2', '')
     return render_template('calculator2_index.html',
                            target_income=target_income,
                            initial_investment=initial_investment,
                            annual_rate=annual_rate,
                            safe_withdrawal_rate=safe_withdrawal_rate,
                            birth_year=birth_year,
-                           extra_deposit=extra_deposit,
-                           extra_deposit_year=extra_deposit_year)
+                           cash_flows=cash_flows or [],
+                           monthly_contribution=monthly_contribution)
 
 @app.route('/calculator-2-user-set-future-monthly-income/calculate', methods=['POST'])
 def calculator2_calculate():
@@ -177,33 +821,36 @@ def calculator2_calculate():
     annual_rate_str = request.form.get('annual_rate', '').strip()
     safe_withdrawal_rate_str = request.form.get('safe_withdrawal_rate', '').strip()
     birth_year_str = request.form.get('birth_year', '').strip()
-    extra_deposit_str = request.form.get('extra_deposit', '').strip()
-    extra_deposit_year_str = request.form.get('extra_deposit_year', '').strip()
+    monthly_contribution_str = request.form.get('monthly_contribution', '').strip()
 
     session['target_income'] = target_income_str if target_income_str else "7.000,00"
     session['initial_investment_c2'] = initial_investment_str if initial_investment_str else "10.000,00"
     session['annual_rate_c2'] = annual_rate_str if annual_rate_str else "6,00"
     session['safe_withdrawal_rate_c2'] = safe_withdrawal_rate_str if safe_withdrawal_rate_str else "4,00"
     session['birth_year_c2'] = birth_year_str
-    session['extra_deposit_c2'] = extra_deposit_str if extra_deposit_str else "0,00"
-    session['extra_deposit_year_c2'] = extra_deposit_year_str
+    session['monthly_contribution_c2'] = monthly_contribution_str
 
     target_income = parse_localized_number(target_income_str)
     initial_investment = parse_localized_number(initial_investment_str) if initial_investment_str else 0.0
     annual_rate = parse_localized_number(annual_rate_str) if annual_rate_str else None
     safe_withdrawal_rate = parse_localized_number(safe_withdrawal_rate_str) if safe_withdrawal_rate_str else 4.0
-    extra_deposit = parse_localized_number(extra_deposit_str) if extra_deposit_str else 0.0
-    
-    extra_deposit_year = None
-    if extra_deposit_year_str:
-        try:
-            extra_deposit_year = int(extra_deposit_year_str)
-            if extra_deposit_year <= 0 or extra_deposit_year > 100:
-                flash("Por favor, insira um ano válido para o aporte extra (entre 1 e 100).", "danger")
-                return redirect(url_for('calculator2_index'))
-        except ValueError:
-            flash("Por favor, insira um ano válido para o aporte extra.", "danger")
-            return redirect(url_for('calculator2_index'))
+    monthly_contribution = parse_localized_number(monthly_contribution_str) if monthly_contribution_str else None
+
+    cash_flow_rows = _cash_flow_rows(request.form)
+    try:
+        cash_flows = _cash_flows_from_rows(cash_flow_rows)
+        # The single extra deposit fields of the original form are still accepted and become one more cash flow
+        extra_deposit, extra_deposit_year = _legacy_extra_deposit(request.form)
+    except ValueError as e:
+        session['cash_flows_c2'] = cash_flow_rows
+        flash_validation_error(str(e), "danger")
+        return redirect(url_for('calculator2_index'))
+    merged = legacy_cash_flows(extra_deposit, extra_deposit_year, cash_flows)
+    if len(merged) > len(cash_flows):
+        # Shown as a cash flow row at the end of its year, so the page and the chart keep including it
+        cash_flow_rows.append([request.form.get('extra_deposit', '').strip(), str(extra_deposit_year), '12'])
+    cash_flows = sorted([list(flow) for flow in merged])
+    session['cash_flows_c2'] = cash_flow_rows
 
     birth_year = None
     current_year = datetime.date.today().year
@@ -211,36 +858,225 @@ def calculator2_calculate():
         try:
             birth_year = int(birth_year_str)
             if birth_year < 1900 or birth_year > current_year:
-                flash(f"O ano de nascimento deve ser entre 1900 e {current_year}.", "danger")
+                flash_validation_error(f"O ano de nascimento deve ser entre 1900 e {current_year}.", "danger")
                 return redirect(url_for('calculator2_index'))
         except ValueError:
-            flash("Por favor, insira um ano de nascimento válido.", "danger")
+            flash_validation_error("Por favor, insira um ano de nascimento válido.", "danger")
             return redirect(url_for('calculator2_index'))
 
     if target_income is None or target_income <= 0:
-        flash("Por favor, insira uma Renda Alvo válida e maior que 0.", "danger")
+        flash_validation_error("Por favor, insira uma Renda Alvo válida e maior que 0.", "danger")
         return redirect(url_for('calculator2_index'))
     if annual_rate is None or annual_rate <= 0:
-        flash("Por favor, insira uma Taxa de Retorno Anual válida e maior que 0.", "danger")
+        flash_validation_error("Por favor, insira uma Taxa de Retorno Anual válida e maior que 0.", "danger")
         return redirect(url_for('calculator2_index'))
     if safe_withdrawal_rate is None or safe_withdrawal_rate <= 0:
-        flash("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.", "danger")
+        flash_validation_error("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.", "danger")
         return redirect(url_for('calculator2_index'))
+    if monthly_contribution_str and (monthly_contribution is None or monthly_contribution < 0):
+        flash_validation_error("Por favor, insira um Aporte Mensal Planejado válido (maior ou igual a 0).", "danger")
+        return redirect(url_for('calculator2_index'))
+    lap('parse')
+
+    inputs = {
+        "target_income": target_income, "initial_investment": initial_investment,
+        "annual_rate": annual_rate, "safe_withdrawal_rate": safe_withdrawal_rate,
+        "birth_year": birth_year, "cash_flows": cash_flows,
+        "monthly_contribution": monthly_contribution,
+    }
 
     try:
-        results = calculate_calculator2(target_income, initial_investment, annual_rate, safe_withdrawal_rate, birth_year, current_year, extra_deposit, extra_deposit_year)
+        results, time_to_fi = _calculator2_results(inputs, current_year)
     except ValueError:
-        flash("Ocorreu um erro durante o cálculo.", "danger")
+        flash_calculation_error("Ocorreu um erro durante o cálculo.", "danger")
         return redirect(url_for('calculator2_index'))
+    lap('calculate')
+
+    chart_url = url_for('calculator2_chart_data',
+                        target_income=target_income_str, initial_investment=initial_investment_str,
+                        annual_rate=annual_rate_str, safe_withdrawal_rate=safe_withdrawal_rate_str,
+                        birth_year=birth_year_str, monthly_contribution=monthly_contribution_str,
+                        cash_flow_amount=[row[0] for row in cash_flow_rows],
+                        cash_flow_year=[row[1] for row in cash_flow_rows],
+                        cash_flow_month=[row[2] for row in cash_flow_rows])
 
     return render_template('calculator2_result.html', results=results,
+                           time_to_fi=time_to_fi,
                            target_income=session['target_income'],
                            initial_investment=session['initial_investment_c2'],
                            annual_rate=session['annual_rate_c2'],
                            safe_withdrawal_rate=session['safe_withdrawal_rate_c2'],
                            birth_year=session['birth_year_c2'],
-                           extra_deposit=session['extra_deposit_c2'],
-                           extra_deposit_year=session['extra_deposit_year_c2'])
+                           cash_flows=session['cash_flows_c2'],
+                           monthly_contribution=session['monthly_contribution_c2'],
+                           chart_url=chart_url)
+
+def _cash_flow_rows(source):
+    """
+    Collects the dated extra deposits and withdrawals of the Calculator 2 form as [amount, year, month] strings.
+    The rows come from the cash_flow_amount, cash_flow_year and cash_flow_month lists; rows left blank are dropped.
+    """
+    amounts = source.getlist('cash_flow_amount')
+    years = source.getlist('cash_flow_year')
+    months = source.getlist('cash_flow_month')
+    rows = []
+    for idx, amount in enumerate(amounts):
+        amount = amount.strip()
+        year = years[idx].strip() if idx < len(years) else ''
+        month = months[idx].strip() if idx < len(months) else ''
+        if amount or year:
+            rows.append([amount, year, month or '12'])
+    return rows
+
+def _legacy_extra_deposit(source):
+    """
+    Parses the single extra deposit of the original Calculator 2 form (extra_deposit at the end of extra_deposit_year).
+    Returns (amount, year), with year None when it was not given; raises ValueError with a user-facing message.
+    """
+    extra_deposit_str = source.get('extra_deposit', '').strip()
+    extra_deposit_year_str = source.get('extra_deposit_year', '').strip()
+    extra_deposit = parse_localized_number(extra_deposit_str) if extra_deposit_str else 0.0
+    if extra_deposit is None:
+        raise ValueError("Por favor, insira valores numéricos válidos.")
+    extra_deposit_year = None
+    if extra_deposit_year_str:
+        try:
+            extra_deposit_year = int(extra_deposit_year_str)
+        except ValueError:
+            raise ValueError("Por favor, insira um ano válido para o aporte extra.")
+        if extra_deposit_year <= 0 or extra_deposit_year > 100:
+            raise ValueError("Por favor, insira um ano válido para o aporte extra (entre 1 e 100).")
+    return extra_deposit, extra_deposit_year
+
+def _cash_flows_from_rows(rows):
+    """
+    Parses [amount, year, month] rows into a list of [month index, amount] pairs sorted by month,
+    where month index 1 is the end of the first month. Amounts may be negative (withdrawals).
+    Raises ValueError with a user-facing message.
+    """
+    if len(rows) > MAX_CASH_FLOWS:
+        raise ValueError(f"Informe no máximo {MAX_CASH_FLOWS} aportes ou retiradas extras.")
+    cash_flows = []
+    for amount_str, year_str, month_str in rows:
+        amount = parse_localized_number(amount_str) if amount_str else 0.0
+        if amount is None:
+            raise ValueError("Por favor, insira valores válidos para os aportes e retiradas extras.")
+        try:
+            year = int(year_str)
+            month = int(month_str)
+        except ValueError:
+            raise ValueError("Por favor, insira um ano válido para cada aporte ou retirada extra.")
+        if year <= 0 or year > 100:
+            raise ValueError("Por favor, insira um ano válido para cada aporte ou retirada extra (entre 1 e 100).")
+        if month < 1 or month > 12:
+            raise ValueError("Por favor, insira um mês válido para cada aporte ou retirada extra (entre 1 e 12).")
+        if amount:
+            cash_flows.append([(year - 1) * 12 + month, amount])
+    return sorted(cash_flows)
+
+def _calculator2_results(inputs, current_year):
+    """
+    Returns (results, time_to_fi) for parsed Calculator 2 inputs, going through the shared result cache.
+    time_to_fi is None when no monthly contribution was given; raises ValueError when the calculation fails.
+    """
+    cache_key = result_cache.make_key('calculator2', inputs, current_year)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached["results"], cached["time_to_fi"]
+
+    results = calculate_calculator2(inputs["target_income"], inputs["initial_investment"], inputs["annual_rate"],
+                                    inputs["safe_withdrawal_rate"], inputs["birth_year"], current_year,
+                                    cash_flows=inputs["cash_flows"])
+    time_to_fi = None
+    if inputs["monthly_contribution"] is not None:
+        time_to_fi = calculate_time_to_fi(inputs["target_income"], inputs["initial_investment"],
+                                          inputs["monthly_contribution"], inputs["annual_rate"],
+                                          inputs["safe_withdrawal_rate"], inputs["birth_year"], current_year,
+                                          cash_flows=inputs["cash_flows"])
+    result_cache.set(cache_key, {"results": results, "time_to_fi": time_to_fi})
+    return results, time_to_fi
+
+def _calculator2_inputs_from_args(args):
+    """
+    Parses Calculator 2 inputs from query-string arguments (same names and rules as the form).
+    Returns a dict of parsed values or raises ValueError with a user-facing message.
+    """
+    target_income_str = args.get('target_income', '').strip()
+    initial_investment_str = args.get('initial_investment', '').strip()
+    annual_rate_str = args.get('annual_rate', '').strip()
+    safe_withdrawal_rate_str = args.get('safe_withdrawal_rate', '').strip()
+    birth_year_str = args.get('birth_year', '').strip()
+    monthly_contribution_str = args.get('monthly_contribution', '').strip()
+    cash_flow_rows = _cash_flow_rows(args)
+
+    target_income = parse_localized_number(target_income_str)
+    initial_investment = parse_localized_number(initial_investment_str) if initial_investment_str else 0.0
+    annual_rate = parse_localized_number(annual_rate_str) if annual_rate_str else None
+    safe_withdrawal_rate = parse_localized_number(safe_withdrawal_rate_str) if safe_withdrawal_rate_str else 4.0
+    monthly_contribution = parse_localized_number(monthly_contribution_str) if monthly_contribution_str else None
+
+    if target_income is None or target_income <= 0:
+        raise ValueError("Por favor, insira uma Renda Alvo válida e maior que 0.")
+    if initial_investment is None:
+        raise ValueError("Por favor, insira valores numéricos válidos.")
+    if annual_rate is None or annual_rate <= 0:
+        raise ValueError("Por favor, insira uma Taxa de Retorno Anual válida e maior que 0.")
+    if safe_withdrawal_rate is None or safe_withdrawal_rate <= 0:
+        raise ValueError("Por favor, insira uma Taxa de Retirada Segura válida e maior que 0.")
+    if monthly_contribution_str and (monthly_contribution is None or monthly_contribution < 0):
+        raise ValueError("Por favor, insira um Aporte Mensal Planejado válido (maior ou igual a 0).")
+
+    # The single extra deposit fields are still accepted and become one more cash flow
+    extra_deposit, extra_deposit_year = _legacy_extra_deposit(args)
+    cash_flows = sorted([list(flow) for flow in legacy_cash_flows(extra_deposit, extra_deposit_year,
+                                                                  _cash_flows_from_rows(cash_flow_rows))])
+
+    birth_year = None
+    current_year = datetime.date.today().year
+    if birth_year_str:
+        try:
+            birth_year = int(birth_year_str)
+        except ValueError:
+            raise ValueError("Por favor, insira um ano de nascimento válido.")
+        if birth_year < 1900 or birth_year > current_year:
+            raise ValueError(f"O ano de nascimento deve ser entre 1900 e {current_year}.")
+
+    return {
+        "target_income": target_income,
+        "initial_investment": initial_investment,
+        "annual_rate": annual_rate,
+        "safe_withdrawal_rate": safe_withdrawal_rate,
+        "birth_year": birth_year,
+        "cash_flows": cash_flows,
+        "monthly_contribution": monthly_contribution,
+        "current_year": current_year,
+    }
+
+@app.route('/calculator-2-user-set-future-monthly-income/chart-data')
+def calculator2_chart_data():
+    """
+    Returns the series of the Calculator 2 result chart as JSON columns.
+    Takes the same inputs as the form in the query string and answers repeat requests with 304 Not Modified.
+    """
+    try:
+        inputs = _calculator2_inputs_from_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    current_year = inputs.pop("current_year")
+
+    def build():
+        results, _ = _calculator2_results(inputs, current_year)
+        return {
+            "years": [r["years"] for r in results],
+            "required_investment": [r["required_investment_raw"] for r in results],
+            "age": [r["age"] for r in results],
+            "future_year": [r["future_year"] for r in results],
+        }
+
+    try:
+        return _conditional_json('calculator2-chart', inputs, current_year, build)
+    except ValueError:
+        return jsonify(error="Ocorreu um erro durante o cálculo."), 400
 
 # -------------------------------------------------------------
 # Calculator 3: Monthly Savings Potential Calculator
@@ -301,7 +1137,7 @@ def calculator3_calculate():
 
     salary = parse_localized_number(salary_str)
     if salary is None or salary <= 0:
-        flash("Por favor, insira um Salário Líquido válido (deve ser maior que 0).", "danger")
+        flash_validation_error("Por favor, insira um Salário Líquido válido (deve ser maior que 0).", "danger")
         return redirect(url_for('calculator3_index'))
 
     housing_val = parse_localized_number(housing_str) if housing_str else 0.0
@@ -317,8 +1153,11 @@ def calculator3_calculate():
     total_expenses = (housing_val + utilities_val + transportation_val +
                       food_val + hobbies_val + subscriptions_val +
                       healthcare_val + debt_val + other_val)
+    lap('parse')
 
+    # Not cached: the subtraction is far cheaper than a result cache round trip
     result_display = calculate_calculator3(salary, total_expenses)
+    lap('calculate')
 
     return render_template('calculator3_result.html',
                            result=result_display,
@@ -333,5 +1172,227 @@ def calculator3_calculate():
                            debt=session['debt'],
                            other=session['other'])
 
+@app.route('/calculator-3-user-set-monthly-savings/import-statement', methods=['POST'])
+def calculator3_import_statement():
+    """
+    Imports an OFX or CSV bank statement for Calculator 3.
+    Debits are categorized into the expense fields and averaged per month; the salary field
+    falls back to the average monthly credits when left empty.
+    """
+    upload = request.files.get('statement')
+    salary_str = request.form.get('salary', '').strip()
+    if upload is None or not upload.filename:
+        flash_validation_error("Por favor, selecione um extrato bancário (OFX ou CSV).", "danger")
+        return redirect(url_for('calculator3_index'))
+
+    try:
+        summary = summarize_statement(upload.stream, upload.filename, statement_matcher)
+    except ValueError as e:
+        flash_validation_error(str(e), "danger")
+        return redirect(url_for('calculator3_index'))
+    lap('parse')
+
+    for category, average in summary["expenses"].items():
+        session[category] = format_currency(average)
+    if not salary_str and summary["income"] > 0:
+        salary_str = format_currency(summary["income"])
+    session['salary'] = salary_str
+
+    salary = parse_localized_number(salary_str)
+    if salary is None or salary <= 0:
+        flash_validation_error("Extrato importado. Por favor, insira um Salário Líquido válido (deve ser maior que 0).", "warning")
+        return redirect(url_for('calculator3_index'))
+
+    total_expenses = sum(summary["expenses"].values())
+    result_display = calculate_calculator3(salary, total_expenses)
+    lap('calculate')
+
+    return render_template('calculator3_result.html',
+                           result=result_display,
+                           statement_summary=summary,
+                           salary=session['salary'],
+                           housing=session['housing'],
+                           utilities=session['utilities'],
+                           transportation=session['transportation'],
+                           food=session['food'],
+                           hobbies=session['hobbies'],
+                           subscriptions=session['subscriptions'],
+                           healthcare=session['healthcare'],
+                           debt=session['debt'],
+                           other=session['other'])
+
+# -------------------------------------------------------------
+# Cache statistics
+# -------------------------------------------------------------
+@app.route('/cache/stats')
+def cache_stats():
+    """
+    Returns hit rate, size and eviction counters of the shared result cache and of this worker's growth factor cache.
+    """
+    return jsonify(result_cache=result_cache.stats(), growth_factor_cache=growth_factor_cache.stats())
+
+# -------------------------------------------------------------
+# Fingerprinted static assets
+# -------------------------------------------------------------
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """
+    Serves a fingerprinted asset from static/dist with immutable cache headers,
+    sending the brotli or gzip variant built ahead of time when the client accepts it.
+    """
+    accepted = {token for token, _ in ENCODINGS if request.accept_encodings[token]}
+    name, encoding = asset_manifest.precompressed(filename, accepted)
+    response = send_from_directory(asset_manifest.dist_dir, name, mimetype=content_type(filename),
+                                   max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# -------------------------------------------------------------
+# Metrics
+# -------------------------------------------------------------
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Exports this worker's request phase histograms and counters in the Prometheus text format.
+    """
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+# -------------------------------------------------------------
+# Background jobs: submit, poll, fetch the result or cancel
+# -------------------------------------------------------------
+def _job_params(kind, args):
+    """
+    Parses the inputs of a job from the request, with the same names and rules as the synchronous routes.
+    Returns the JSON-serializable job parameters or raises ValueError with a user-facing message.
+    """
+    if kind.startswith('bulk_'):
+        upload = request.files.get('file')
+        data = upload.read(MAX_JOB_CSV_BYTES + 1) if upload else request.get_data()
+        if len(data) > MAX_JOB_CSV_BYTES:
+            raise ValueError(f"O arquivo deve ter no máximo {MAX_JOB_CSV_BYTES // (1024 * 1024)} MB.")
+        # The whole result is stored at once, so refuse uploads whose result could not fit before running them
+        max_rows = bulk_row_limit(kind[len('bulk_'):], len(data), job_store.max_result_bytes)
+        if data.count(b'\n') > max_rows:
+            raise ValueError(f"O arquivo deve ter no máximo {max_rows} linhas.")
+        return {"csv": data.decode('utf-8-sig', errors='replace'), "current_year": datetime.date.today().year}
+
+    args = args.copy()
+    if not args.get('simulation_seed'):
+        args['simulation_seed'] = str(secrets.randbelow(2 ** 32))
+    inputs = _calculator1_inputs_from_args(args)
+    params = {key: inputs[key] for key in ("period_savings", "initial_investment", "annual_rate",
+                                           "safe_withdrawal_rate", "birth_year", "current_year",
+                                           "period_extra_deposits")}
+    if kind == 'calculator1_simulation':
+        args['simulation_mode'] = 'on'
+        volatility, paths, seed = _calculator1_simulation_from_args(args, MAX_JOB_SIMULATION_PATHS)
+        return dict(params, volatility=volatility, paths=paths, seed=seed)
+    return dict(params, **_calculator1_drawdown_from_args(args, inputs["safe_withdrawal_rate"], MAX_JOB_SIMULATION_PATHS))
+
+def _job_status(job):
+    status = {key: job[key] for key in ("id", "kind", "status", "progress", "error",
+                                        "created_at", "started_at", "finished_at")}
+    status["status_url"] = url_for('job_status', job_id=job["id"])
+    if job["status"] == 'completed':
+        status["result_url"] = url_for('job_result', job_id=job["id"])
+    return status
+
+@app.route('/api/jobs/<kind>', methods=['POST'])
+def job_submit(kind):
+    """
+    Queues a background job and answers 202 with its ID and status URL.
+    Kinds: calculator1_simulation and calculator1_drawdown take the inputs of the Monte Carlo mode and of
+    the drawdown endpoint as form or query arguments (up to MAX_JOB_SIMULATION_PATHS paths);
+    bulk_calculator1/2/3 take a CSV like the bulk API, as an upload in 'file' or as the request body.
+    Answers 503 when this worker's job queue is full.
+    """
+    if kind not in JOB_KINDS:
+        abort(404)
+    try:
+        params = _job_params(kind, request.values)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    try:
+        job_id = job_runner.submit(kind, params)
+    except JobQueueFull:
+        response = jsonify(error="Muitos cálculos em andamento; tente novamente em instantes.")
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+
+    response = jsonify(_job_status(job_store.get(job_id)))
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_status', job_id=job_id)
+    return response
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Returns the status and progress (0 to 1) of a job.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify(error="Cálculo não encontrado ou expirado."), 404
+    return jsonify(_job_status(job))
+
+@app.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    """
+    Returns the result of a completed job; 202 with the status while it is still queued or running,
+    409 when it failed or was cancelled.
+    """
+    job = job_store.get(job_id, with_result=True)
+    if job is None:
+        return jsonify(error="Cálculo não encontrado ou expirado."), 404
+    if job["status"] in ('queued', 'running'):
+        return jsonify(_job_status(job)), 202
+    if job["status"] != 'completed':
+        return jsonify(_job_status(job)), 409
+    return jsonify(job["result"])
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def job_cancel(job_id):
+    """
+    Cancels a job: a queued job never starts and a running one stops at its next progress report.
+    """
+    job = job_store.cancel(job_id)
+    if job is None:
+        return jsonify(error="Cálculo não encontrado ou expirado."), 404
+    return jsonify(_job_status(job))
+
+@app.route('/api/jobs/stats')
+def job_stats():
+    """
+    Returns the shared job counts per status, stored result size and average queue wait and run time,
+    plus this worker's pool size, running and waiting jobs and saturation.
+    """
+    return jsonify(jobs=job_store.stats(), worker=job_runner.stats())
+
+# -------------------------------------------------------------
+# Bulk API: CSV of client profiles in, NDJSON results out
+# -------------------------------------------------------------
+@app.route('/api/bulk/<calculator>', methods=['POST'])
+def bulk_calculate(calculator):
+    """
+    Scores a CSV of Calculator 1, 2 or 3 inputs and streams one NDJSON line per row.
+    Accepts either a multipart upload in the 'file' field or a raw text/csv request body.
+    Does not touch the session and never loads the whole upload into memory.
+    """
+    if calculator not in BULK_CALCULATORS:
+        abort(404)
+
+    upload = request.files.get('file')
+    raw = upload.stream if upload else io.BufferedReader(request.stream)
+    # Invalid UTF-8 bytes become U+FFFD so that only their rows fail (see iter_bulk_results)
+    lines = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+    current_year = datetime.date.today().year
+
+    return Response(stream_with_context(iter_bulk_results(calculator, lines, current_year)),
+                    mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
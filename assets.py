@@ -0,0 +1,233 @@
+"""
+assets.py
+
+Self-hosted static assets.
+The build step (`python assets.py`) downloads the pinned third-party libraries into static/vendor,
+checks every vendored file against its pinned integrity hash (failing the build on a missing or
+mismatching file), copies them and our own CSS/JS into static/dist under content-hashed file names, writes gzip
+(and, when the brotli package is installed, brotli) variants next to them and records the
+mapping in static/dist/manifest.json.
+
+At runtime asset_url() resolves a logical path through the manifest, and the app serves the
+fingerprinted files with immutable cache headers, picking the precompressed variant that
+matches Accept-Encoding. Without a build, pages fall back to the plain static files and the CDNs.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Pinned third-party assets: logical path under static/ -> (source URL, Subresource Integrity hash).
+# The hashes are the ones published by the projects; print the hash of a downloaded file with
+# `python assets.py --integrity` and review it before pinning a new version.
+VENDOR_ASSETS = {
+    'vendor/bootstrap.min.css': ('https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+                                 'sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM'),
+    'vendor/bootstrap.bundle.min.js': ('https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+                                       'sha384-geWF76RCwLtnZ8qwWowPQNguL3RmwHVBC9FhGdlKrxdiJJigb/j/68SIy3Te4Bkz'),
+    # Not pinned yet: `python assets.py` fails until their hashes are reviewed and filled in,
+    # so render.yaml does not run the build and pages load these two from the CDNs
+    'vendor/cleave.min.js': ('https://cdnjs.cloudflare.com/ajax/libs/cleave.js/1.6.0/cleave.min.js', None),
+    'vendor/chart.umd.js': ('https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js', None),
+}
+
+# Directories under static/ whose files are fingerprinted
+ASSET_DIRS = ['css', 'js', 'vendor']
+
+# Only text assets benefit from precompression
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map', '.txt')
+
+# Precompressed variants in order of preference: Accept-Encoding token -> file suffix
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Fingerprinted files never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# -------------------------------------------------------------
+# Build
+# -------------------------------------------------------------
+class AssetBuildError(Exception):
+    """
+    Raised when a vendored asset is missing, unpinned or does not match its pinned hash.
+    """
+
+def integrity(content, algorithm='sha384'):
+    """
+    Returns the Subresource Integrity value of content, e.g. 'sha384-<base64 digest>'.
+    """
+    digest = hashlib.new(algorithm, content).digest()
+    return f"{algorithm}-{base64.b64encode(digest).decode('ascii')}"
+
+def _matches(content, expected):
+    algorithm = expected.split('-', 1)[0]
+    return integrity(content, algorithm) == expected
+
+def _download(url):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return response.read()
+
+def vendor(offline=False):
+    """
+    Downloads every pinned asset that is not in static/vendor yet and checks every vendored file
+    against its pinned hash; a download that does not match is never written.
+    With offline=True nothing is downloaded and missing files are errors.
+    Raises AssetBuildError listing every missing, unpinned or mismatching asset.
+    """
+    errors = []
+    for logical_path, (url, expected) in VENDOR_ASSETS.items():
+        path = os.path.join(STATIC_DIR, logical_path)
+        if expected is None:
+            errors.append(f"static/{logical_path}: no integrity hash pinned in VENDOR_ASSETS")
+            continue
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                if not _matches(f.read(), expected):
+                    errors.append(f"static/{logical_path}: content does not match the pinned {expected}")
+            continue
+        if offline:
+            errors.append(f"static/{logical_path}: missing (run the build online or commit static/vendor)")
+            continue
+        content = _download(url)
+        if not _matches(content, expected):
+            errors.append(f"{url}: download does not match the pinned {expected}")
+            continue
+        _write(path + '.part', content)
+        os.replace(path + '.part', path)
+        print(f"Downloaded {url} -> static/{logical_path}")
+    if errors:
+        raise AssetBuildError("\n".join(errors))
+
+def print_integrity():
+    """
+    Prints the integrity hash of every vendored file (downloading missing ones without saving them),
+    so that new pins can be reviewed before they go into VENDOR_ASSETS.
+    """
+    for logical_path, (url, _) in VENDOR_ASSETS.items():
+        path = os.path.join(STATIC_DIR, logical_path)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                content = f.read()
+        else:
+            content = _download(url)
+        print(f"{logical_path}: {integrity(content)}")
+
+def fingerprint(logical_path, content, length=12):
+    """
+    Inserts the first characters of the content's SHA-256 before the extension: css/style.css -> css/style.3f2a...css
+    """
+    root, ext = os.path.splitext(logical_path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:length]}{ext}"
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def build(offline=False):
+    """
+    Vendors, fingerprints and precompresses every asset into static/dist and writes the manifest.
+    Returns the manifest (logical path -> fingerprinted path); raises AssetBuildError (see vendor()).
+    """
+    vendor(offline)
+
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    manifest = {}
+    for directory in ASSET_DIRS:
+        for root, _, files in os.walk(os.path.join(STATIC_DIR, directory)):
+            for name in sorted(files):
+                if name.endswith('.part'):
+                    continue
+                source = os.path.join(root, name)
+                logical_path = os.path.relpath(source, STATIC_DIR).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    content = f.read()
+                target_name = fingerprint(logical_path, content)
+                target = os.path.join(DIST_DIR, target_name)
+                _write(target, content)
+                if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    _write(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        _write(target + '.br', brotli.compress(content, quality=11))
+                manifest[logical_path] = target_name
+
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if brotli is None:
+        print("brotli is not installed; only gzip variants were generated.")
+    print(f"Wrote {len(manifest)} assets to static/dist")
+    return manifest
+
+# -------------------------------------------------------------
+# Runtime
+# -------------------------------------------------------------
+class AssetManifest:
+    """
+    Resolves logical asset paths to fingerprinted ones using static/dist/manifest.json (loaded once).
+    """
+
+    def __init__(self, dist_dir=DIST_DIR):
+        self.dist_dir = dist_dir
+        self.entries = {}
+        self.missing_vendor = {path for path in VENDOR_ASSETS if not os.path.exists(os.path.join(STATIC_DIR, path))}
+        if self.missing_vendor:
+            logger.warning("Unbuilt checkout: loading %s from the CDNs until `python assets.py` succeeds.",
+                           ', '.join(sorted(self.missing_vendor)))
+        try:
+            with open(os.path.join(dist_dir, MANIFEST_NAME)) as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            logger.exception("Could not read the asset manifest; serving unversioned assets.")
+
+    def url(self, logical_path, url_for):
+        """
+        Returns the URL of an asset: the fingerprinted file when it was built, the plain static file otherwise,
+        or the pinned CDN URL for a library that was never vendored.
+        """
+        target = self.entries.get(logical_path)
+        if target is not None:
+            return url_for('asset', filename=target)
+        if logical_path in self.missing_vendor:
+            return VENDOR_ASSETS[logical_path][0]
+        return url_for('static', filename=logical_path)
+
+    def precompressed(self, filename, accepted_encodings):
+        """
+        Picks the file to send for a fingerprinted asset, given the encodings the client accepts.
+        Returns (file name inside dist_dir, Content-Encoding or None).
+        """
+        for token, suffix in ENCODINGS:
+            if token in accepted_encodings and os.path.isfile(os.path.join(self.dist_dir, filename + suffix)):
+                return filename + suffix, token
+        return filename, None
+
+def content_type(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+if __name__ == '__main__':
+    if '--integrity' in sys.argv[1:]:
+        print_integrity()
+    else:
+        try:
+            build(offline='--offline' in sys.argv[1:])
+        except AssetBuildError as e:
+            sys.exit(f"Asset build failed:\n{e}")
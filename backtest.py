@@ -0,0 +1,237 @@
+"""
+backtest.py
+
+Historical rolling-window backtests for Calculator 1.
+A local file of monthly asset returns (a .npy matrix of shape (months, assets) plus a JSON sidecar
+with the first month and the asset names) is memory-mapped once per process. For every portfolio mix
+the monthly log returns are turned into prefix sums, so the growth factor of any window is
+exp(L[end] - L[start]) and the contribution schedule of every historical start month is evaluated
+in one vectorized pass.
+
+Run `python backtest.py convert returns.csv data/returns.npy` to build the data file from a CSV
+with a date column (YYYY-MM or YYYY-MM-DD) followed by one column of monthly returns per asset.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from utils import DURATIONS, parse_localized_number
+
+logger = logging.getLogger(__name__)
+
+MONTH_PATTERN = re.compile(r'^(\d{4})-(\d{1,2})')
+
+def sidecar_path(path):
+    """
+    The metadata file that accompanies a returns file: data/returns.npy -> data/returns.json
+    """
+    return os.path.splitext(path)[0] + '.json'
+
+class ReturnSeries:
+    """
+    Memory-mapped monthly returns with cached log-return prefix sums per portfolio mix.
+    For weights w, prefix(w) returns L and Q where L[i] is the sum of the first i monthly log returns
+    and Q[i] the sum of exp(-L[1..i]), so a window's growth factor and the discounted sum of its
+    monthly contributions are both O(1).
+    """
+
+    def __init__(self, path, max_cached_portfolios=16):
+        self.path = path
+        self.returns = np.load(path, mmap_mode='r')
+        if self.returns.ndim == 1:
+            self.returns = self.returns.reshape(-1, 1)
+        with open(sidecar_path(path)) as f:
+            meta = json.load(f)
+
+        match = MONTH_PATTERN.match(str(meta.get('start', '')))
+        if not match:
+            raise ValueError("The returns sidecar needs a 'start' month (YYYY-MM).")
+        self.start_year, self.start_month = int(match.group(1)), int(match.group(2))
+        self.assets = meta.get('assets') or [f'asset_{i + 1}' for i in range(self.returns.shape[1])]
+        if len(self.assets) != self.returns.shape[1]:
+            raise ValueError("The returns sidecar lists a different number of assets than the data file.")
+        default_weights = meta.get('default_weights') or [1.0] * len(self.assets)
+        self.default_weights = self.normalize_weights(default_weights)
+        self.source = meta.get('source', '')
+
+        stat = os.stat(path)
+        self.version = hashlib.sha256(
+            json.dumps([meta, self.returns.shape, stat.st_size, stat.st_mtime], sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        self.max_cached_portfolios = max_cached_portfolios
+        self._prefixes = OrderedDict()
+
+    @property
+    def months(self):
+        return self.returns.shape[0]
+
+    def month_label(self, index):
+        """
+        Calendar month ('YYYY-MM') of the given row of the series.
+        """
+        total = self.start_year * 12 + self.start_month - 1 + int(index)
+        return f"{total // 12:04d}-{total % 12 + 1:02d}"
+
+    def normalize_weights(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != (len(self.assets),) or np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError(f"Informe {len(self.assets)} pesos não negativos com soma maior que 0.")
+        return weights / weights.sum()
+
+    def prefix(self, weights):
+        """
+        Returns (L, Q) for a portfolio rebalanced monthly to the given weights; both have months + 1 entries.
+        """
+        weights = self.normalize_weights(weights)
+        key = tuple(np.round(weights, 6))
+        cached = self._prefixes.get(key)
+        if cached is not None:
+            self._prefixes.move_to_end(key)
+            return cached
+
+        portfolio = np.asarray(self.returns @ weights, dtype=float)
+        if np.any(portfolio <= -1) or not np.all(np.isfinite(portfolio)):
+            raise ValueError("A série histórica contém retornos inválidos para esta carteira.")
+        log_prefix = np.concatenate([[0.0], np.cumsum(np.log1p(portfolio))])
+        discount_prefix = np.concatenate([[0.0], np.cumsum(np.exp(-log_prefix[1:]))])
+
+        self._prefixes[key] = (log_prefix, discount_prefix)
+        if len(self._prefixes) > self.max_cached_portfolios:
+            self._prefixes.popitem(last=False)
+        return log_prefix, discount_prefix
+
+def load_return_series(path):
+    """
+    Returns the ReturnSeries at path, or None (backtests disabled) when the file is absent or unreadable.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ReturnSeries(path)
+    except (OSError, ValueError):
+        logger.exception("Could not load the backtest returns at %s; backtests disabled.", path)
+        return None
+
+def backtest_calculator1(series, initial_investment, period_savings, period_extra_deposits=None, weights=None, durations=DURATIONS):
+    """
+    Replays the Calculator 1 contribution schedule from every historical start month of the series.
+    Monthly savings are invested at the end of each month and extra deposits at the end of their
+    milestone period, exactly like calculate_calculator1.
+    Returns a dict with the start month indices and a (starts, milestones) matrix of future values,
+    NaN where a window runs past the end of the series.
+    """
+    log_prefix, discount_prefix = series.prefix(series.default_weights if weights is None else weights)
+    n_months = len(log_prefix) - 1
+    milestone_months = np.asarray(durations, dtype=int) * 12
+
+    if not isinstance(period_savings, list):
+        period_savings = [period_savings] * len(durations)
+    if period_extra_deposits is None:
+        period_extra_deposits = [0.0] * len(durations)
+    savings = np.asarray(period_savings, dtype=float)
+    extras = np.asarray(period_extra_deposits, dtype=float)
+
+    starts = np.arange(max(n_months - milestone_months[0] + 1, 0))
+    if not len(starts):
+        raise ValueError("A série histórica é curta demais para o primeiro marco.")
+
+    # Period boundaries (start month, then every milestone) for every window, clipped to the series
+    bounds = starts[:, np.newaxis] + np.concatenate([[0], milestone_months])[np.newaxis, :]
+    valid = bounds[:, 1:] <= n_months
+    bounds = np.minimum(bounds, n_months)
+
+    # Contributions of each period discounted to month 0 of the series, then accumulated across periods
+    period_values = (savings * (discount_prefix[bounds[:, 1:]] - discount_prefix[bounds[:, :-1]])
+                     + extras * np.exp(-log_prefix[bounds[:, 1:]]))
+    discounted = float(initial_investment) * np.exp(-log_prefix[starts])[:, np.newaxis] + np.cumsum(period_values, axis=1)
+    future_value = np.exp(log_prefix[bounds[:, 1:]]) * discounted
+    future_value[~valid] = np.nan
+
+    return {"years": np.asarray(durations, dtype=float), "starts": starts, "future_value": future_value}
+
+def summarize_backtest(series, backtest, safe_withdrawal_rate):
+    """
+    Reduces a backtest to per-milestone rows with the number of windows, the P10/P50/P90, worst and best
+    future values and monthly incomes, and the start months of the worst and best windows.
+    """
+    monthly_withdrawal = (safe_withdrawal_rate / 100) / 12
+    rows = []
+    for i, years in enumerate(backtest["years"]):
+        column = backtest["future_value"][:, i]
+        valid = ~np.isnan(column)
+        if not valid.any():
+            rows.append({"years": int(years), "windows": 0})
+            continue
+        values = column[valid]
+        starts = backtest["starts"][valid]
+        p10, p50, p90 = np.percentile(values, [10, 50, 90])
+        worst, best = int(np.argmin(values)), int(np.argmax(values))
+        row = {"years": int(years), "windows": int(valid.sum())}
+        for name, value in [("p10", p10), ("p50", p50), ("p90", p90), ("worst", values[worst]), ("best", values[best])]:
+            row[f"{name}_future_value"] = float(value)
+            row[f"{name}_monthly_income"] = float(value * monthly_withdrawal)
+        row["worst_start"] = series.month_label(starts[worst])
+        row["best_start"] = series.month_label(starts[best])
+        rows.append(row)
+    return rows
+
+def convert_csv(csv_path, output_path, percent=False, source=''):
+    """
+    Converts a CSV of monthly returns into the .npy matrix and JSON sidecar read by ReturnSeries.
+    The first column holds consecutive months (YYYY-MM or YYYY-MM-DD); every other column is one asset.
+    Returns are decimals (0.01 = 1%) unless percent is True. Commas are read as decimal marks.
+    """
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        header = f.readline()
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        assets = [name.strip() for name in next(csv.reader([header], delimiter=delimiter))[1:]]
+        months = []
+        rows = []
+        for line_number, row in enumerate(csv.reader(f, delimiter=delimiter), start=2):
+            if not row or not row[0].strip():
+                continue
+            match = MONTH_PATTERN.match(row[0].strip())
+            if not match:
+                raise ValueError(f"Line {line_number}: unrecognized month {row[0]!r}.")
+            values = [parse_localized_number(v) if ',' in v else float(v) for v in row[1:len(assets) + 1]]
+            if len(values) != len(assets) or any(v is None for v in values):
+                raise ValueError(f"Line {line_number}: expected {len(assets)} numeric returns.")
+            months.append(int(match.group(1)) * 12 + int(match.group(2)) - 1)
+            rows.append(values)
+
+    if not rows:
+        raise ValueError("No returns found.")
+    if any(b - a != 1 for a, b in zip(months, months[1:])):
+        raise ValueError("Months must be consecutive and in ascending order.")
+
+    returns = np.asarray(rows, dtype=float)
+    if percent:
+        returns /= 100
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    np.save(output_path, returns)
+    with open(sidecar_path(output_path), 'w') as f:
+        json.dump({"start": f"{months[0] // 12:04d}-{months[0] % 12 + 1:02d}", "assets": assets,
+                   "default_weights": [1.0] * len(assets), "frequency": "monthly", "source": source}, f, indent=2)
+    return returns.shape
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Builds the backtest returns file from a CSV.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    convert = subcommands.add_parser('convert', help='convert a CSV of monthly returns')
+    convert.add_argument('csv_path')
+    convert.add_argument('output_path')
+    convert.add_argument('--percent', action='store_true', help='returns are given in percent')
+    convert.add_argument('--source', default='', help='description of where the data comes from')
+    args = parser.parse_args()
+
+    shape = convert_csv(args.csv_path, args.output_path, args.percent, args.source)
+    print(f"Wrote {shape[0]} months x {shape[1]} assets to {args.output_path} and {sidecar_path(args.output_path)}")
@@ -0,0 +1,92 @@
+"""
+benchmarks/common.py
+
+Shared helpers for the benchmark suite: percentiles, baseline files and regression checks.
+"""
+
+import json
+import os
+import platform
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# Metrics where a higher value is better; every other metric is a latency (lower is better)
+HIGHER_IS_BETTER = {'rps'}
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+def load_baseline(path):
+    """
+    Returns the stored results, or None when no baseline has been saved yet.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["results"]
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({"machine": platform.node(), "python": platform.python_version(), "results": results},
+                  f, indent=2, sort_keys=True)
+
+def find_regressions(results, baseline, threshold, metrics):
+    """
+    Compares results against a baseline; both map a case name to a dict of metrics.
+    Returns human-readable descriptions of every metric that got worse by more than threshold (e.g. 0.2 = 20%).
+    """
+    regressions = []
+    for case, values in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        for metric in metrics:
+            old, new = previous.get(metric), values.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                regressions.append(f"{case} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+def report_and_check(name, results, args, metrics):
+    """
+    Saves or compares the baseline according to the command-line arguments.
+    Returns the process exit code (1 when a regression past the threshold was found).
+    """
+    path = args.baseline or baseline_path(name)
+    if args.save_baseline:
+        save_baseline(path, results)
+        print(f"Baseline saved to {path}")
+        return 0
+
+    baseline = load_baseline(path)
+    if baseline is None:
+        print(f"No baseline at {path}; run with --save-baseline to create one.")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.threshold, metrics)
+    if regressions:
+        print(f"Regressions past {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"No regressions past {args.threshold:.0%} against {path}")
+    return 0
+
+def add_baseline_arguments(parser):
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--baseline', help='baseline file (default: benchmarks/baselines/<suite>.json)')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative regression before failing (default: 0.2 = 20%%)')
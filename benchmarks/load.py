@@ -0,0 +1,193 @@
+"""
+benchmarks/load.py
+
+End-to-end load test: starts the app under gunicorn on a free local port for each worker
+configuration and drives concurrent POSTs to every calculate route.
+Reports p50/p95/p99 latency and requests per second per route and configuration.
+
+Usage (from the project root):
+    python -m benchmarks.load                          # compare against the saved baseline
+    python -m benchmarks.load --workers 1,2,4 --save-baseline
+    python -m benchmarks.load --cache                  # keep the result cache on (repeated inputs hit it)
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import add_baseline_arguments, percentile, report_and_check  # noqa: E402
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _localized(value):
+    return f"{value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+def _calculator1_form(rng):
+    return {
+        'monthly_savings': _localized(rng.uniform(500, 10000)), 'initial_investment': _localized(rng.uniform(0, 1e6)),
+        'annual_rate': _localized(rng.uniform(3, 12)), 'safe_withdrawal_rate': '4,00', 'birth_year': '1990',
+    }
+
+def _calculator2_form(rng):
+    # Up to three dated extra deposits or withdrawals, sent as parallel lists like the form's rows
+    cash_flows = [(_localized(rng.uniform(-50000, 100000)), str(rng.randint(1, 50)), str(rng.randint(1, 12)))
+                  for _ in range(rng.randint(0, 3))]
+    return {
+        'target_income': _localized(rng.uniform(2000, 30000)), 'initial_investment': _localized(rng.uniform(0, 1e6)),
+        'annual_rate': _localized(rng.uniform(3, 12)), 'safe_withdrawal_rate': '4,00', 'birth_year': '1990',
+        'cash_flow_amount': [amount for amount, _, _ in cash_flows],
+        'cash_flow_year': [year for _, year, _ in cash_flows],
+        'cash_flow_month': [month for _, _, month in cash_flows],
+        'monthly_contribution': _localized(rng.uniform(500, 10000)),
+    }
+
+def _calculator3_form(rng):
+    form = {'salary': _localized(rng.uniform(5000, 30000))}
+    for field in ['housing', 'utilities', 'transportation', 'food', 'hobbies',
+                  'subscriptions', 'healthcare', 'debt', 'other']:
+        form[field] = _localized(rng.uniform(0, 800))
+    return form
+
+ROUTES = {
+    'calculator1': ('/calculator-1-user-set-monthly-investment/calculate', _calculator1_form),
+    'calculator2': ('/calculator-2-user-set-future-monthly-income/calculate', _calculator2_form),
+    'calculator3': ('/calculator-3-user-set-monthly-savings/calculate', _calculator3_form),
+}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_until_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited before accepting connections.")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not answer on port {port} within {timeout} seconds.")
+
+def start_server(workers, directory, cache):
+    """
+    Starts gunicorn with its own session, result cache and job store files; returns (process, port).
+    """
+    port = _free_port()
+    env = dict(os.environ,
+               SESSION_STORE_PATH=os.path.join(directory, f'sessions-{workers}.sqlite3'),
+               RESULT_CACHE_PATH=os.path.join(directory, f'result_cache-{workers}.sqlite3'),
+               JOB_STORE_PATH=os.path.join(directory, f'jobs-{workers}.sqlite3'),
+               RESULT_CACHE_MAX_ENTRIES=os.environ.get('RESULT_CACHE_MAX_ENTRIES', '10000') if cache else '0')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'app:app'],
+        cwd=PROJECT_ROOT, env=env)
+    try:
+        _wait_until_ready(port, process)
+    except RuntimeError:
+        process.terminate()
+        process.wait()
+        raise
+    return process, port
+
+def _post(port, path, body):
+    """
+    Sends one form POST on a fresh connection and returns (latency in seconds, status).
+    """
+    start = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('POST', path, body=body, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+        conn.close()
+    except OSError:
+        status = None
+    return time.perf_counter() - start, status
+
+def drive_route(port, path, bodies, concurrency):
+    """
+    Sends every body concurrently and returns the latency percentiles (ms), throughput and error count.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda body: _post(port, path, body), bodies))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, status in outcomes if status == 200)
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "rps": len(latencies) / elapsed,
+        "errors": len(outcomes) - len(latencies),
+    }
+
+def run(worker_counts, requests, concurrency, routes, cache, seed=0):
+    """
+    Returns {"<route>@<workers>w": metrics} for every route and worker configuration.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in worker_counts:
+            process, port = start_server(workers, directory, cache)
+            try:
+                for name in routes:
+                    path, make_form = ROUTES[name]
+                    rng = random.Random(seed)
+                    bodies = [urllib.parse.urlencode(make_form(rng), doseq=True) for _ in range(requests)]
+                    # Warm up the workers before measuring
+                    drive_route(port, path, bodies[:concurrency], concurrency)
+                    results[f'{name}@{workers}w'] = drive_route(port, path, bodies, concurrency)
+            finally:
+                process.terminate()
+                process.wait()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated gunicorn worker counts (default: 1,2,4)')
+    parser.add_argument('--requests', type=int, default=500, help='requests per route and configuration')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent client connections')
+    parser.add_argument('--routes', default=','.join(ROUTES), help='comma-separated routes to drive')
+    parser.add_argument('--cache', action='store_true', help='leave the result cache enabled')
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    routes = [name.strip() for name in args.routes.split(',') if name.strip()]
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+    worker_counts = [int(value) for value in args.workers.split(',')]
+
+    results = run(worker_counts, args.requests, args.concurrency, routes, args.cache)
+    print(f"{'route@workers':<20} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'req/s':>10} {'errors':>7}")
+    for name, values in results.items():
+        print(f"{name:<20} {values['p50_ms']:10.2f} {values['p95_ms']:10.2f} {values['p99_ms']:10.2f} "
+              f"{values['rps']:10.1f} {values['errors']:7d}")
+
+    exit_code = report_and_check('load', results, args, ['p50_ms', 'p95_ms', 'p99_ms', 'rps'])
+    if any(values['errors'] for values in results.values()):
+        print("Some requests failed.")
+        exit_code = 1
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+benchmarks/micro.py
+
+Micro-benchmarks for utils.py: number parsing/formatting and the three calculators across input sizes.
+
+Usage (from the project root):
+    python -m benchmarks.micro                   # compare against the saved baseline
+    python -m benchmarks.micro --save-baseline   # store a new baseline
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import add_baseline_arguments, percentile, report_and_check  # noqa: E402
+from utils import (parse_localized_number, format_currency, calculate_calculator1, calculate_calculator2,  # noqa: E402
+                   calculate_calculator3, calculator1_engine, calculator2_engine, DURATIONS)
+
+def _cases():
+    """
+    Returns (name, callable, items per call) for every benchmark case.
+    """
+    rng = np.random.default_rng(0)
+    cases = []
+
+    for label, text in [('short', '6,00'), ('medium', '10.000,00'), ('long', '1.234.567.890,12')]:
+        cases.append((f'parse_localized_number[{label}]', lambda text=text: parse_localized_number(text), 1))
+    for label, value in [('small', 6.0), ('medium', 10000.0), ('large', 1234567890.12)]:
+        cases.append((f'format_currency[{label}]', lambda value=value: format_currency(value), 1))
+
+    period_savings = [3000.0 + 500 * i for i in range(len(DURATIONS))]
+    cases.append(('calculate_calculator1[scalar]', lambda: calculate_calculator1(3000.0, 10000.0, 6.0, 4.0), 1))
+    cases.append(('calculate_calculator1[periods]',
+                  lambda: calculate_calculator1(period_savings, 10000.0, 6.0, 4.0, 1990, 2025, [1000.0] * len(DURATIONS)), 1))
+    cases.append(('calculate_calculator2[plain]', lambda: calculate_calculator2(7000.0, 10000.0, 6.0, 4.0), 1))
+    cases.append(('calculate_calculator2[extra]',
+                  lambda: calculate_calculator2(7000.0, 10000.0, 6.0, 4.0, 1990, 2025, 50000.0, 10), 1))
+    cases.append(('calculate_calculator3', lambda: calculate_calculator3(8000.0, 5300.0), 1))
+
+    for size in [1, 100, 10000]:
+        initial = rng.uniform(0, 1e6, size)
+        rates = rng.choice([6.0, 8.0, 10.0], size)
+        savings = rng.uniform(0, 1e4, size)
+        targets = rng.uniform(1e3, 2e4, size)
+        cases.append((f'calculator1_engine[{size}]', lambda i=initial, r=rates, s=savings: calculator1_engine(i, r, 4.0, s), size))
+        cases.append((f'calculator2_engine[{size}]', lambda t=targets, i=initial, r=rates: calculator2_engine(t, i, r, 4.0), size))
+
+    return cases
+
+def run(repeat=7):
+    """
+    Times every case and returns {name: {"median_us", "p95_us", "per_item_us"}}.
+    """
+    results = {}
+    for name, func, items in _cases():
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        samples = sorted(t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number))
+        median = percentile(samples, 50)
+        results[name] = {
+            "median_us": median,
+            "p95_us": percentile(samples, 95),
+            "per_item_us": median / items,
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7, help='timing repetitions per case')
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    print(f"{'case':<36} {'median (us)':>12} {'p95 (us)':>12} {'per item (us)':>14}")
+    for name, values in results.items():
+        print(f"{name:<36} {values['median_us']:12.2f} {values['p95_us']:12.2f} {values['per_item_us']:14.4f}")
+
+    return report_and_check('micro', results, args, ['median_us'])
+
+if __name__ == '__main__':
+    sys.exit(main())
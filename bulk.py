@@ -0,0 +1,225 @@
+"""
+bulk.py
+
+Streaming bulk scoring for the Financial Independence Calculators.
+Reads a CSV of client profiles one line at a time and yields one NDJSON line per row,
+so uploads of any size are processed in constant memory.
+Valid rows are evaluated in small batches through the vectorized engines;
+invalid rows (bad values, undecodable bytes, malformed quoting) produce a per-row error and never abort the stream.
+"""
+
+import csv
+import datetime
+import json
+
+import numpy as np
+
+from utils import parse_localized_number, calculator1_engine, calculator2_engine, DURATIONS
+
+# Number of rows buffered and evaluated together by the vectorized engines
+BULK_BATCH_ROWS = 256
+
+EXPENSE_FIELDS = ['housing', 'utilities', 'transportation', 'food', 'hobbies',
+                  'subscriptions', 'healthcare', 'debt', 'other']
+
+def _number(row, field, default=0.0, required=False):
+    """
+    Parses a localized number from a CSV row with the same rules as the web forms.
+    Raises ValueError with a user-facing message when the value is invalid.
+    """
+    value = (row.get(field) or '').strip()
+    if not value:
+        if required:
+            raise ValueError(f"Campo obrigatório ausente: {field}.")
+        return default
+    parsed = parse_localized_number(value)
+    if parsed is None:
+        raise ValueError(f"Valor inválido para {field}: {value!r}.")
+    return parsed
+
+def _birth_year(row, current_year):
+    """
+    Parses the optional birth year column, enforcing the same range as the web forms.
+    """
+    value = (row.get('birth_year') or '').strip()
+    if not value:
+        return None
+    try:
+        birth_year = int(value)
+    except ValueError:
+        raise ValueError("Por favor, insira um ano de nascimento válido.")
+    if birth_year < 1900 or birth_year > current_year:
+        raise ValueError(f"O ano de nascimento deve ser entre 1900 e {current_year}.")
+    return birth_year
+
+def _positive_rate(row, field, label, default=None):
+    rate = _number(row, field, default=default, required=default is None)
+    if rate <= 0:
+        raise ValueError(f"Por favor, insira uma {label} válida e maior que 0.")
+    return rate
+
+def _milestone_ages(birth_year, current_year):
+    if not birth_year:
+        return [None] * len(DURATIONS), [None] * len(DURATIONS)
+    return ([(current_year - birth_year) + years for years in DURATIONS],
+            [current_year + years for years in DURATIONS])
+
+def _parse_calculator1(row, current_year):
+    parsed = {
+        "monthly_savings": _number(row, 'monthly_savings'),
+        "initial_investment": _number(row, 'initial_investment'),
+        "annual_rate": _positive_rate(row, 'annual_rate', "Taxa de Retorno Anual"),
+        "safe_withdrawal_rate": _positive_rate(row, 'safe_withdrawal_rate', "Taxa de Retirada Segura", default=4.0),
+        "birth_year": _birth_year(row, current_year),
+    }
+    if parsed["monthly_savings"] <= 0 and parsed["initial_investment"] <= 0:
+        raise ValueError("Por favor, forneça um valor para a Economia Mensal ou Investimento Inicial.")
+    return parsed
+
+def _evaluate_calculator1(batch, current_year):
+    engine = calculator1_engine([p["initial_investment"] for p in batch],
+                                [p["annual_rate"] for p in batch],
+                                [p["safe_withdrawal_rate"] for p in batch],
+                                [p["monthly_savings"] for p in batch])
+    for i, parsed in enumerate(batch):
+        ages, future_years = _milestone_ages(parsed["birth_year"], current_year)
+        yield [{"years": years,
+                "future_value": float(engine["future_value"][i, j]),
+                "monthly_income": float(engine["monthly_income"][i, j]),
+                "age": ages[j],
+                "future_year": future_years[j]}
+               for j, years in enumerate(DURATIONS)]
+
+def _parse_calculator2(row, current_year):
+    parsed = {
+        "target_income": _number(row, 'target_income', required=True),
+        "initial_investment": _number(row, 'initial_investment'),
+        "annual_rate": _positive_rate(row, 'annual_rate', "Taxa de Retorno Anual"),
+        "safe_withdrawal_rate": _positive_rate(row, 'safe_withdrawal_rate', "Taxa de Retirada Segura", default=4.0),
+        "extra_deposit": _number(row, 'extra_deposit'),
+        "extra_deposit_year": 0,
+        "birth_year": _birth_year(row, current_year),
+    }
+    if parsed["target_income"] <= 0:
+        raise ValueError("Por favor, insira uma Renda Alvo válida e maior que 0.")
+    extra_deposit_year = (row.get('extra_deposit_year') or '').strip()
+    if extra_deposit_year:
+        try:
+            parsed["extra_deposit_year"] = int(extra_deposit_year)
+        except ValueError:
+            raise ValueError("Por favor, insira um ano válido para o aporte extra.")
+        if parsed["extra_deposit_year"] <= 0 or parsed["extra_deposit_year"] > 100:
+            raise ValueError("Por favor, insira um ano válido para o aporte extra (entre 1 e 100).")
+    return parsed
+
+def _evaluate_calculator2(batch, current_year):
+    engine = calculator2_engine([p["target_income"] for p in batch],
+                                [p["initial_investment"] for p in batch],
+                                [p["annual_rate"] for p in batch],
+                                [p["safe_withdrawal_rate"] for p in batch],
+                                [p["extra_deposit"] for p in batch],
+                                [p["extra_deposit_year"] for p in batch])
+    for i, parsed in enumerate(batch):
+        ages, future_years = _milestone_ages(parsed["birth_year"], current_year)
+        yield [{"years": years,
+                "required_investment": max(float(engine["required_investment"][i, j]), 0.0),
+                "age": ages[j],
+                "future_year": future_years[j]}
+               for j, years in enumerate(DURATIONS)]
+
+def _parse_calculator3(row, current_year):
+    salary = _number(row, 'salary', required=True)
+    if salary <= 0:
+        raise ValueError("Por favor, insira um Salário Líquido válido (deve ser maior que 0).")
+    return {"salary": salary,
+            "expenses": sum(_number(row, field) for field in EXPENSE_FIELDS)}
+
+def _evaluate_calculator3(batch, current_year):
+    salaries = np.array([p["salary"] for p in batch])
+    expenses = np.array([p["expenses"] for p in batch])
+    for salary, total_expenses, savings in zip(salaries, expenses, salaries - expenses):
+        yield {"salary": float(salary), "expenses": float(total_expenses), "savings": float(savings)}
+
+# Row parser and batch evaluator for each calculator accepted by the bulk API
+BULK_CALCULATORS = {
+    'calculator1': (_parse_calculator1, _evaluate_calculator1),
+    'calculator2': (_parse_calculator2, _evaluate_calculator2),
+    'calculator3': (_parse_calculator3, _evaluate_calculator3),
+}
+
+def _ndjson(obj):
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False) + "\n"
+
+# Character the decoders substitute for bytes that are not valid UTF-8 (see bulk_calculate)
+REPLACEMENT_CHARACTER = '\ufffd'
+
+def _split_row(line, delimiter):
+    """
+    Splits one physical CSV line into its values.
+    Every line is parsed on its own, so a malformed quoted field only affects its row.
+    Raises ValueError with a user-facing message when the line cannot be parsed.
+    """
+    try:
+        return next(csv.reader([line], delimiter=delimiter, strict=True), [])
+    except csv.Error as e:
+        raise ValueError(f"Linha CSV malformada: {e}.")
+
+def iter_bulk_results(calculator, lines, current_year=None):
+    """
+    Lazily scores a CSV of client profiles for one calculator.
+    lines is any iterable of text lines (e.g. a file object); the delimiter (';' or ',') is detected from the header.
+    Yields NDJSON strings in input order: {"row": n, "result": ...} or {"row": n, "error": "..."}.
+    Undecodable bytes (decoded as U+FFFD) and malformed lines become per-row errors; quoted fields
+    cannot span lines. An optional 'id' column is echoed back on every line.
+    """
+    parse_row, evaluate = BULK_CALCULATORS[calculator]
+    if current_year is None:
+        current_year = datetime.date.today().year
+
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        return
+    header = header.lstrip('\ufeff')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    fieldnames = [name.strip().lower() for name in next(csv.reader([header], delimiter=delimiter), [])]
+
+    def flush(pending):
+        valid = [parsed for _, _, parsed, _ in pending if parsed is not None]
+        results = iter(list(evaluate(valid, current_year)) if valid else [])
+        for row_number, row_id, parsed, error in pending:
+            line = {"row": row_number}
+            if row_id is not None:
+                line["id"] = row_id
+            if parsed is not None:
+                try:
+                    # allow_nan=False turns non-finite engine results into per-row errors
+                    yield _ndjson(dict(line, result=next(results)))
+                    continue
+                except ValueError:
+                    error = "Ocorreu um erro durante o cálculo."
+            yield _ndjson(dict(line, error=error))
+
+    pending = []
+    row_number = 0
+    for text in lines:
+        if not text.strip('\r\n'):
+            continue
+        row_number += 1
+        row_id = None
+        try:
+            values = _split_row(text, delimiter)
+            row = dict(zip(fieldnames, values))
+            row_id = row.get('id')
+            if REPLACEMENT_CHARACTER in text:
+                raise ValueError("Linha com caracteres inválidos: o arquivo deve estar codificado em UTF-8.")
+            if len(values) > len(fieldnames):
+                raise ValueError("Número de colunas maior que o cabeçalho.")
+            pending.append((row_number, row_id, parse_row(row, current_year), None))
+        except ValueError as e:
+            pending.append((row_number, row_id, None, str(e)))
+        if len(pending) >= BULK_BATCH_ROWS:
+            yield from flush(pending)
+            pending = []
+    if pending:
+        yield from flush(pending)
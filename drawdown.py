@@ -0,0 +1,167 @@
+"""
+drawdown.py
+
+Retirement drawdown (decumulation) simulator.
+Starting from a balance such as a Calculator 1 future value, a monthly withdrawal of
+withdrawal_rate / 12 % of that balance is taken at the start of every month and grows with
+inflation, while the rest of the portfolio earns lognormal monthly returns.
+
+With G_t the portfolio growth over the first t months and W_t the withdrawal of month t,
+the balance after n months is G_n * (B0 - sum_{t<n} W_t / G_t), and a path survives exactly
+when B0 covers that discounted sum. Because every withdrawal is proportional to the withdrawal
+rate, each path reduces to one number S = sum_t (1 + inflation)^t / G_t: the path survives any
+annual rate up to 1200 / S. Survival probabilities and ending balances for a whole batch of rates
+are therefore one broadcast over (rates, paths), and the highest rate that reaches a target
+success probability is an order statistic of the per-path critical rates.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils import SIMULATION_CHUNK_PATHS, SIMULATION_POOL_THRESHOLD, format_currency
+
+# Withdrawal rates (% per year) reported on the survival curve
+SURVIVAL_CURVE_RATES = np.round(np.arange(2.0, 8.01, 0.25), 2)
+
+def _simulate_drawdown_chunk(seed_sequence, n_paths, months, mean_annual_return, annual_volatility, annual_inflation):
+    """
+    Simulates one chunk of retirement paths with the return model of simulate_calculator1.
+    Returns (discounted_withdrawals, growth): per path, S = sum_t (1 + i)^t / G_t over the months
+    and the total growth G_n.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    sigma = annual_volatility / 100 / np.sqrt(12)
+    mu = np.log1p(mean_annual_return / 100) / 12 - sigma ** 2 / 2
+    log_inflation = np.log1p(annual_inflation / 100) / 12
+
+    # log G_t for t = 1..months; the withdrawal of month 0 happens before any return (G_0 = 1)
+    log_growth = np.cumsum(rng.normal(mu, sigma, size=(n_paths, months)), axis=1)
+    discounted = 1 + np.sum(np.exp(np.arange(1, months) * log_inflation - log_growth[:, :-1]), axis=1)
+    return discounted, np.exp(log_growth[:, -1])
+
+def simulate_drawdown_paths(retirement_years, mean_annual_return, annual_volatility, annual_inflation, n_paths=10000, seed=None, processes=None, progress=None):
+    """
+    Samples n_paths retirement paths of retirement_years years, in seeded chunks like simulate_calculator1
+    (progress is called the same way).
+    Returns a dict with the per-path discounted withdrawal sums ("discounted_withdrawals"), total growth
+    ("growth") and the inflation accumulated over the retirement ("inflation_factor").
+    """
+    if n_paths <= 0:
+        raise ValueError("The number of simulated paths must be positive.")
+    months = int(round(retirement_years * 12))
+    if months <= 0:
+        raise ValueError("The retirement must last at least one month.")
+
+    chunk_sizes = [SIMULATION_CHUNK_PATHS] * (n_paths // SIMULATION_CHUNK_PATHS)
+    if n_paths % SIMULATION_CHUNK_PATHS:
+        chunk_sizes.append(n_paths % SIMULATION_CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    args = [(seed_sequence, size, months, mean_annual_return, annual_volatility, annual_inflation)
+            for seed_sequence, size in zip(seeds, chunk_sizes)]
+
+    if processes is None:
+        processes = (os.cpu_count() or 1) if n_paths >= SIMULATION_POOL_THRESHOLD else 1
+    processes = min(processes, len(args))
+
+    chunks = []
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for chunk in pool.map(_simulate_drawdown_chunk, *zip(*args)):
+                chunks.append(chunk)
+                if progress is not None:
+                    progress(len(chunks) / len(args))
+    else:
+        for chunk_args in args:
+            chunks.append(_simulate_drawdown_chunk(*chunk_args))
+            if progress is not None:
+                progress(len(chunks) / len(args))
+
+    return {
+        "discounted_withdrawals": np.concatenate([chunk[0] for chunk in chunks]),
+        "growth": np.concatenate([chunk[1] for chunk in chunks]),
+        "inflation_factor": (1 + annual_inflation / 100) ** (months / 12),
+    }
+
+def critical_withdrawal_rates(paths):
+    """
+    Highest annual withdrawal rate (% of the initial balance) each path sustains until the end of the retirement.
+    """
+    return 1200 / paths["discounted_withdrawals"]
+
+def drawdown_outcomes(initial_balance, withdrawal_rates, paths):
+    """
+    Evaluates a batch of annual withdrawal rates (%) against the same paths in one broadcast.
+    Returns a dict with the rates, the survival probability of each rate and the median ending balance
+    in nominal terms and in money of the retirement date (depleted paths end at 0).
+    """
+    rates = np.atleast_1d(np.asarray(withdrawal_rates, dtype=float))
+    remaining = 1 - (rates[:, np.newaxis] / 1200) * paths["discounted_withdrawals"][np.newaxis, :]
+    ending_balance = float(initial_balance) * paths["growth"] * np.maximum(remaining, 0.0)
+    median_ending_balance = np.median(ending_balance, axis=1)
+    return {
+        "withdrawal_rates": rates,
+        "survival_probability": np.mean(remaining >= 0, axis=1),
+        "median_ending_balance": median_ending_balance,
+        "median_ending_balance_real": median_ending_balance / paths["inflation_factor"],
+    }
+
+def survival_curve(paths, withdrawal_rates):
+    """
+    Survival probability of each annual withdrawal rate (%), read off the sorted per-path critical rates.
+    Same values as drawdown_outcomes without the (rates, paths) matrix, so it suits long curves and many paths.
+    """
+    critical = np.sort(critical_withdrawal_rates(paths))
+    rates = np.atleast_1d(np.asarray(withdrawal_rates, dtype=float))
+    return 1 - np.searchsorted(critical, rates, side='left') / len(critical)
+
+def solve_safe_withdrawal_rate(paths, success_probabilities):
+    """
+    Highest annual withdrawal rate (%) whose survival probability reaches each target (fractions in (0, 1]).
+    Survival is monotone in the rate and a path fails exactly above its critical rate, so the answer for a
+    target p is the floor(n * (1 - p))-th smallest critical rate; every target is solved in one partition.
+    """
+    critical = critical_withdrawal_rates(paths)
+    targets = np.atleast_1d(np.asarray(success_probabilities, dtype=float))
+    if np.any(targets <= 0) or np.any(targets > 1):
+        raise ValueError("Success probabilities must be in (0, 1].")
+    ranks = np.minimum(np.floor(len(critical) * (1 - targets) + 1e-9).astype(int), len(critical) - 1)
+    return np.partition(critical, np.unique(ranks))[ranks]
+
+def calculate_drawdown(initial_balance, withdrawal_rate, mean_annual_return, annual_volatility, annual_inflation, retirement_years, success_target=90.0, n_paths=10000, seed=None, processes=None, progress=None):
+    """
+    Runs the drawdown simulator for one starting balance and withdrawal rate (both in %, like the forms).
+    Returns a dict with raw and formatted survival probability, median ending balances, first monthly
+    withdrawal, the safe withdrawal rate for success_target and the survival curve over SURVIVAL_CURVE_RATES.
+    """
+    paths = simulate_drawdown_paths(retirement_years, mean_annual_return, annual_volatility, annual_inflation,
+                                    n_paths=n_paths, seed=seed, processes=processes, progress=progress)
+    outcomes = drawdown_outcomes(initial_balance, [withdrawal_rate], paths)
+    safe_rate = float(solve_safe_withdrawal_rate(paths, success_target / 100)[0])
+    if not (np.all(np.isfinite(outcomes["median_ending_balance"])) and np.isfinite(safe_rate)):
+        raise ValueError("Non-finite result during drawdown simulation.")
+
+    monthly_withdrawal = initial_balance * (withdrawal_rate / 100) / 12
+    median_ending_balance = float(outcomes["median_ending_balance"][0])
+    median_ending_balance_real = float(outcomes["median_ending_balance_real"][0])
+    return {
+        "initial_balance_raw": float(initial_balance),
+        "initial_balance": format_currency(initial_balance),
+        "withdrawal_rate": withdrawal_rate,
+        "monthly_withdrawal_raw": monthly_withdrawal,
+        "monthly_withdrawal": format_currency(monthly_withdrawal),
+        "retirement_years": retirement_years,
+        "paths": n_paths,
+        "survival_probability": float(outcomes["survival_probability"][0]),
+        "median_ending_balance_raw": median_ending_balance,
+        "median_ending_balance": format_currency(median_ending_balance),
+        "median_ending_balance_real_raw": median_ending_balance_real,
+        "median_ending_balance_real": format_currency(median_ending_balance_real),
+        "success_target": success_target,
+        "safe_withdrawal_rate": safe_rate,
+        "survival_curve": {
+            "withdrawal_rates": SURVIVAL_CURVE_RATES.tolist(),
+            "survival_probability": survival_curve(paths, SURVIVAL_CURVE_RATES).tolist(),
+        },
+    }
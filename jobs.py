@@ -0,0 +1,379 @@
+"""
+jobs.py
+
+Background jobs for calculations too heavy for a request (large simulations, bulk uploads, ...).
+Every gunicorn worker runs the jobs it accepts in its own bounded process pool, while job state,
+progress and results live in a local SQLite file, so any worker can answer status, result and
+cancellation requests for any job.
+
+Jobs report progress through a callback that also checks for cancellation, so a cancelled job
+stops at its next progress report. Finished jobs are kept for a limited time and the stored
+results are capped in total size, oldest first.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from bulk import BULK_CALCULATORS, iter_bulk_results
+from drawdown import calculate_drawdown
+from local_store import SQLiteStore
+from utils import DURATIONS, calculate_calculator1, calculate_calculator1_simulation
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ['queued', 'running', 'completed', 'failed', 'cancelled']
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Progress is written at most this often (seconds) unless it moved by at least PROGRESS_STEP
+PROGRESS_INTERVAL = 0.5
+PROGRESS_STEP = 0.01
+
+# Number of recently finished jobs the queue wait and run time averages are computed over
+STATS_WINDOW = 100
+
+# Upper bound of one stored bulk result row, not counting its echoed id, per calculator.
+# Bulk uploads are sized against max_result_bytes with it before they are queued.
+BULK_RESULT_ROW_BYTES = {'calculator1': 1400, 'calculator2': 1000, 'calculator3': 300}
+
+RESULT_TOO_LARGE_ERROR = "O resultado é grande demais para ser armazenado."
+
+class JobCancelled(Exception):
+    pass
+
+class EncodedResult(str):
+    """
+    A job result that is already serialized as JSON; JobStore.finish stores it as is.
+    """
+
+class JobStore(SQLiteStore):
+    """
+    Job table shared by all gunicorn workers (SQLite, WAL mode).
+    Finished jobs expire after ttl seconds, and the results of the oldest finished jobs are dropped
+    once all stored results exceed max_result_bytes.
+    """
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        'id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, status TEXT NOT NULL, '
+        'progress REAL NOT NULL DEFAULT 0, result TEXT, result_bytes INTEGER NOT NULL DEFAULT 0, error TEXT, '
+        'cancel_requested INTEGER NOT NULL DEFAULT 0, owner_pid INTEGER NOT NULL, '
+        'created_at REAL NOT NULL, started_at REAL, finished_at REAL)',
+        'CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished_at)',
+    ]
+
+    def __init__(self, path, ttl=3600, max_result_bytes=64 * 1024 * 1024):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_result_bytes = max_result_bytes
+        self._initialize()
+
+    def create(self, kind, params):
+        """
+        Adds a queued job owned by this process and returns its ID.
+        """
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            'INSERT INTO jobs (id, kind, params, status, owner_pid, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, kind, json.dumps(params, separators=(',', ':')), 'queued', os.getpid(), time.time()))
+        return job_id
+
+    def get(self, job_id, with_result=False):
+        """
+        Returns the job as a dict (with its decoded result when asked), or None when it is unknown or expired.
+        Jobs whose owning worker is gone are reported as failed.
+        """
+        columns = 'id, kind, status, progress, error, owner_pid, created_at, started_at, finished_at, result_bytes'
+        if with_result:
+            columns += ', result'
+        row = self._connection().execute(f'SELECT {columns} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip([c.strip() for c in columns.split(',')], row))
+        if job["status"] in FINISHED_STATUSES and job["finished_at"] + self.ttl <= time.time():
+            return None
+        if job["status"] not in FINISHED_STATUSES and not _process_alive(job["owner_pid"]):
+            self.finish(job_id, 'failed', error="O processamento foi interrompido; envie o cálculo novamente.")
+            return self.get(job_id, with_result)
+        if with_result:
+            job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def params(self, job_id):
+        row = self._connection().execute('SELECT params FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def start(self, job_id):
+        """
+        Marks a queued job as running; returns False when it was cancelled before it started.
+        """
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued' AND cancel_requested = 0",
+            (time.time(), job_id))
+        return cursor.rowcount == 1
+
+    def set_progress(self, job_id, fraction):
+        """
+        Records the progress of a running job; raises JobCancelled when its cancellation was requested.
+        """
+        conn = self._connection()
+        conn.execute('UPDATE jobs SET progress = ? WHERE id = ?', (min(max(fraction, 0.0), 1.0), job_id))
+        row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None or row[0]:
+            raise JobCancelled()
+
+    def cancel(self, job_id):
+        """
+        Requests the cancellation of a job: a queued job is cancelled at once, a running one at its next progress report.
+        Returns the job, or None when it is unknown.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                         (job_id,))
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                         (time.time(), job_id))
+        return self.get(job_id)
+
+    def finish(self, job_id, status, result=None, error=None):
+        """
+        Stores the outcome of a job, then drops expired jobs and the oldest results beyond max_result_bytes.
+        A result that alone exceeds max_result_bytes fails the job instead.
+        """
+        payload = None
+        if isinstance(result, EncodedResult):
+            payload = str(result)
+        elif result is not None:
+            payload = json.dumps(result, separators=(',', ':'), allow_nan=False)
+        if payload is not None and len(payload) > self.max_result_bytes:
+            status, payload, error = 'failed', None, RESULT_TOO_LARGE_ERROR
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('UPDATE jobs SET status = ?, progress = CASE WHEN ? THEN 1 ELSE progress END, result = ?, '
+                         'result_bytes = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)',
+                         (status, status == 'completed', payload, len(payload or ''), error, now, job_id,
+                          'queued', 'running'))
+            conn.execute(f'DELETE FROM jobs WHERE status IN ({", ".join("?" * len(FINISHED_STATUSES))}) '
+                         'AND finished_at <= ?', (*FINISHED_STATUSES, now - self.ttl))
+            stored = conn.execute('SELECT id, result_bytes FROM jobs WHERE result IS NOT NULL '
+                                  'ORDER BY finished_at DESC').fetchall()
+            total = 0
+            for stored_id, size in stored:
+                total += size
+                if total > self.max_result_bytes:
+                    conn.execute('DELETE FROM jobs WHERE id = ?', (stored_id,))
+
+    def stats(self):
+        """
+        Returns the number of jobs per status, the stored result size and the average queue wait and
+        run time (seconds) of the most recently finished jobs.
+        """
+        conn = self._connection()
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        stats = {status: counts.get(status, 0) for status in STATUSES}
+        stats["result_bytes"] = conn.execute('SELECT COALESCE(SUM(result_bytes), 0) FROM jobs').fetchone()[0]
+        stats["max_result_bytes"] = self.max_result_bytes
+        stats["ttl"] = self.ttl
+        wait, run = conn.execute(
+            'SELECT AVG(started_at - created_at), AVG(finished_at - started_at) FROM '
+            '(SELECT * FROM jobs WHERE started_at IS NOT NULL AND finished_at IS NOT NULL '
+            'ORDER BY finished_at DESC LIMIT ?)', (STATS_WINDOW,)).fetchone()
+        stats["avg_queue_seconds"] = wait or 0.0
+        stats["avg_run_seconds"] = run or 0.0
+        return stats
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# -------------------------------------------------------------
+# Job kinds
+# -------------------------------------------------------------
+def _calculator1_simulation_job(params, progress):
+    results = calculate_calculator1_simulation(
+        params["period_savings"], params["initial_investment"], params["annual_rate"], params["safe_withdrawal_rate"],
+        params["volatility"], params["paths"], params["seed"], params["birth_year"], params["current_year"],
+        params["period_extra_deposits"], processes=1, progress=progress)
+    return {"paths": params["paths"], "seed": params["seed"], "results": results}
+
+def _calculator1_drawdown_job(params, progress):
+    results = calculate_calculator1(params["period_savings"], params["initial_investment"], params["annual_rate"],
+                                    params["safe_withdrawal_rate"], params["birth_year"], params["current_year"],
+                                    params["period_extra_deposits"])
+    milestone = results[DURATIONS.index(params["years"])]
+    drawdown = calculate_drawdown(milestone["future_value_raw"], params["withdrawal_rate"], params["annual_rate"],
+                                  params["volatility"], params["inflation"], params["retirement_years"],
+                                  params["success_target"], params["paths"], params["seed"],
+                                  processes=1, progress=progress)
+    return dict(drawdown, years=params["years"], age=milestone["age"], future_year=milestone["future_year"])
+
+def bulk_row_limit(calculator, csv_bytes, max_result_bytes):
+    """
+    Largest number of rows a bulk CSV of csv_bytes bytes may have so that its result fits in max_result_bytes.
+    The echoed ids are bounded by the size of the CSV itself.
+    """
+    return max(max_result_bytes - csv_bytes, 0) // BULK_RESULT_ROW_BYTES[calculator]
+
+def _bulk_job(calculator):
+    def run(params, progress):
+        lines = params["csv"].splitlines(keepends=True)
+        # Rows are kept as compact JSON rather than dicts, which would take several times the memory
+        rows = []
+        for line in iter_bulk_results(calculator, lines, params["current_year"]):
+            rows.append(json.dumps(json.loads(line), separators=(',', ':'), ensure_ascii=False))
+            progress(len(rows) / max(len(lines) - 1, 1))
+        return EncodedResult('{"rows":[' + ','.join(rows) + ']}')
+    return run
+
+# Function run in the pool for each job kind; it gets the job parameters and a progress callback
+JOB_KINDS = {
+    'calculator1_simulation': _calculator1_simulation_job,
+    'calculator1_drawdown': _calculator1_drawdown_job,
+}
+JOB_KINDS.update({f'bulk_{calculator}': _bulk_job(calculator) for calculator in BULK_CALCULATORS})
+
+# -------------------------------------------------------------
+# Execution
+# -------------------------------------------------------------
+_worker_store = None
+
+def _init_worker(store_path, ttl, max_result_bytes):
+    global _worker_store
+    _worker_store = JobStore(store_path, ttl, max_result_bytes)
+
+def _run_job(job_id, kind):
+    """
+    Runs one job inside a pool process and records its outcome.
+    """
+    store = _worker_store
+    if not store.start(job_id):
+        return
+    last = {"time": 0.0, "fraction": 0.0}
+
+    def progress(fraction):
+        now = time.monotonic()
+        if fraction - last["fraction"] >= PROGRESS_STEP or now - last["time"] >= PROGRESS_INTERVAL:
+            last.update(time=now, fraction=fraction)
+            store.set_progress(job_id, fraction)
+
+    try:
+        result = JOB_KINDS[kind](store.params(job_id), progress)
+    except JobCancelled:
+        store.finish(job_id, 'cancelled')
+    except Exception:
+        logger.exception("Job %s (%s) failed.", job_id, kind)
+        store.finish(job_id, 'failed', error="Ocorreu um erro durante o cálculo.")
+    else:
+        try:
+            store.finish(job_id, 'completed', result)
+        except ValueError:
+            store.finish(job_id, 'failed', error="Ocorreu um erro durante o cálculo.")
+
+class JobQueueFull(Exception):
+    pass
+
+class JobRunner:
+    """
+    Bounded process pool of one gunicorn worker.
+    At most max_workers jobs run at once and at most max_queued more wait for a free process;
+    beyond that submit() raises JobQueueFull. The pool is created on first use in every process,
+    since gunicorn forks its workers after the app is imported.
+    """
+
+    def __init__(self, store, max_workers=2, max_queued=16, metrics=None):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.metrics = metrics
+        self._pool = None
+        self._pid = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._in_flight = {}
+            self._pool = self._new_pool()
+        return self._pool
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                   initargs=(self.store.path, self.store.ttl, self.store.max_result_bytes))
+
+    def submit(self, kind, params):
+        """
+        Queues a job of the given kind and returns its ID.
+        When a pool process has died (e.g. killed for using too much memory) the pool is replaced once;
+        if the job still cannot be queued it is marked failed and the error is raised.
+        """
+        if kind not in JOB_KINDS:
+            raise KeyError(kind)
+        with self._lock:
+            pool = self._executor()
+            if len(self._in_flight) >= self.max_workers + self.max_queued:
+                raise JobQueueFull()
+            job_id = self.store.create(kind, params)
+            try:
+                try:
+                    future = pool.submit(_run_job, job_id, kind)
+                except BrokenProcessPool:
+                    # The jobs of the broken pool fail through _done; later ones get a fresh pool
+                    logger.warning("Job pool of worker %s is broken; starting a new one.", os.getpid())
+                    pool.shutdown(wait=False)
+                    self._pool = pool = self._new_pool()
+                    future = pool.submit(_run_job, job_id, kind)
+            except Exception:
+                self.store.finish(job_id, 'failed', error="Ocorreu um erro durante o cálculo.")
+                raise
+            self._in_flight[future] = (job_id, kind)
+        future.add_done_callback(self._done)
+        return job_id
+
+    def _done(self, future):
+        with self._lock:
+            job_id, kind = self._in_flight.pop(future, (None, None))
+        if job_id is None:
+            return
+        try:
+            if future.exception() is not None:
+                # The pool process died or the job could not be sent to it
+                logger.error("Job %s (%s) crashed: %r", job_id, kind, future.exception())
+                self.store.finish(job_id, 'failed', error="Ocorreu um erro durante o cálculo.")
+            if self.metrics is not None:
+                job = self.store.get(job_id)
+                if job and job["started_at"] is not None:
+                    self.metrics.observe(f'job:{kind}', 'queue', job["started_at"] - job["created_at"])
+                    self.metrics.observe(f'job:{kind}', 'run', job["finished_at"] - job["started_at"])
+        except sqlite3.Error:
+            logger.exception("Could not record the outcome of job %s.", job_id)
+
+    def stats(self):
+        """
+        Returns this worker's pool size, running and waiting jobs and saturation (running / pool size).
+        """
+        with self._lock:
+            in_flight = len(self._in_flight) if self._pid == os.getpid() else 0
+        running = min(in_flight, self.max_workers)
+        return {
+            "pid": os.getpid(),
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "running": running,
+            "queued": in_flight - running,
+            "saturation": running / self.max_workers if self.max_workers else 0.0,
+        }
@@ -0,0 +1,40 @@
+"""
+local_store.py
+
+Base class for the local SQLite stores shared by all gunicorn workers on a machine
+(result cache, server-side sessions, ...).
+"""
+
+import os
+import sqlite3
+import threading
+
+class SQLiteStore:
+    """
+    Holds one SQLite connection per thread and per process (connections must not cross a fork).
+    Subclasses list their CREATE statements in SCHEMA; they run once when the store is created.
+    """
+
+    SCHEMA = []
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
@@ -0,0 +1,303 @@
+"""
+metrics.py
+
+Per-worker request instrumentation exported in the Prometheus text format.
+Every request is split into phases (session, parse, calculate, render and the total) and each
+phase is recorded per route in a fixed-bucket histogram, so observing a value is one bisect and
+one increment under a lock. Counters track requests, validation failures and calculation errors.
+
+Routes mark the end of their parse and calculate phases with lap(); session time is measured
+by wrapping the app's session interface and render time with Flask's template signals.
+
+An opt-in sampling profiler records the stacks of in-flight requests and logs the hottest ones
+for requests slower than a threshold.
+"""
+
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import before_render_template, flash, g, request, template_rendered
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+COUNTERS = {
+    'requests': 'Requests handled by this worker.',
+    'validation_failures': 'Form submissions rejected with a validation message.',
+    'calculation_errors': 'Calculations that failed after the inputs were accepted.',
+}
+
+class Histogram:
+    """
+    Fixed-bucket histogram; counts are stored per bucket and made cumulative when exported.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """
+    Registry of phase histograms keyed by (route, phase) and counters keyed by (name, labels).
+    Values are kept per process, so every gunicorn worker exports its own series labelled with its PID.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='fi'):
+        self.buckets = buckets
+        self.prefix = prefix
+        self.profiler = None
+        self._histograms = {}
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, route, phase, seconds):
+        with self._lock:
+            histogram = self._histograms.get((route, phase))
+            if histogram is None:
+                histogram = self._histograms[(route, phase)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # -------------------------------------------------------------
+    # Flask integration
+    # -------------------------------------------------------------
+    def init_app(self, app, profiler=None):
+        """
+        Registers the request hooks and template signals and wraps the app's session interface.
+        Call it after the session interface has been chosen.
+        """
+        self.profiler = profiler
+        app.session_interface = InstrumentedSessionInterface(app.session_interface, self)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    @staticmethod
+    def _route():
+        return request.endpoint or 'unmatched'
+
+    def _before_request(self):
+        now = time.perf_counter()
+        g._metrics_start = getattr(g, '_metrics_start', now)
+        g._metrics_mark = now
+        g._metrics_session = getattr(g, '_metrics_session', 0.0)
+        if self.profiler is not None:
+            self.profiler.begin()
+
+    def _after_request(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        route = self._route()
+        status = 500 if exc is not None else g.pop('_metrics_status', 500)
+        self.observe(route, 'session', g.pop('_metrics_session', 0.0))
+        self.observe(route, 'total', elapsed)
+        self.increment('requests', route=route, method=request.method, status=str(status))
+        if self.profiler is not None:
+            self.profiler.end(route, elapsed)
+
+    def _before_render(self, sender, template, context, **extra):
+        g._metrics_render_start = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        start = g.pop('_metrics_render_start', None)
+        if start is not None:
+            self.observe(self._route(), 'render', time.perf_counter() - start)
+
+    def lap(self, phase):
+        """
+        Records the time since the previous lap (or the start of the view) as the given phase of the current route.
+        """
+        now = time.perf_counter()
+        mark = g.get('_metrics_mark')
+        if mark is not None:
+            self.observe(self._route(), phase, now - mark)
+        g._metrics_mark = now
+
+    # -------------------------------------------------------------
+    # Prometheus text exposition
+    # -------------------------------------------------------------
+    def render_prometheus(self):
+        """
+        Returns every series in the Prometheus text format (version 0.0.4).
+        """
+        worker = str(os.getpid())
+        with self._lock:
+            histograms = sorted((key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        name = f'{self.prefix}_request_phase_seconds'
+        lines = [f'# HELP {name} Time spent in each phase of a request, per route.',
+                 f'# TYPE {name} histogram']
+        for (route, phase), counts, total, count in histograms:
+            labels = _labels(route=route, phase=phase, worker=worker)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + [float('inf')], counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{name}_count{{{labels}}} {count}')
+
+        for counter, help_text in COUNTERS.items():
+            name = f'{self.prefix}_{counter}_total'
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (counter_name, label_items), value in counters:
+                if counter_name == counter:
+                    lines.append(f'{name}{{{_labels(**dict(label_items), worker=worker)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+class InstrumentedSessionInterface:
+    """
+    Wraps a Flask session interface and adds the time spent opening and saving sessions to the current request.
+    Every other attribute is delegated to the wrapped interface.
+    """
+
+    def __init__(self, interface, metrics):
+        self.interface = interface
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self.interface, name)
+
+    def open_session(self, app, request):
+        start = time.perf_counter()
+        try:
+            return self.interface.open_session(app, request)
+        finally:
+            now = time.perf_counter()
+            # The session opens before the request hooks run, so the request clock starts here
+            g._metrics_start = start
+            g._metrics_session = now - start
+
+    def save_session(self, app, session, response):
+        start = time.perf_counter()
+        try:
+            return self.interface.save_session(app, session, response)
+        finally:
+            g._metrics_session = g.get('_metrics_session', 0.0) + time.perf_counter() - start
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler for slow requests.
+    A background thread samples the stack of every thread serving a request each interval_ms;
+    when a request takes at least threshold_ms, its most frequent stacks are logged and, if
+    output_dir is set, written there in the collapsed format used by flame graph tools.
+    """
+
+    def __init__(self, threshold_ms, interval_ms=5.0, output_dir=None, max_stacks=10, max_depth=64):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self._active = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_sampler(self):
+        # gunicorn forks workers after import, so each process starts its own sampler thread
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._active = {}
+            threading.Thread(target=self._run, name='slow-request-profiler', daemon=True).start()
+
+    def begin(self):
+        self._ensure_sampler()
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, route, elapsed):
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if not samples or elapsed < self.threshold:
+            return
+        total = sum(samples.values())
+        hottest = samples.most_common(self.max_stacks)
+        logger.warning("Slow request %s took %.1f ms (%d samples); hottest stacks:\n%s", route, elapsed * 1000, total,
+                       '\n'.join(f"  {count / total:6.1%}  {stack.rsplit(';', 1)[-1]}  <- {stack}"
+                                 for stack, count in hottest))
+        if self.output_dir:
+            try:
+                os.makedirs(self.output_dir, exist_ok=True)
+                path = os.path.join(self.output_dir, f'{int(time.time() * 1000)}-{os.getpid()}-{route}.folded')
+                with open(path, 'w') as f:
+                    f.writelines(f'{stack} {count}\n' for stack, count in samples.items())
+            except OSError:
+                logger.exception("Could not write the slow request profile.")
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[self._stack(frame)] += 1
+
+metrics = Metrics()
+
+def lap(phase):
+    """
+    Marks the end of a phase of the current view (see Metrics.lap).
+    """
+    metrics.lap(phase)
+
+def flash_validation_error(message, category="danger"):
+    """
+    Flashes a validation message and counts it as a validation failure of the current route.
+    """
+    metrics.increment('validation_failures', route=request.endpoint or 'unmatched')
+    flash(message, category)
+
+def flash_calculation_error(message, category="danger"):
+    """
+    Flashes a calculation error message and counts it as a calculation error of the current route.
+    """
+    metrics.increment('calculation_errors', route=request.endpoint or 'unmatched')
+    flash(message, category)
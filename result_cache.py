@@ -0,0 +1,198 @@
+"""
+result_cache.py
+
+Result cache for the calculator routes.
+Entries live in a local SQLite file so every gunicorn worker on the machine shares them.
+Keys are hashes of the normalized, parsed inputs of a route plus the current year,
+so a year rollover never serves ages or calendar years computed in the previous year.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from local_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ['hits', 'misses', 'stores', 'evictions', 'expirations']
+
+# Hits and misses are counted in memory and written (with the access times of the hit entries)
+# after this many lookups or seconds, so that a lookup never takes the database write lock
+FLUSH_LOOKUPS = 256
+FLUSH_INTERVAL = 10.0
+
+class ResultCache(SQLiteStore):
+    """
+    Size-limited, TTL-based cache of JSON-serializable results backed by SQLite (WAL mode).
+    The least recently used entries are evicted once max_entries is exceeded.
+    Hit, miss, store, eviction and expiration counters are shared by all processes.
+    Lookups are read-only: access times and hit/miss counts are buffered per process and flushed in batches.
+    A max_entries of 0 disables the cache.
+    """
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS results ('
+        'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)',
+        'CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+    ] + [f"INSERT OR IGNORE INTO counters (name, value) VALUES ('{name}', 0)" for name in COUNTERS]
+
+    def __init__(self, path, max_entries=10000, ttl=3600):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._pending_lock = threading.Lock()
+        self._reset_pending()
+        if self.enabled:
+            try:
+                self._initialize()
+            except sqlite3.Error:
+                logger.exception("Could not initialize the result cache at %s; caching disabled.", path)
+                self.max_entries = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(route, inputs, current_year):
+        """
+        Builds the cache key for a route from its parsed inputs and the current year.
+        """
+        payload = json.dumps([route, current_year, inputs], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _increment(conn, name, amount=1):
+        conn.execute('UPDATE counters SET value = value + ? WHERE name = ?', (amount, name))
+
+    def _reset_pending(self):
+        self._accessed = {}
+        self._lookups = {'hits': 0, 'misses': 0}
+        self._last_flush = time.monotonic()
+
+    def _take_pending(self):
+        """
+        Returns and clears the buffered access times and hit/miss counts.
+        """
+        with self._pending_lock:
+            accessed, lookups = self._accessed, self._lookups
+            self._reset_pending()
+        return accessed, lookups
+
+    def _write_pending(self, conn, accessed, lookups):
+        conn.executemany('UPDATE results SET accessed_at = MAX(accessed_at, ?) WHERE key = ?',
+                         [(accessed_at, key) for key, accessed_at in accessed.items()])
+        for name, amount in lookups.items():
+            if amount:
+                self._increment(conn, name, amount)
+
+    def flush(self):
+        """
+        Writes the buffered access times and hit/miss counts of this process.
+        """
+        accessed, lookups = self._take_pending()
+        if not accessed and not any(lookups.values()):
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                self._write_pending(conn, accessed, lookups)
+        except sqlite3.Error:
+            logger.exception("Result cache flush failed.")
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None on a miss or expired entry.
+        Only reads the database; expired entries are purged by the next set().
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            row = self._connection().execute('SELECT value, expires_at FROM results WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            logger.exception("Result cache read failed.")
+            return None
+        hit = row is not None and row[1] > now
+
+        with self._pending_lock:
+            if hit:
+                self._accessed[key] = now
+            self._lookups['hits' if hit else 'misses'] += 1
+            due = (sum(self._lookups.values()) >= FLUSH_LOOKUPS
+                   or time.monotonic() - self._last_flush >= FLUSH_INTERVAL)
+        if due:
+            self.flush()
+        return json.loads(row[0]) if hit else None
+
+    def set(self, key, value):
+        """
+        Stores value under key and evicts the least recently used entries beyond max_entries.
+        Entries never outlive the current year, so a year rollover drops them.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        next_year = datetime.datetime(datetime.date.today().year + 1, 1, 1).timestamp()
+        expires_at = min(now + self.ttl, next_year)
+        try:
+            payload = json.dumps(value, separators=(',', ':'), allow_nan=False)
+        except ValueError:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                # Buffered access times first, so that the eviction below sees recent hits
+                self._write_pending(conn, *self._take_pending())
+                conn.execute('INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                             (key, payload, expires_at, now))
+                self._increment(conn, 'stores')
+                expired = conn.execute('DELETE FROM results WHERE expires_at <= ?', (now,)).rowcount
+                if expired:
+                    self._increment(conn, 'expirations', expired)
+                excess = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    conn.execute('DELETE FROM results WHERE key IN '
+                                 '(SELECT key FROM results ORDER BY accessed_at LIMIT ?)', (excess,))
+                    self._increment(conn, 'evictions', excess)
+        except sqlite3.Error:
+            logger.exception("Result cache write failed.")
+
+    def stats(self):
+        """
+        Returns the shared counters, the hit rate and the current number of entries.
+        """
+        stats = {name: 0 for name in COUNTERS}
+        stats.update(enabled=self.enabled, size=0, max_entries=self.max_entries, ttl=self.ttl, hit_rate=0.0)
+        if not self.enabled:
+            return stats
+        self.flush()
+        try:
+            conn = self._connection()
+            stats.update(conn.execute('SELECT name, value FROM counters').fetchall())
+            stats["size"] = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        except sqlite3.Error:
+            logger.exception("Result cache stats failed.")
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        if not self.enabled:
+            return
+        self._take_pending()
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM results')
+            conn.execute('UPDATE counters SET value = 0')
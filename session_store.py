@@ -0,0 +1,202 @@
+"""
+session_store.py
+
+Server-side session backend for Flask.
+Form state is stored per user in a local SQLite file as zlib-compressed tagged JSON,
+and the cookie only carries an opaque random session ID (no signature to verify).
+Rows expire after the app's PERMANENT_SESSION_LIFETIME and are purged periodically.
+
+Run `python session_store.py` to measure the cookie bytes and per-request overhead
+compared with Flask's default signed-cookie sessions.
+"""
+
+import logging
+import re
+import secrets
+import sqlite3
+import time
+import zlib
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, SessionInterface
+
+from local_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+class ServerSideSession(SecureCookieSession):
+    """
+    Session dict that also remembers its opaque ID.
+    """
+
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+
+class SQLiteSessionInterface(SQLiteStore, SessionInterface):
+    """
+    Stores session data in SQLite, shared by all gunicorn workers on the machine.
+    Data is only written when the session was modified; expired rows are purged
+    at most once every cleanup_interval seconds per process.
+    """
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)',
+    ]
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, path, cleanup_interval=300):
+        super().__init__(path)
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = 0.0
+        self._initialize()
+
+    def encode(self, data):
+        """
+        Serializes session data into the compact binary format stored in the database.
+        """
+        return zlib.compress(self.serializer.dumps(data).encode('utf-8'))
+
+    def decode(self, blob):
+        return self.serializer.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not SESSION_ID_PATTERN.match(sid):
+            return ServerSideSession()
+        try:
+            row = self._connection().execute('SELECT data FROM sessions WHERE sid = ? AND expires_at > ?',
+                                             (sid, time.time())).fetchone()
+            if row is not None:
+                return ServerSideSession(self.decode(row[0]), sid=sid)
+        except (sqlite3.Error, zlib.error, ValueError):
+            logger.exception("Could not load session data.")
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        # If the session is modified to be empty, drop the row and the cookie
+        if not session:
+            if session.modified:
+                if session.sid:
+                    self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add("Cookie")
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        if session.modified:
+            self._write(session.sid, self.encode(dict(session)),
+                        time.time() + app.permanent_session_lifetime.total_seconds())
+            self._cleanup()
+
+        if session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure, samesite=samesite)
+            response.vary.add("Cookie")
+
+    def _write(self, sid, blob, expires_at):
+        try:
+            self._connection().execute('INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)',
+                                       (sid, blob, expires_at))
+        except sqlite3.Error:
+            logger.exception("Could not save session data.")
+
+    def _delete(self, sid):
+        try:
+            self._connection().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+        except sqlite3.Error:
+            logger.exception("Could not delete session data.")
+
+    def _cleanup(self):
+        now = time.time()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.cleanup_interval
+        try:
+            self._connection().execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+        except sqlite3.Error:
+            logger.exception("Could not purge expired sessions.")
+
+# Session state left behind by submitting all three calculators with their default values
+SAMPLE_SESSION = {
+    'monthly_savings': '3.000,00', 'initial_investment': '10.000,00', 'annual_rate': '6,00',
+    'safe_withdrawal_rate': '4,00', 'birth_year': '1990',
+    'period_savings': ['3.000,00'] * 10, 'period_extra_deposits': ['0,00'] * 10,
+    'simulation_mode': False, 'volatility': '15,00', 'simulation_paths': '10000', 'simulation_seed': '',
+    'calculator1_state': {
+        'initial_investment': 10000.0, 'annual_rate': 6.0, 'safe_withdrawal_rate': 4.0,
+        'birth_year': 1990, 'current_year': 2026,
+        'period_savings': [3000.0] * 10, 'period_extra_deposits': [0.0] * 10,
+        'future_values': [221839.61419041472, 505328.8042489438, 884701.2893583754, 1392387.2523694923,
+                          2071785.593459457, 2980973.8308850573, 4197672.785061058, 5825890.445778552,
+                          8004812.9652507445, 10920702.81241707],
+    },
+    'target_income': '7.000,00', 'initial_investment_c2': '10.000,00', 'annual_rate_c2': '6,00',
+    'safe_withdrawal_rate_c2': '4,00', 'birth_year_c2': '1990', 'cash_flows_c2': [],
+    'monthly_contribution_c2': '',
+    'salary': '8.000,00', 'housing': '2.000,00', 'utilities': '400,00', 'transportation': '600,00',
+    'food': '1.200,00', 'hobbies': '300,00', 'subscriptions': '100,00', 'healthcare': '500,00',
+    'debt': '0,00', 'other': '200,00',
+}
+
+def measure_session_overhead(app, interface, data=SAMPLE_SESSION, iterations=2000):
+    """
+    Measures the cookie size and the time spent opening and saving one session with the given interface.
+    Returns a dict with the cookie bytes, the Cookie request header bytes and microseconds per request.
+    """
+    cookie_name = app.config['SESSION_COOKIE_NAME']
+    with app.test_request_context() as ctx:
+        session = interface.open_session(app, ctx.request)
+        session.update(data)
+        response = app.response_class()
+        interface.save_session(app, session, response)
+    cookie_value = response.headers['Set-Cookie'].split(';', 1)[0].split('=', 1)[1]
+    headers = {'Cookie': f'{cookie_name}={cookie_value}'}
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with app.test_request_context(headers=headers) as ctx:
+            session = interface.open_session(app, ctx.request)
+            session['annual_rate'] = session['annual_rate']
+            session.modified = True
+            interface.save_session(app, session, app.response_class())
+    elapsed = time.perf_counter() - start
+
+    return {
+        "cookie_bytes": len(cookie_value),
+        "cookie_header_bytes": len(headers['Cookie']),
+        "microseconds_per_request": elapsed / iterations * 1e6,
+    }
+
+if __name__ == '__main__':
+    import tempfile
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.secret_key = 'measurement-only'
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            'signed cookie': measure_session_overhead(app, SecureCookieSessionInterface()),
+            'sqlite': measure_session_overhead(app, SQLiteSessionInterface(f'{directory}/sessions.sqlite3')),
+        }
+    for backend, result in results.items():
+        print(f"{backend:>14}: cookie {result['cookie_bytes']:5d} bytes, "
+              f"{result['microseconds_per_request']:8.1f} us per request (open + save)")
+    saved = results['signed cookie']['cookie_header_bytes'] - results['sqlite']['cookie_header_bytes']
+    print(f"Saved per request: {saved} bytes of Cookie header")
@@ -0,0 +1,212 @@
+"""
+statements.py
+
+Streaming bank-statement ingestion for Calculator 3.
+Reads OFX or CSV statements of any size in constant memory, categorizes every debit into the
+Calculator 3 expense buckets with keyword rules compiled once into a single regular expression,
+and averages the totals per calendar month.
+"""
+
+import csv
+import io
+import re
+import unicodedata
+
+from utils import parse_localized_number
+
+# Chunk size used when scanning OFX files
+OFX_CHUNK_CHARS = 64 * 1024
+
+# Keyword rules per Calculator 3 expense bucket (matched on whole words, lowercase, without accents).
+# Debits that match no rule go to 'other'.
+CATEGORY_RULES = {
+    'housing': ['aluguel', 'condominio', 'iptu', 'imobiliaria', 'financiamento imobiliario', 'quintoandar'],
+    'utilities': ['energia', 'luz', 'enel', 'cemig', 'copel', 'light', 'sabesp', 'agua', 'gas', 'comgas',
+                  'internet', 'telefone', 'vivo', 'claro', 'tim', 'oi'],
+    'transportation': ['uber', '99app', '99 pop', 'combustivel', 'posto', 'shell', 'ipiranga', 'petrobras',
+                       'estacionamento', 'pedagio', 'sem parar', 'metro', 'onibus', 'bilhete unico'],
+    'food': ['supermercado', 'mercado', 'carrefour', 'pao de acucar', 'assai', 'atacadao', 'extra',
+             'ifood', 'rappi', 'restaurante', 'padaria', 'lanchonete', 'acougue', 'hortifruti'],
+    'hobbies': ['cinema', 'ingresso', 'show', 'teatro', 'livraria', 'viagem', 'hotel', 'airbnb',
+                'academia', 'smartfit', 'bar'],
+    'subscriptions': ['netflix', 'spotify', 'amazon prime', 'prime video', 'disney', 'hbo', 'max',
+                      'youtube premium', 'globoplay', 'deezer', 'apple.com', 'google one', 'assinatura'],
+    'healthcare': ['farmacia', 'drogaria', 'drogasil', 'raia', 'pague menos', 'unimed', 'amil',
+                   'bradesco saude', 'sulamerica', 'hospital', 'clinica', 'laboratorio', 'dentista', 'medico'],
+    'debt': ['emprestimo', 'financiamento', 'parcela', 'juros', 'iof', 'fatura cartao', 'consignado'],
+}
+
+CATEGORIES = ['housing', 'utilities', 'transportation', 'food', 'hobbies',
+              'subscriptions', 'healthcare', 'debt', 'other']
+
+def normalize_text(text):
+    """
+    Lowercases text and strips accents so rules can be written in plain ASCII.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+class CategoryMatcher:
+    """
+    Categorizes transaction descriptions with a single compiled regular expression.
+    Each bucket becomes one named alternation group, so a description is scanned once
+    no matter how many rules exist; the first bucket in rule order wins on overlapping matches.
+    """
+
+    def __init__(self, rules=CATEGORY_RULES, default='other'):
+        self.default = default
+        groups = []
+        for category, keywords in rules.items():
+            alternatives = '|'.join(re.escape(normalize_text(k)) for k in sorted(keywords, key=len, reverse=True))
+            groups.append(f'(?P<{category}>{alternatives})')
+        self._pattern = re.compile(r'\b(?:' + '|'.join(groups) + r')\b')
+
+    def match(self, description):
+        found = self._pattern.search(normalize_text(description))
+        return found.lastgroup if found else self.default
+
+ISO_DATE = re.compile(r'^(\d{4})-?(\d{2})')
+DAY_FIRST_DATE = re.compile(r'^\d{1,2}[/.-](\d{1,2})[/.-](\d{4})')
+
+def _month_key(date_text):
+    """
+    Extracts (year, month) from 'YYYYMMDD...', 'YYYY-MM-DD' or 'DD/MM/YYYY' dates; None when unrecognized.
+    """
+    date_text = date_text.strip()
+    match = ISO_DATE.match(date_text)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = DAY_FIRST_DATE.match(date_text)
+    if match:
+        return int(match.group(2)), int(match.group(1))
+    return None
+
+def _parse_amount(text):
+    """
+    Parses '-1.234,56' (localized) or '-1234.56' (OFX style) amounts.
+    """
+    text = text.strip().replace(' ', '')
+    if ',' in text:
+        return parse_localized_number(text)
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def iter_ofx_transactions(text_stream):
+    """
+    Lazily yields (month_key, description, amount) for every <STMTTRN> of an OFX (SGML or XML) stream.
+    The stream is scanned in fixed-size chunks, so memory use does not depend on the file size.
+    """
+    token = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+    buffer = ''
+    fields = None
+    while True:
+        chunk = text_stream.read(OFX_CHUNK_CHARS)
+        buffer += chunk
+        # Only scan up to the last '<' so a tag is never split across chunks
+        cut = len(buffer) if not chunk else buffer.rfind('<')
+        if cut < 0:
+            # No tag in sight: nothing worth keeping
+            buffer = ''
+            continue
+        if cut == 0 and chunk:
+            continue
+        for closing, tag, value in token.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and fields is not None:
+                    month = _month_key(fields.get('DTPOSTED', ''))
+                    amount = _parse_amount(fields.get('TRNAMT', ''))
+                    if month and amount is not None:
+                        description = ' '.join(filter(None, [fields.get('NAME'), fields.get('MEMO')]))
+                        yield month, description, amount
+                fields = None if closing else {}
+            elif fields is not None and not closing:
+                fields[tag] = value.strip()
+        buffer = buffer[cut:]
+        if not chunk:
+            break
+
+CSV_COLUMNS = {
+    'date': ['date', 'data', 'data lancamento', 'data da transacao'],
+    'description': ['description', 'descricao', 'historico', 'lancamento', 'memo', 'estabelecimento'],
+    'amount': ['amount', 'valor', 'valor (r$)'],
+}
+
+def iter_csv_transactions(text_stream):
+    """
+    Lazily yields (month_key, description, amount) for every row of a CSV statement.
+    Columns are found by name (Portuguese or English); the delimiter (';' or ',') is detected from the header.
+    Rows with an unreadable date or amount are skipped.
+    """
+    header = text_stream.readline()
+    if not header:
+        return
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    names = [normalize_text(name).strip() for name in next(csv.reader([header], delimiter=delimiter))]
+    try:
+        columns = {field: next(i for i, name in enumerate(names) if name in aliases)
+                   for field, aliases in CSV_COLUMNS.items()}
+    except StopIteration:
+        raise ValueError("O extrato CSV precisa das colunas data, descrição e valor.")
+
+    min_length = max(columns.values()) + 1
+    for row in csv.reader(text_stream, delimiter=delimiter):
+        if len(row) < min_length:
+            continue
+        month = _month_key(row[columns['date']])
+        amount = _parse_amount(row[columns['amount']])
+        if month and amount is not None:
+            yield month, row[columns['description']], amount
+
+def _open_text(binary_stream):
+    """
+    Wraps a binary upload in a text stream, choosing UTF-8 when the first bytes decode as UTF-8 and cp1252 otherwise.
+    """
+    head = binary_stream.read(4096)
+    binary_stream.seek(0)
+    try:
+        head.decode('utf-8')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        encoding = 'utf-8-sig' if e.start >= len(head) - 3 else 'cp1252'
+    return io.TextIOWrapper(binary_stream, encoding=encoding, errors='replace', newline='')
+
+def summarize_statement(binary_stream, filename='', matcher=None):
+    """
+    Streams an OFX or CSV statement and returns the average monthly amount per expense bucket.
+    Debits are categorized; credits are averaged as monthly income.
+    The average divides by the number of calendar months between the first and last transaction.
+    Returns a dict with 'expenses' (bucket -> monthly average), 'income', 'months' and 'transactions'.
+    """
+    matcher = matcher or CategoryMatcher()
+    text_stream = _open_text(binary_stream)
+    head = text_stream.read(1024)
+    text_stream.seek(0)
+    is_ofx = filename.lower().endswith(('.ofx', '.qfx')) or 'OFXHEADER' in head or '<OFX>' in head.upper()
+    transactions = iter_ofx_transactions(text_stream) if is_ofx else iter_csv_transactions(text_stream)
+
+    totals = dict.fromkeys(CATEGORIES, 0.0)
+    income = 0.0
+    count = 0
+    first_month = last_month = None
+    for month, description, amount in transactions:
+        count += 1
+        first_month = month if first_month is None else min(first_month, month)
+        last_month = month if last_month is None else max(last_month, month)
+        if amount < 0:
+            totals[matcher.match(description)] += -amount
+        else:
+            income += amount
+
+    if not count:
+        raise ValueError("Nenhuma transação encontrada no extrato.")
+    months = (last_month[0] - first_month[0]) * 12 + last_month[1] - first_month[1] + 1
+    return {
+        "expenses": {category: total / months for category, total in totals.items()},
+        "income": income / months,
+        "months": months,
+        "transactions": count,
+    }
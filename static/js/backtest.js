@@ -0,0 +1,63 @@
+// Historical backtest for Calculator 1: replays the form's contribution schedule against every
+// start month of the server's return series and renders the per-milestone outcomes as a table.
+document.addEventListener('DOMContentLoaded', function() {
+  const button = document.getElementById('runBacktest');
+  if (!button) {
+    return;
+  }
+  const output = document.getElementById('backtestResults');
+
+  function formatPortugueseNumber(value, decimals = 2) {
+    return Number(value).toLocaleString('pt-BR', {
+      minimumFractionDigits: decimals,
+      maximumFractionDigits: decimals
+    });
+  }
+
+  function render(data) {
+    const body = data.rows.map(row => row.windows ? `
+      <tr>
+        <td>${row.years} Anos<br><small class="text-muted">${row.windows} janelas</small></td>
+        <td>${formatPortugueseNumber(row.worst_future_value)}<br><small class="text-muted">início ${row.worst_start}</small></td>
+        <td>${formatPortugueseNumber(row.p10_future_value)}</td>
+        <td><strong>${formatPortugueseNumber(row.p50_future_value)}</strong></td>
+        <td>${formatPortugueseNumber(row.p90_future_value)}</td>
+        <td>${formatPortugueseNumber(row.best_future_value)}<br><small class="text-muted">início ${row.best_start}</small></td>
+        <td>${formatPortugueseNumber(row.p10_monthly_income)} / <strong>${formatPortugueseNumber(row.p50_monthly_income)}</strong></td>
+      </tr>` : `
+      <tr><td>${row.years} Anos</td><td colspan="6" class="text-muted">Série histórica curta demais</td></tr>`).join('');
+    output.innerHTML = `
+      <p class="small text-muted text-center">Dados de ${data.first_month} a ${data.last_month}${data.source ? ' (' + data.source + ')' : ''}</p>
+      <div class="table-responsive">
+        <table class="table table-hover table-striped align-middle">
+          <thead>
+            <tr>
+              <th>Anos Investidos</th>
+              <th>Pior Janela</th>
+              <th>Valor Futuro (P10)</th>
+              <th>Valor Futuro (P50)</th>
+              <th>Valor Futuro (P90)</th>
+              <th>Melhor Janela</th>
+              <th>Renda Passiva Mensal (P10 / P50)</th>
+            </tr>
+          </thead>
+          <tbody>${body}</tbody>
+        </table>
+      </div>`;
+  }
+
+  button.addEventListener('click', function() {
+    const params = new URLSearchParams(new FormData(button.closest('form')));
+    document.querySelectorAll('.backtest-weight').forEach(input => params.append('weights', input.value || '0'));
+    output.textContent = 'Calculando...';
+    fetch(button.dataset.backtestUrl + '?' + params.toString())
+      .then(response => response.json())
+      .then(data => {
+        if (data.error) {
+          output.textContent = data.error;
+          return;
+        }
+        render(data);
+      });
+  });
+});
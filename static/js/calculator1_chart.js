@@ -0,0 +1,193 @@
+// Result chart for Calculator 1.
+// The series are fetched from the JSON endpoint in the canvas' data-chart-url attribute,
+// which browsers cache and revalidate with ETags, so this file and the data load independently of the page.
+document.addEventListener('DOMContentLoaded', function() {
+  const canvas = document.getElementById('projectionChart');
+  if (!canvas) {
+    return;
+  }
+  const ctx = canvas.getContext('2d');
+
+  function formatPortugueseNumber(value, decimals = 2) {
+    return Number(value).toLocaleString('pt-BR', {
+      minimumFractionDigits: decimals,
+      maximumFractionDigits: decimals
+    });
+  }
+
+  function drawChart(data) {
+    const fvData = data.future_value;
+    const incomeData = data.monthly_income;
+    const p10Data = data.p10_future_value;
+    const p90Data = data.p90_future_value;
+
+    const chartLabels = data.years.map((y, idx) => {
+      if (data.age[idx] !== null) {
+        return `${y} Anos (${data.future_year[idx]} - Idade: ${data.age[idx]} anos)`;
+      }
+      return y + ' Anos';
+    });
+
+    const projectionChart = new Chart(ctx, {
+      type: 'line',
+      data: {
+        labels: chartLabels,
+        datasets: [
+          {
+            label: 'Valor Futuro',
+            data: fvData,
+            borderColor: '#10b981',
+            backgroundColor: 'rgba(16, 185, 129, 0.1)',
+            yAxisID: 'y',
+            tension: 0.4,
+            fill: true
+          },
+          {
+            label: 'Renda Passiva Mensal',
+            data: incomeData,
+            borderColor: '#3b82f6',
+            backgroundColor: 'rgba(59, 130, 246, 0.1)',
+            yAxisID: 'y1',
+            tension: 0.4,
+            fill: false
+          }
+        ].concat(p10Data.length ? [
+          {
+            label: 'Valor Futuro (P10)',
+            data: p10Data,
+            borderColor: 'rgba(16, 185, 129, 0.5)',
+            borderDash: [5, 5],
+            yAxisID: 'y',
+            tension: 0.4,
+            fill: false
+          },
+          {
+            label: 'Valor Futuro (P90)',
+            data: p90Data,
+            borderColor: 'rgba(16, 185, 129, 0.5)',
+            backgroundColor: 'rgba(16, 185, 129, 0.05)',
+            borderDash: [5, 5],
+            yAxisID: 'y',
+            tension: 0.4,
+            fill: '-1'
+          }
+        ] : [])
+      },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        interaction: {
+          mode: 'index',
+          intersect: false,
+        },
+        plugins: {
+          tooltip: {
+            callbacks: {
+              label: function(context) {
+                let label = context.dataset.label || '';
+                if (label) {
+                  label += ': ';
+                }
+                if (context.parsed.y !== null) {
+                  label += formatPortugueseNumber(context.parsed.y, 2);
+                }
+                return label;
+              }
+            }
+          }
+        },
+        scales: {
+          y: {
+            type: 'linear',
+            display: true,
+            position: 'left',
+            title: { display: true, text: 'Valor Futuro' },
+            suggestedMax: Math.max(...fvData, ...p90Data) * 1.1,
+            ticks: {
+              callback: function(value) {
+                return formatPortugueseNumber(value, 2);
+              }
+            }
+          },
+          y1: {
+            type: 'linear',
+            display: true,
+            position: 'right',
+            title: { display: true, text: 'Renda Passiva Mensal' },
+            grid: { drawOnChartArea: false },
+            suggestedMax: Math.max(...incomeData) * 1.5,
+            ticks: {
+              callback: function(value) {
+                return formatPortugueseNumber(value, 2);
+              }
+            }
+          }
+        }
+      }
+    });
+
+    // Switch the chart between the milestone table and a yearly/monthly projection fetched as JSON
+    const milestoneSeries = {
+      labels: chartLabels,
+      datasets: projectionChart.data.datasets.map(dataset => dataset.data)
+    };
+    const resolutionSelect = document.getElementById('chartResolution');
+    const horizonInput = document.getElementById('chartHorizon');
+
+    function updateProjectionChart() {
+      if (resolutionSelect.value === 'milestones') {
+        projectionChart.data.labels = milestoneSeries.labels;
+        projectionChart.data.datasets.forEach((dataset, idx) => {
+          dataset.data = milestoneSeries.datasets[idx];
+          dataset.hidden = false;
+        });
+        projectionChart.update();
+        return;
+      }
+      const params = new URLSearchParams(new FormData(resolutionSelect.closest('.card').querySelector('form')));
+      params.set('resolution', resolutionSelect.value);
+      params.set('horizon', horizonInput.value || 50);
+      fetch(canvas.dataset.projectionUrl + '?' + params.toString())
+        .then(response => response.json())
+        .then(series => {
+          if (series.error) {
+            return;
+          }
+          projectionChart.data.labels = series.months.map((month, idx) => {
+            const label = resolutionSelect.value === 'yearly' ? `${month / 12} Anos` : `Mês ${month}`;
+            return series.age.length ? `${label} (${series.future_year[idx]} - Idade: ${series.age[idx]} anos)` : label;
+          });
+          projectionChart.data.datasets.forEach((dataset, idx) => {
+            // Percentile bands only exist at the milestones
+            dataset.data = idx === 0 ? series.future_value : idx === 1 ? series.monthly_income : [];
+            dataset.hidden = idx > 1;
+          });
+          projectionChart.update();
+        });
+    }
+
+    resolutionSelect.addEventListener('change', updateProjectionChart);
+    horizonInput.addEventListener('change', updateProjectionChart);
+
+    // Rows recomputed by the live table updates (calculator1_live.js); percentile bands keep their last values
+    canvas.addEventListener('calculator1:rows', function(event) {
+      event.detail.forEach(row => {
+        milestoneSeries.datasets[0][row.index] = row.future_value_raw;
+        milestoneSeries.datasets[1][row.index] = row.monthly_income_raw;
+      });
+      if (resolutionSelect.value === 'milestones') {
+        projectionChart.update('none');
+      } else {
+        updateProjectionChart();
+      }
+    });
+  }
+
+  fetch(canvas.dataset.chartUrl)
+    .then(response => response.json())
+    .then(data => {
+      if (!data.error) {
+        drawChart(data);
+      }
+    });
+});
@@ -0,0 +1,69 @@
+// Live updates of the Calculator 1 table while the period savings and extra deposits are edited.
+// Only the periods that changed since the last update are posted; the server recomputes from the
+// first changed milestone on and returns those rows, which replace the table cells and are passed
+// to the chart through a 'calculator1:rows' event on its canvas.
+document.addEventListener('DOMContentLoaded', function() {
+  const table = document.getElementById('resultsTable');
+  if (!table) {
+    return;
+  }
+  const rows = table.querySelectorAll('tbody tr');
+  const savingsInputs = table.querySelectorAll('.period-savings-input');
+  const extraInputs = table.querySelectorAll('.period-extra-input');
+  const canvas = document.getElementById('projectionChart');
+  let sent = Array.from(savingsInputs, (input, idx) => [input.value, extraInputs[idx].value]);
+  let timer = null;
+  let pending = false;
+
+  function applyRows(data) {
+    data.rows.forEach(row => {
+      const cells = rows[row.index];
+      cells.querySelector('.future-value-cell').textContent = row.future_value;
+      cells.querySelector('.monthly-income-cell').textContent = row.monthly_income;
+    });
+    if (canvas) {
+      canvas.dispatchEvent(new CustomEvent('calculator1:rows', { detail: data.rows }));
+    }
+  }
+
+  function sendChanges() {
+    if (pending) {
+      // An update is in flight; try again once it has been applied
+      timer = setTimeout(sendChanges, 100);
+      return;
+    }
+    const params = new URLSearchParams();
+    const current = Array.from(savingsInputs, (input, idx) => [input.value, extraInputs[idx].value]);
+    current.forEach((values, idx) => {
+      if (values[0] !== sent[idx][0] || values[1] !== sent[idx][1]) {
+        params.append('period', idx);
+        params.append('period_savings', values[0]);
+        params.append('period_extra_deposits', values[1]);
+      }
+    });
+    if (!params.has('period')) {
+      return;
+    }
+    pending = true;
+    fetch(table.dataset.updateUrl, { method: 'POST', body: params })
+      .then(response => response.json())
+      .then(data => {
+        if (!data.error) {
+          sent = current;
+          applyRows(data);
+        }
+      })
+      .finally(() => {
+        pending = false;
+      });
+  }
+
+  // Programmatic edits (cascading savings, the global savings field) dispatch bubbling input events too
+  table.addEventListener('input', function(event) {
+    if (!event.target.matches('.period-savings-input, .period-extra-input')) {
+      return;
+    }
+    clearTimeout(timer);
+    timer = setTimeout(sendChanges, 250);
+  });
+});
@@ -0,0 +1,82 @@
+// Result chart for Calculator 2.
+// The series are fetched from the JSON endpoint in the canvas' data-chart-url attribute,
+// which browsers cache and revalidate with ETags, so this file and the data load independently of the page.
+document.addEventListener('DOMContentLoaded', function() {
+  const canvas = document.getElementById('projectionChart');
+  if (!canvas) {
+    return;
+  }
+  const ctx = canvas.getContext('2d');
+
+  function formatPortugueseNumber(value, decimals = 2) {
+    return Number(value).toLocaleString('pt-BR', {
+      minimumFractionDigits: decimals,
+      maximumFractionDigits: decimals
+    });
+  }
+
+  function drawChart(data) {
+    const chartLabels = data.years.map((y, idx) => {
+      if (data.age[idx] !== null) {
+        return `${y} Anos (${data.future_year[idx]} - Idade: ${data.age[idx]} anos)`;
+      }
+      return y + ' Anos';
+    });
+
+    new Chart(ctx, {
+      type: 'line',
+      data: {
+        labels: chartLabels,
+        datasets: [
+          {
+            label: 'Investimento Mensal Necessário',
+            data: data.required_investment,
+            borderColor: '#10b981',
+            backgroundColor: 'rgba(16, 185, 129, 0.1)',
+            tension: 0.4,
+            fill: true
+          }
+        ]
+      },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: {
+          tooltip: {
+            callbacks: {
+              label: function(context) {
+                let label = context.dataset.label || '';
+                if (label) {
+                  label += ': ';
+                }
+                if (context.parsed.y !== null) {
+                  label += formatPortugueseNumber(context.parsed.y, 2);
+                }
+                return label;
+              }
+            }
+          }
+        },
+        scales: {
+          y: {
+            beginAtZero: true,
+            title: { display: true, text: 'Valor do Investimento Mensal' },
+            ticks: {
+              callback: function(value) {
+                return formatPortugueseNumber(value, 2);
+              }
+            }
+          }
+        }
+      }
+    });
+  }
+
+  fetch(canvas.dataset.chartUrl)
+    .then(response => response.json())
+    .then(data => {
+      if (!data.error) {
+        drawChart(data);
+      }
+    });
+});
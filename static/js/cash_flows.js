@@ -0,0 +1,44 @@
+// Dated extra deposits and withdrawals of Calculator 2: adds and removes rows of the cash flow list.
+// New rows are copies of the first one with their values cleared and their currency mask applied.
+document.addEventListener('DOMContentLoaded', function() {
+  const container = document.getElementById('cashFlows');
+  if (!container) {
+    return;
+  }
+  const list = container.querySelector('.cash-flow-rows');
+
+  function clearRow(row) {
+    row.querySelectorAll('input').forEach(input => {
+      input.value = '';
+    });
+    row.querySelector('select').value = '12';
+  }
+
+  document.getElementById('addCashFlow').addEventListener('click', function() {
+    const row = list.querySelector('.cash-flow-row').cloneNode(true);
+    clearRow(row);
+    list.appendChild(row);
+    new Cleave(row.querySelector('.currency-input'), {
+      numeral: true,
+      numeralThousandsGroupStyle: 'thousand',
+      delimiter: '.',
+      numeralDecimalMark: ',',
+      numeralDecimalScale: 2
+    });
+    row.querySelector('.currency-input').focus();
+  });
+
+  list.addEventListener('click', function(event) {
+    const button = event.target.closest('.remove-cash-flow');
+    if (!button) {
+      return;
+    }
+    const row = button.closest('.cash-flow-row');
+    // Keep one (empty) row so the list can still be filled in
+    if (list.querySelectorAll('.cash-flow-row').length > 1) {
+      row.remove();
+    } else {
+      clearRow(row);
+    }
+  });
+});
@@ -0,0 +1,93 @@
+// Retirement drawdown for Calculator 1: simulates inflation-adjusted withdrawals from the future value
+// of the chosen milestone, shows the survival probability and solved safe withdrawal rate,
+// and plots the survival probability of every withdrawal rate on the server's curve.
+document.addEventListener('DOMContentLoaded', function() {
+  const button = document.getElementById('runDrawdown');
+  if (!button) {
+    return;
+  }
+  const output = document.getElementById('drawdownResults');
+  const chartContainer = document.getElementById('drawdownChartContainer');
+  let chart = null;
+
+  function formatPortugueseNumber(value, decimals = 2) {
+    return Number(value).toLocaleString('pt-BR', {
+      minimumFractionDigits: decimals,
+      maximumFractionDigits: decimals
+    });
+  }
+
+  function render(data) {
+    const milestone = data.age !== null ? ` (${data.future_year} - Idade: ${data.age} anos)` : '';
+    output.innerHTML = `
+      <div class="table-responsive">
+        <table class="table table-hover table-striped align-middle">
+          <tbody>
+            <tr><th>Patrimônio Inicial</th><td>${data.initial_balance} <small class="text-muted">após ${data.years} anos${milestone}</small></td></tr>
+            <tr><th>Primeira Retirada Mensal</th><td>${data.monthly_withdrawal} <small class="text-muted">corrigida pela inflação</small></td></tr>
+            <tr><th>Probabilidade de Sucesso</th><td><strong>${formatPortugueseNumber(data.survival_probability * 100, 1)}%</strong> <small class="text-muted">em ${data.paths} cenários de ${data.retirement_years} anos</small></td></tr>
+            <tr><th>Patrimônio Final (Mediana)</th><td>${data.median_ending_balance} <small class="text-muted">${data.median_ending_balance_real} em valores do início da aposentadoria</small></td></tr>
+            <tr><th>Taxa de Retirada Segura</th><td><strong>${formatPortugueseNumber(data.safe_withdrawal_rate)}%</strong> <small class="text-muted">para ${formatPortugueseNumber(data.success_target, 0)}% de sucesso</small></td></tr>
+          </tbody>
+        </table>
+      </div>`;
+
+    chartContainer.classList.remove('d-none');
+    if (chart) {
+      chart.destroy();
+    }
+    chart = new Chart(document.getElementById('drawdownChart').getContext('2d'), {
+      type: 'line',
+      data: {
+        labels: data.survival_curve.withdrawal_rates.map(rate => formatPortugueseNumber(rate) + '%'),
+        datasets: [{
+          label: 'Probabilidade de Sucesso',
+          data: data.survival_curve.survival_probability.map(p => p * 100),
+          borderColor: '#3b82f6',
+          backgroundColor: 'rgba(59, 130, 246, 0.1)',
+          tension: 0.3,
+          fill: true
+        }]
+      },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        scales: {
+          x: { title: { display: true, text: 'Taxa de Retirada Anual' } },
+          y: {
+            min: 0,
+            max: 100,
+            ticks: { callback: value => value + '%' }
+          }
+        },
+        plugins: {
+          tooltip: {
+            callbacks: {
+              label: context => `${context.dataset.label}: ${formatPortugueseNumber(context.parsed.y, 1)}%`
+            }
+          }
+        }
+      }
+    });
+  }
+
+  button.addEventListener('click', function() {
+    const params = new URLSearchParams(new FormData(button.closest('form')));
+    params.set('years', document.getElementById('drawdownYears').value);
+    params.set('retirement_years', document.getElementById('drawdownRetirementYears').value);
+    params.set('withdrawal_rate', document.getElementById('drawdownWithdrawalRate').value);
+    params.set('inflation', document.getElementById('drawdownInflation').value);
+    params.set('success_target', document.getElementById('drawdownSuccessTarget').value);
+    output.textContent = 'Calculando...';
+    fetch(button.dataset.drawdownUrl + '?' + params.toString())
+      .then(response => response.json())
+      .then(data => {
+        if (data.error) {
+          output.textContent = data.error;
+          chartContainer.classList.add('d-none');
+          return;
+        }
+        render(data);
+      });
+  });
+});
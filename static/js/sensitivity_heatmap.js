@@ -0,0 +1,184 @@
+// Sensitivity heatmap for Calculator 1: future value or monthly income over annual rate x monthly savings.
+// The grid is fetched as packed float32 from the URL in the canvas' data-sensitivity-url attribute
+// and painted one cell per pixel into an offscreen image that is scaled onto the canvas.
+document.addEventListener('DOMContentLoaded', function() {
+  const canvas = document.getElementById('sensitivityHeatmap');
+  if (!canvas) {
+    return;
+  }
+  const ctx = canvas.getContext('2d');
+  const info = document.getElementById('sensitivityInfo');
+  const controls = {
+    metric: document.getElementById('sensitivityMetric'),
+    years: document.getElementById('sensitivityYears'),
+    rateMin: document.getElementById('sensitivityRateMin'),
+    rateMax: document.getElementById('sensitivityRateMax'),
+    savingsMin: document.getElementById('sensitivitySavingsMin'),
+    savingsMax: document.getElementById('sensitivitySavingsMax')
+  };
+  const margin = { left: 70, right: 10, top: 10, bottom: 40 };
+  // Viridis colour stops
+  const palette = [[68, 1, 84], [59, 82, 139], [33, 145, 140], [94, 201, 98], [253, 231, 37]];
+  let grid = null;
+
+  function parseLocalized(value) {
+    const parsed = parseFloat(String(value).replace(/\./g, '').replace(',', '.'));
+    return isNaN(parsed) ? null : parsed;
+  }
+
+  function formatPortugueseNumber(value, decimals = 2) {
+    return Number(value).toLocaleString('pt-BR', {
+      minimumFractionDigits: decimals,
+      maximumFractionDigits: decimals
+    });
+  }
+
+  function colour(t) {
+    const scaled = Math.min(Math.max(t, 0), 1) * (palette.length - 1);
+    const i = Math.min(Math.floor(scaled), palette.length - 2);
+    const f = scaled - i;
+    return palette[i].map((c, k) => Math.round(c + (palette[i + 1][k] - c) * f));
+  }
+
+  function linspace(min, max, steps, idx) {
+    return steps > 1 ? min + (max - min) * idx / (steps - 1) : min;
+  }
+
+  function plotArea() {
+    return {
+      x: margin.left,
+      y: margin.top,
+      width: canvas.width - margin.left - margin.right,
+      height: canvas.height - margin.top - margin.bottom
+    };
+  }
+
+  function draw() {
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    if (!grid) {
+      return;
+    }
+    const [rows, cols] = grid.shape;
+    let min = Infinity;
+    let max = -Infinity;
+    for (const value of grid.values) {
+      if (value < min) min = value;
+      if (value > max) max = value;
+    }
+    const span = max > min ? max - min : 1;
+
+    // One pixel per cell, highest rate on the top row
+    const image = new ImageData(cols, rows);
+    for (let r = 0; r < rows; r++) {
+      for (let c = 0; c < cols; c++) {
+        const [red, green, blue] = colour((grid.values[r * cols + c] - min) / span);
+        const offset = ((rows - 1 - r) * cols + c) * 4;
+        image.data[offset] = red;
+        image.data[offset + 1] = green;
+        image.data[offset + 2] = blue;
+        image.data[offset + 3] = 255;
+      }
+    }
+    const offscreen = document.createElement('canvas');
+    offscreen.width = cols;
+    offscreen.height = rows;
+    offscreen.getContext('2d').putImageData(image, 0, 0);
+
+    const area = plotArea();
+    ctx.imageSmoothingEnabled = false;
+    ctx.drawImage(offscreen, area.x, area.y, area.width, area.height);
+
+    // Axes: rates on the left, savings at the bottom
+    ctx.fillStyle = '#6c757d';
+    ctx.font = '12px sans-serif';
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'middle';
+    [0, 0.5, 1].forEach(t => {
+      const rate = grid.rateMin + (grid.rateMax - grid.rateMin) * t;
+      ctx.fillText(formatPortugueseNumber(rate, 1) + '%', area.x - 6, area.y + area.height * (1 - t));
+    });
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'top';
+    [0, 0.5, 1].forEach(t => {
+      const savings = grid.savingsMin + (grid.savingsMax - grid.savingsMin) * t;
+      ctx.fillText(formatPortugueseNumber(savings, 0), area.x + area.width * t, area.y + area.height + 6);
+    });
+    ctx.fillText('Aporte Mensal', area.x + area.width / 2, area.y + area.height + 22);
+
+    // Mark the scenario from the form
+    const rate = parseLocalized(document.getElementById('annual_rate').value);
+    const savings = parseLocalized(document.getElementById('monthly_savings').value);
+    if (rate !== null && savings !== null && grid.rateMax > grid.rateMin && grid.savingsMax > grid.savingsMin) {
+      const x = area.x + area.width * (savings - grid.savingsMin) / (grid.savingsMax - grid.savingsMin);
+      const y = area.y + area.height * (1 - (rate - grid.rateMin) / (grid.rateMax - grid.rateMin));
+      if (x >= area.x && x <= area.x + area.width && y >= area.y && y <= area.y + area.height) {
+        ctx.strokeStyle = '#ffffff';
+        ctx.lineWidth = 2;
+        ctx.beginPath();
+        ctx.arc(x, y, 6, 0, 2 * Math.PI);
+        ctx.stroke();
+      }
+    }
+    info.textContent = `Mínimo: ${formatPortugueseNumber(min)} | Máximo: ${formatPortugueseNumber(max)}`;
+  }
+
+  function update() {
+    const form = canvas.closest('.card').querySelector('form');
+    const rate = parseLocalized(document.getElementById('annual_rate').value) || 6;
+    const savings = parseLocalized(document.getElementById('monthly_savings').value) || 1000;
+    const params = new URLSearchParams({
+      initial_investment: form.querySelector('#initial_investment').value,
+      safe_withdrawal_rate: form.querySelector('#safe_withdrawal_rate').value,
+      metric: controls.metric.value,
+      years: controls.years.value,
+      rate_min: controls.rateMin.value || formatPortugueseNumber(Math.max(rate - 4, 0.5)),
+      rate_max: controls.rateMax.value || formatPortugueseNumber(rate + 4),
+      savings_min: controls.savingsMin.value || '0,00',
+      savings_max: controls.savingsMax.value || formatPortugueseNumber(savings * 2),
+      rate_steps: 200,
+      savings_steps: 200,
+      format: 'binary'
+    });
+    fetch(canvas.dataset.sensitivityUrl + '?' + params.toString())
+      .then(response => response.ok ? response.arrayBuffer().then(buffer => ({ response, buffer })) : response.json().then(body => Promise.reject(body.error)))
+      .then(({ response, buffer }) => {
+        grid = {
+          shape: response.headers.get('X-Grid-Shape').split(',').map(Number),
+          values: new Float32Array(buffer),
+          rateMin: parseLocalized(params.get('rate_min')),
+          rateMax: parseLocalized(params.get('rate_max')),
+          savingsMin: parseLocalized(params.get('savings_min')),
+          savingsMax: parseLocalized(params.get('savings_max'))
+        };
+        draw();
+      })
+      .catch(error => {
+        grid = null;
+        draw();
+        info.textContent = error || '';
+      });
+  }
+
+  canvas.addEventListener('mousemove', function(event) {
+    if (!grid) {
+      return;
+    }
+    const area = plotArea();
+    const bounds = canvas.getBoundingClientRect();
+    const x = (event.clientX - bounds.left) * canvas.width / bounds.width - area.x;
+    const y = (event.clientY - bounds.top) * canvas.height / bounds.height - area.y;
+    if (x < 0 || y < 0 || x > area.width || y > area.height) {
+      return;
+    }
+    const [rows, cols] = grid.shape;
+    const c = Math.min(cols - 1, Math.floor(x / area.width * cols));
+    const r = Math.min(rows - 1, Math.floor((1 - y / area.height) * rows));
+    const rate = linspace(grid.rateMin, grid.rateMax, rows, r);
+    const savings = linspace(grid.savingsMin, grid.savingsMax, cols, c);
+    info.textContent = `Taxa: ${formatPortugueseNumber(rate)}% | Aporte Mensal: ${formatPortugueseNumber(savings)} | ` +
+      `${controls.metric.options[controls.metric.selectedIndex].text}: ${formatPortugueseNumber(grid.values[r * cols + c])}`;
+  });
+
+  Object.values(controls).forEach(control => control.addEventListener('change', update));
+  update();
+});
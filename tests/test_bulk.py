@@ -0,0 +1,57 @@
+"""
+tests/test_bulk.py
+
+Bulk API: malformed rows must become per-row errors without cutting the NDJSON stream short.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_store_dir = tempfile.mkdtemp()
+for _name in ('RESULT_CACHE_PATH', 'SESSION_STORE_PATH', 'JOB_STORE_PATH'):
+    os.environ.setdefault(_name, os.path.join(_store_dir, _name.lower() + '.sqlite3'))
+
+from app import app  # noqa: E402
+
+CSV = (b'id;monthly_savings;initial_investment;annual_rate\n'
+       b'a;3.000,00;10.000,00;6,00\n'
+       b'b;3.000,00;10.\xff000,00;6,00\n'
+       b'c;"3.000,00;10.000,00;6,00\n'
+       b'd;1.000,00;0;8,00\n')
+
+def _post(data):
+    response = app.test_client().post('/api/bulk/calculator1', data=data, content_type='text/csv')
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_bad_rows_become_errors_and_the_stream_continues():
+    lines = _post(CSV)
+    assert [line["row"] for line in lines] == [1, 2, 3, 4]
+    assert [line.get("id") for line in lines] == ['a', 'b', None, 'd']
+    assert "result" in lines[0] and "result" in lines[3]
+    assert "UTF-8" in lines[1]["error"]
+    assert "malformada" in lines[2]["error"]
+
+def test_bulk_job_decodes_invalid_bytes_per_row():
+    from jobs import JOB_KINDS
+    lines = CSV.decode('utf-8-sig', errors='replace').splitlines(keepends=True)
+    assert len(lines) == 5
+    result = JOB_KINDS['bulk_calculator1']({"csv": ''.join(lines), "current_year": 2025}, lambda fraction: None)
+    result = json.loads(result)
+    assert ["error" in row for row in result["rows"]] == [False, True, True, False]
+
+def test_bulk_job_refuses_uploads_whose_result_cannot_be_stored():
+    from app import job_store
+    from jobs import BULK_RESULT_ROW_BYTES
+    max_result_bytes = job_store.max_result_bytes
+    job_store.max_result_bytes = len(CSV) + 3 * BULK_RESULT_ROW_BYTES['calculator1']
+    try:
+        response = app.test_client().post('/api/jobs/bulk_calculator1', data=CSV, content_type='text/csv')
+    finally:
+        job_store.max_result_bytes = max_result_bytes
+    assert response.status_code == 400
+    assert "3 linhas" in response.get_json()["error"]
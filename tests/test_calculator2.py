@@ -0,0 +1,52 @@
+"""
+tests/test_calculator2.py
+
+Calculator 2: the single extra deposit of the original form must keep counting as a dated cash flow,
+on the form route and on the chart data endpoint alike.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_store_dir = tempfile.mkdtemp()
+for _name in ('RESULT_CACHE_PATH', 'SESSION_STORE_PATH', 'JOB_STORE_PATH'):
+    os.environ.setdefault(_name, os.path.join(_store_dir, _name.lower() + '.sqlite3'))
+
+from app import app  # noqa: E402
+
+FORM = {'target_income': '7.000,00', 'initial_investment': '10.000,00', 'annual_rate': '6,00',
+        'safe_withdrawal_rate': '4,00'}
+LEGACY = dict(FORM, extra_deposit='500.000,00', extra_deposit_year='5')
+# The same deposit as a dated cash flow at the end of year 5
+CASH_FLOW = dict(FORM, cash_flow_amount='500.000,00', cash_flow_year='5', cash_flow_month='12')
+
+def _page(form):
+    response = app.test_client().post('/calculator-2-user-set-future-monthly-income/calculate', data=form)
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+def _chart(args):
+    response = app.test_client().get('/calculator-2-user-set-future-monthly-income/chart-data', query_string=args)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_legacy_extra_deposit_is_a_cash_flow_on_the_form_route():
+    assert _page(LEGACY) == _page(CASH_FLOW)
+    assert _page(LEGACY) != _page(FORM)
+
+def test_legacy_extra_deposit_is_a_cash_flow_on_the_chart_data():
+    assert _chart(LEGACY) == _chart(CASH_FLOW)
+    assert _chart(LEGACY) != _chart(FORM)
+
+def test_chart_data_revalidates_with_its_etag():
+    client = app.test_client()
+    url = '/calculator-2-user-set-future-monthly-income/chart-data'
+    first = client.get(url, query_string=FORM)
+    assert first.status_code == 200 and first.headers['ETag']
+    again = client.get(url, query_string=FORM, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and not again.get_data()
+    changed = client.get(url, query_string=dict(FORM, annual_rate='7,00'), headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
@@ -0,0 +1,114 @@
+"""
+tests/test_engines.py
+
+The single-scenario functions behind the forms and the vectorized engines behind the batch and bulk
+paths are separate implementations of the same formulas; they must keep giving the same numbers.
+The same goes for the incremental update, the projection, the sensitivity grid, the time-to-FI
+solvers and the backtest, which all take shortcuts around a full month-by-month evaluation.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (DURATIONS, calculate_calculator1, calculate_calculator2, calculator1_engine,  # noqa: E402
+                   calculator2_engine, iter_calculator1_projection, legacy_cash_flows, sensitivity_grid,
+                   solve_time_to_fi)
+
+RATES = [-2.0, 0.0, 0.5, 6.0, 12.0]
+PERIOD_SAVINGS = [1000.0 + 250 * i for i in range(len(DURATIONS))]
+PERIOD_EXTRAS = [0.0, 5000.0, 0.0, -2000.0, 0.0, 0.0, 10000.0, 0.0, 0.0, 0.0]
+CASH_FLOWS = [[7, 20000.0], [60, -5000.0], [61, 3000.0], [420, 100000.0]]
+
+def _close(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-6)
+
+def test_calculator1_matches_the_engine():
+    for rate in RATES:
+        for savings, extras in [(1500.0, None), (PERIOD_SAVINGS, None), (PERIOD_SAVINGS, PERIOD_EXTRAS)]:
+            rows = calculate_calculator1(savings, 25000.0, rate, 4.0, period_extra_deposits=extras)
+            engine = calculator1_engine(25000.0, rate, 4.0, [savings] if isinstance(savings, list) else savings,
+                                        [extras] if extras else 0.0)
+            _close([row["future_value_raw"] for row in rows], engine["future_value"][0])
+            _close([row["monthly_income_raw"] for row in rows], engine["monthly_income"][0])
+
+def test_calculator2_matches_the_engine():
+    for rate in RATES[2:]:
+        for extra, extra_year, cash_flows in [(0.0, None, None), (50000.0, 15, None), (0.0, None, CASH_FLOWS),
+                                              (50000.0, 15, CASH_FLOWS)]:
+            rows = calculate_calculator2(8000.0, 40000.0, rate, 4.0, extra_deposit=extra,
+                                         extra_deposit_year=extra_year, cash_flows=cash_flows)
+            # The engine's own extra deposit arguments and the merged cash flow list must agree too
+            for engine in [calculator2_engine(8000.0, 40000.0, rate, 4.0, extra, extra_year or 0, cash_flows=cash_flows),
+                           calculator2_engine(8000.0, 40000.0, rate, 4.0,
+                                              cash_flows=legacy_cash_flows(extra, extra_year, cash_flows))]:
+                _close([row["required_investment_raw"] for row in rows],
+                       np.maximum(engine["required_investment"][0], 0))
+
+def test_engine_batches_match_single_scenarios():
+    initial, rates, savings = [0.0, 25000.0, 1e6], [3.0, 6.0, 12.0], [500.0, 1500.0, 8000.0]
+    engine = calculator1_engine(initial, rates, 4.0, savings)
+    for i in range(3):
+        rows = calculate_calculator1(savings[i], initial[i], rates[i], 4.0)
+        _close([row["future_value_raw"] for row in rows], engine["future_value"][i])
+
+    targets, extras, extra_years = [3000.0, 8000.0, 20000.0], [0.0, 50000.0, 10000.0], [0, 15, 3]
+    engine = calculator2_engine(targets, initial, rates, 4.0, extras, extra_years, cash_flows=CASH_FLOWS)
+    for i in range(3):
+        rows = calculate_calculator2(targets[i], initial[i], rates[i], 4.0, extra_deposit=extras[i],
+                                     extra_deposit_year=extra_years[i] or None, cash_flows=CASH_FLOWS)
+        _close([row["required_investment_raw"] for row in rows], np.maximum(engine["required_investment"][i], 0))
+
+def test_incremental_recompute_matches_full_recompute():
+    before = calculate_calculator1(PERIOD_SAVINGS, 25000.0, 6.0, 4.0, period_extra_deposits=PERIOD_EXTRAS)
+    for start_index in range(len(DURATIONS)):
+        savings = list(PERIOD_SAVINGS)
+        extras = list(PERIOD_EXTRAS)
+        savings[start_index] += 700.0
+        extras[start_index] += 1234.0
+        start_value = before[start_index - 1]["future_value_raw"] if start_index else 25000.0
+        partial = calculate_calculator1(savings, 25000.0, 6.0, 4.0, period_extra_deposits=extras,
+                                        start_index=start_index, start_value=start_value)
+        full = calculate_calculator1(savings, 25000.0, 6.0, 4.0, period_extra_deposits=extras)
+        assert [row["years"] for row in partial] == DURATIONS[start_index:]
+        _close([row["future_value_raw"] for row in partial], [row["future_value_raw"] for row in full[start_index:]])
+
+def test_monthly_projection_matches_the_milestones():
+    points = list(iter_calculator1_projection(25000.0, 6.0, 4.0, PERIOD_SAVINGS, PERIOD_EXTRAS, horizon_years=50))
+    rows = calculate_calculator1(PERIOD_SAVINGS, 25000.0, 6.0, 4.0, period_extra_deposits=PERIOD_EXTRAS)
+    _close([points[years * 12]["future_value"] for years in DURATIONS], [row["future_value_raw"] for row in rows])
+
+def test_sensitivity_grid_matches_the_engine():
+    rates, savings = [2.0, 6.0, 10.0], [0.0, 1000.0, 5000.0]
+    grid = sensitivity_grid(25000.0, rates, savings, 4.0, 20)
+    for i, rate in enumerate(rates):
+        engine = calculator1_engine(25000.0, rate, 4.0, savings)
+        _close(grid[i], engine["future_value"][:, DURATIONS.index(20)])
+
+def test_time_to_fi_solvers_agree():
+    args = ([3000.0, 8000.0, 20000.0], [0.0, 25000.0, 1e6], [1500.0, 3000.0, 500.0], [4.0, 6.0, 8.0], 4.0)
+    # A zero cash flow sends the same scenarios through the month-by-month scan instead of the closed form
+    closed = solve_time_to_fi(*args)["months"]
+    scanned = solve_time_to_fi(*args, cash_flows=[[1, 0.0]])["months"]
+    np.testing.assert_array_equal(closed, scanned)
+    # The bisection for the single extra deposit must agree with the same deposit as a cash flow
+    bisected = solve_time_to_fi(*args, extra_deposits=50000.0, extra_deposit_years=5)["months"]
+    scanned = solve_time_to_fi(*args, cash_flows=[[60, 50000.0]])["months"]
+    np.testing.assert_array_equal(bisected, scanned)
+
+def test_backtest_with_constant_returns_matches_the_engine():
+    from backtest import ReturnSeries, backtest_calculator1
+    path = os.path.join(tempfile.mkdtemp(), 'returns.npy')
+    np.save(path, np.full((12 * 60, 1), 1.06 ** (1 / 12) - 1))
+    with open(os.path.join(os.path.dirname(path), 'returns.json'), 'w') as f:
+        json.dump({"start": "1960-01"}, f)
+    backtest = backtest_calculator1(ReturnSeries(path), 25000.0, PERIOD_SAVINGS, PERIOD_EXTRAS)
+    engine = calculator1_engine(25000.0, 6.0, 4.0, [PERIOD_SAVINGS], [PERIOD_EXTRAS])
+    # The first window covers every milestone; later ones end early and are NaN from there on
+    _close(backtest["future_value"][0], engine["future_value"][0])
+    _close(backtest["future_value"][-1, 0], engine["future_value"][0, 0])
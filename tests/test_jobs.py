@@ -0,0 +1,40 @@
+"""
+tests/test_jobs.py
+
+Job runner: a pool process that dies must not break the submissions that follow.
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs import JobRunner, JobStore  # noqa: E402
+
+CSV = 'salary;housing\n5.000,00;1.500,00\n'
+
+def _wait(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+def test_runner_replaces_a_broken_pool():
+    store = JobStore(os.path.join(tempfile.mkdtemp(), 'jobs.sqlite3'))
+    runner = JobRunner(store, max_workers=1)
+    first = runner.submit('bulk_calculator3', {"csv": CSV, "current_year": 2025})
+    _wait(lambda: store.get(first)["status"] == 'completed')
+
+    pool = runner._pool
+    for process in list(pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+    _wait(lambda: pool._broken)
+
+    second = runner.submit('bulk_calculator3', {"csv": CSV, "current_year": 2025})
+    _wait(lambda: store.get(second)["status"] not in ('queued', 'running'))
+    assert store.get(second)["status"] == 'completed'
+    assert runner._pool is not pool
+    runner._pool.shutdown()
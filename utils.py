@@ -1,3 +1,27 @@
+import functools
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Milestones (in years) reported by Calculators 1 and 2.
+DURATIONS = [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
+
+# Monte Carlo settings: paths are simulated in fixed-size chunks, each with its own seed,
+# so results only depend on the seed and never on how chunks are spread across processes.
+SIMULATION_CHUNK_PATHS = 5000
+SIMULATION_POOL_THRESHOLD = 50000
+SIMULATION_PERCENTILES = [10, 50, 90]
+
+# Longest horizon accepted by the projection mode of Calculator 1
+MAX_PROJECTION_YEARS = 100
+
+# Annual rates most of our traffic uses; their factors are computed when the app is imported.
+COMMON_ANNUAL_RATES = [4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 12.0]
+
 def parse_localized_number(s):
     """
     Converts a localized number string (e.g., "1.234,56") to a float.
@@ -21,47 +45,542 @@ def format_currency(value):
     formatted = formatted.replace(',', 'TEMP').replace('.', ',').replace('TEMP', '.')
     return formatted
 
-def calculate_calculator1(monthly_savings, initial_investment, annual_rate, safe_withdrawal_rate, birth_year=None, current_year=None, period_extra_deposits=None):
+class GrowthFactorCache:
+    """
+    Bounded, thread-safe LRU cache of growth factors for one annual rate and a tuple of month counts.
+    Each entry holds the monthly rate, the compound factors (1 + monthly_rate) ** months
+    and the annuity factors ((1 + monthly_rate) ** months - 1) / monthly_rate as read-only arrays,
+    so a cache hit costs one dictionary lookup however many milestones are requested.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _compute(rates, months):
+        """
+        Computes the factors of a column of annual rates for a 1-D array of month counts.
+        """
+        monthly_rates = (1 + rates / 100) ** (1 / 12) - 1
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            compound = (1 + monthly_rates) ** months
+            annuity = np.where(monthly_rates != 0, (compound - 1) / monthly_rates, months)
+        return monthly_rates, compound, annuity
+
+    def _lookup(self, annual_rate, months):
+        key = (annual_rate, months)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = self._compute(np.array([[annual_rate]]), np.array(months, dtype=float))
+        for arr in entry:
+            arr.flags.writeable = False
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def get(self, annual_rate, months):
+        """
+        Returns (monthly_rate, compound_factor, annuity_factor) as floats for one annual rate and number of months.
+        """
+        monthly_rate, compound, annuity = self._lookup(float(annual_rate), (int(months),))
+        return float(monthly_rate[0, 0]), float(compound[0, 0]), float(annuity[0, 0])
+
+    def monthly_rate(self, annual_rate):
+        """
+        Returns the monthly rate equivalent to an annual rate in percent.
+        """
+        return self.get(annual_rate, 0)[0]
+
+    def factors(self, annual_rates, months):
+        """
+        Vectorized lookup: annual_rates is a scalar or column of rates, months a 1-D sequence of month counts.
+        Returns (monthly_rates, compound_factors, annuity_factors) broadcast to (rates, months).
+        A single rate (every form submission) is served from the cache; batches of rates are computed
+        directly, which is cheaper than looking them up one by one.
+        """
+        if isinstance(annual_rates, (int, float)) or np.size(annual_rates) == 1:
+            if not isinstance(months, tuple):
+                months = tuple(np.asarray(months, dtype=float).reshape(-1).tolist())
+            rate = annual_rates if isinstance(annual_rates, (int, float)) else np.asarray(annual_rates).reshape(-1)[0]
+            return self._lookup(float(rate), months)
+        return self._compute(np.asarray(annual_rates, dtype=float).reshape(-1, 1), np.asarray(months, dtype=float))
+
+    def warm(self, annual_rates, months_list):
+        """
+        Pre-fills the cache for the given rates and tuples of month counts.
+        """
+        for rate in annual_rates:
+            self.get(rate, 0)
+            for months in months_list:
+                self.factors(rate, tuple(float(m) for m in months))
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+# Process-wide cache shared by every calculator engine
+growth_factor_cache = GrowthFactorCache()
+
+def warm_growth_factor_cache(annual_rates=COMMON_ANNUAL_RATES):
+    """
+    Pre-fills the growth factor cache with the month counts used by Calculators 1 and 2.
+    """
+    interval_months = [(years - prev) * 12 for prev, years in zip([0] + DURATIONS[:-1], DURATIONS)]
+    cumulative_months = [years * 12 for years in DURATIONS]
+    growth_factor_cache.warm(annual_rates, [interval_months, cumulative_months])
+
+def _scenario_column(values):
+    """
+    Reshapes a scalar or a 1-D sequence (one value per scenario) into a column vector.
+    """
+    return np.asarray(values, dtype=float).reshape(-1, 1)
+
+def _period_matrix(values):
+    """
+    Reshapes per-period inputs into a (scenarios, periods) matrix that broadcasts against the milestones.
+    Scalars apply to every scenario and period, 1-D sequences hold one value per scenario
+    and 2-D sequences hold one value per scenario and milestone period.
+    """
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim < 2:
+        arr = arr.reshape(-1, 1)
+    return arr
+
+def calculator1_engine(initial_investments, annual_rates, safe_withdrawal_rates, period_savings, period_extra_deposits=0.0, durations=DURATIONS, start_years=0.0):
+    """
+    Vectorized core of Calculator 1: evaluates any number of scenarios in one array-based pass.
+    initial_investments, annual_rates and safe_withdrawal_rates are scalars or 1-D arrays (one value per scenario).
+    period_savings and period_extra_deposits follow the rules of _period_matrix; extra deposits are added
+    at the end of each milestone period, exactly like calculate_calculator1.
+    initial_investments is the balance at start_years, so passing the future value of a milestone and the
+    later durations continues an earlier evaluation from that milestone.
+    Returns a dict with the milestone years and raw float matrices of shape (scenarios, milestones).
+    """
+    years = np.asarray(durations, dtype=float)
+    initial = _scenario_column(initial_investments)
+    rates = _scenario_column(annual_rates)
+    swr = _scenario_column(safe_withdrawal_rates)
+    savings = _period_matrix(period_savings)
+    extras = _period_matrix(period_extra_deposits)
+    shape = np.broadcast_shapes(initial.shape, rates.shape, swr.shape, savings.shape, extras.shape, (1, len(years)))
+
+    interval_months = np.diff(years, prepend=float(start_years)) * 12
+    monthly_rates, compound, annuity = growth_factor_cache.factors(rates, interval_months)
+    growing = monthly_rates > 0
+
+    # Per-period growth and annuity factors; non-positive rates only accumulate the deposits
+    interval_growth = np.where(growing, compound, 1.0)
+    interval_annuity = np.where(growing, annuity, interval_months)
+
+    # Unroll the milestone chain fv_k = fv_{k-1} * g_k + deposits_k into cumulative products and sums
+    cumulative_growth = np.cumprod(np.broadcast_to(interval_growth, shape), axis=1)
+    deposits = savings * interval_annuity + extras
+    future_value = cumulative_growth * (initial + np.cumsum(deposits / cumulative_growth, axis=1))
+    monthly_income = future_value * ((swr / 100) / 12)
+
+    return {
+        "years": years,
+        "future_value": future_value,
+        "monthly_income": monthly_income,
+        "period_savings": np.broadcast_to(savings, shape),
+        "period_extra": np.broadcast_to(extras, shape),
+    }
+
+def cash_flow_values(cash_flows, monthly_rates, months):
+    """
+    Compounded value at each of the given months of a list of dated cash flows (month, amount).
+    A flow counts from its month on (amounts may be negative) and grows at the monthly rate afterwards.
+    The flows are sorted once and discounted to month 0 into a cumulative sum, so each month is one
+    searchsorted lookup: the cost grows with the number of flows plus months, not their product.
+    monthly_rates is a column of per-scenario rates; returns a (scenarios, months) matrix.
+    """
+    months = np.asarray(months, dtype=float)
+    rates = _scenario_column(monthly_rates)
+    if not cash_flows:
+        return np.zeros(np.broadcast_shapes(rates.shape, (1, months.size)))
+
+    flows = np.asarray(cash_flows, dtype=float).reshape(-1, 2)
+    flows = flows[np.argsort(flows[:, 0], kind='stable')]
+    flow_months, amounts = flows[:, 0], flows[:, 1]
+    with np.errstate(over='ignore'):
+        discounted = np.cumsum(amounts * (1 + rates) ** -flow_months, axis=1)
+        discounted = np.concatenate([np.zeros((rates.shape[0], 1)), discounted], axis=1)
+        counted = np.searchsorted(flow_months, months.reshape(-1), side='right')
+        return (1 + rates) ** months.reshape(1, -1) * discounted[:, counted]
+
+def calculator2_engine(target_incomes, initial_investments, annual_rates, safe_withdrawal_rates, extra_deposits=0.0, extra_deposit_years=0, durations=DURATIONS, cash_flows=None):
+    """
+    Vectorized core of Calculator 2: evaluates any number of scenarios in one array-based pass.
+    Every argument is a scalar or a 1-D array (one value per scenario); an extra_deposit_year of 0 means no extra deposit.
+    cash_flows is an optional list of (month, amount) flows shared by every scenario (see cash_flow_values).
+    Returns a dict with the milestone years and the raw required monthly investment matrix of shape (scenarios, milestones).
+    Negative values mean the target is reached without any further investment.
+    """
+    years = np.asarray(durations, dtype=float)
+    targets = _scenario_column(target_incomes)
+    initial = _scenario_column(initial_investments)
+    rates = _scenario_column(annual_rates)
+    swr = _scenario_column(safe_withdrawal_rates)
+    extras = _scenario_column(extra_deposits)
+    extra_years = _scenario_column(extra_deposit_years)
+
+    R = targets * 1200 / swr
+    n = years * 12
+    monthly_rate, growth, annuity_factor = growth_factor_cache.factors(rates, n)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Compounded value of the one-off extra deposit for milestones at or after its year
+        has_extra = (extras > 0) & (extra_years > 0) & (years >= extra_years)
+        compounded_extra = np.where(has_extra, extras * (1 + monthly_rate) ** ((years - extra_years) * 12), 0.0)
+        compounded_extra = compounded_extra + cash_flow_values(cash_flows, monthly_rate, n)
+
+        pmt = (R - initial * growth - compounded_extra) / annuity_factor
+
+    return {
+        "years": years,
+        "required_investment": pmt,
+    }
+
+def _simulate_calculator1_chunk(seed_sequence, n_paths, initial_investment, period_savings, period_extra_deposits, mean_annual_return, annual_volatility, durations):
+    """
+    Simulates one chunk of Calculator 1 paths with lognormal monthly returns.
+    Returns the future value of every path at every milestone as an (n_paths, milestones) matrix.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    sigma = annual_volatility / 100 / np.sqrt(12)
+    # Drift chosen so that the expected annual growth matches mean_annual_return
+    mu = np.log1p(mean_annual_return / 100) / 12 - sigma ** 2 / 2
+
+    fv = np.full(n_paths, float(initial_investment))
+    future_values = np.empty((n_paths, len(durations)))
+    prev_years = 0
+    for i, years in enumerate(durations):
+        n = int(round((years - prev_years) * 12))
+        prev_years = years
+        growth = np.exp(np.cumsum(rng.normal(mu, sigma, size=(n_paths, n)), axis=1))
+        # Deposits at the end of month t grow by G_n / G_t until the end of the period
+        fv = growth[:, -1] * (fv + period_savings[i] * np.sum(1 / growth, axis=1)) + period_extra_deposits[i]
+        future_values[:, i] = fv
+
+    return future_values
+
+def simulate_calculator1(initial_investment, period_savings, period_extra_deposits, mean_annual_return, annual_volatility, safe_withdrawal_rate, n_paths=10000, seed=None, processes=None, durations=DURATIONS, progress=None):
+    """
+    Monte Carlo version of Calculator 1: samples n_paths monthly return paths and reports percentile bands.
+    period_savings and period_extra_deposits hold one value per milestone period.
+    Chunks run in a process pool when n_paths reaches SIMULATION_POOL_THRESHOLD (or processes > 1).
+    progress, if given, is called with the fraction of chunks done after every chunk.
+    Returns a dict with the milestone years, the percentiles and raw (percentiles, milestones) matrices.
+    """
+    if n_paths <= 0:
+        raise ValueError("The number of simulated paths must be positive.")
+
+    chunk_sizes = [SIMULATION_CHUNK_PATHS] * (n_paths // SIMULATION_CHUNK_PATHS)
+    if n_paths % SIMULATION_CHUNK_PATHS:
+        chunk_sizes.append(n_paths % SIMULATION_CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    args = [(seed_sequence, size, initial_investment, period_savings, period_extra_deposits,
+             mean_annual_return, annual_volatility, durations)
+            for seed_sequence, size in zip(seeds, chunk_sizes)]
+
+    if processes is None:
+        processes = (os.cpu_count() or 1) if n_paths >= SIMULATION_POOL_THRESHOLD else 1
+    processes = min(processes, len(args))
+
+    chunks = []
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for chunk in pool.map(_simulate_calculator1_chunk, *zip(*args)):
+                chunks.append(chunk)
+                if progress is not None:
+                    progress(len(chunks) / len(args))
+    else:
+        for chunk_args in args:
+            chunks.append(_simulate_calculator1_chunk(*chunk_args))
+            if progress is not None:
+                progress(len(chunks) / len(args))
+
+    future_value = np.percentile(np.concatenate(chunks), SIMULATION_PERCENTILES, axis=0)
+    return {
+        "years": np.asarray(durations, dtype=float),
+        "percentiles": SIMULATION_PERCENTILES,
+        "future_value": future_value,
+        "monthly_income": future_value * ((safe_withdrawal_rate / 100) / 12),
+    }
+
+def iter_calculator1_projection(initial_investment, annual_rate, safe_withdrawal_rate, period_savings, period_extra_deposits=None, horizon_years=50, resolution='monthly', start=0, stop=None, durations=DURATIONS):
+    """
+    Lazily yields the Calculator 1 trajectory month by month ('monthly') or year by year ('yearly').
+    Savings and extra deposits follow the milestone periods of calculate_calculator1;
+    after the last milestone the last period's monthly savings keep being invested.
+    start and stop select a window of points in the chosen resolution (point 0 is today).
+    Yields dicts with the month, the years elapsed and the raw future value and monthly income.
+    """
+    if resolution not in ('monthly', 'yearly'):
+        raise ValueError("Resolution must be 'monthly' or 'yearly'.")
+    if horizon_years <= 0 or horizon_years > MAX_PROJECTION_YEARS:
+        raise ValueError(f"Horizon must be between 1 and {MAX_PROJECTION_YEARS} years.")
+
+    step = 1 if resolution == 'monthly' else 12
+    total_points = horizon_years * 12 // step + 1
+    stop = total_points if stop is None else min(stop, total_points)
+
+    if not isinstance(period_savings, list):
+        period_savings = [period_savings] * len(durations)
+    if period_extra_deposits is None:
+        period_extra_deposits = [0.0] * len(durations)
+    milestone_months = [int(years * 12) for years in durations]
+
+    # Every step ends on or before a milestone because milestones fall on whole years
+    monthly_rate, growth, annuity = growth_factor_cache.get(annual_rate, step)
+    if monthly_rate <= 0:
+        growth, annuity = 1.0, float(step)
+    monthly_withdrawal = (safe_withdrawal_rate / 100) / 12
+
+    fv = float(initial_investment)
+    for point in range(stop):
+        month = point * step
+        if month > 0:
+            period = next((i for i, m in enumerate(milestone_months) if month <= m), len(durations) - 1)
+            fv = fv * growth + period_savings[period] * annuity
+            if month in milestone_months:
+                fv += period_extra_deposits[milestone_months.index(month)]
+        if point >= start:
+            yield {
+                "month": month,
+                "years": month / 12,
+                "future_value": fv,
+                "monthly_income": fv * monthly_withdrawal,
+            }
+
+# Metrics that the sensitivity grid can evaluate
+SENSITIVITY_METRICS = ['future_value', 'monthly_income']
+
+def sensitivity_grid(initial_investment, annual_rates, monthly_savings, safe_withdrawal_rate, years, metric='future_value'):
+    """
+    Evaluates Calculator 1 at one milestone over a grid of annual rates x constant monthly savings.
+    The future value is affine in the savings, so the whole grid is the outer product of the
+    per-rate annuity factors with the savings levels plus the grown initial investment:
+    only len(annual_rates) growth factors are computed, whatever the number of savings levels.
+    Returns a float matrix of shape (len(annual_rates), len(monthly_savings)).
+    """
+    if metric not in SENSITIVITY_METRICS:
+        raise ValueError(f"Metric must be one of {', '.join(SENSITIVITY_METRICS)}.")
+    rates = np.asarray(annual_rates, dtype=float).reshape(-1)
+    savings = np.asarray(monthly_savings, dtype=float).reshape(-1)
+    months = np.array([years * 12], dtype=float)
+
+    monthly_rates, compound, annuity = growth_factor_cache.factors(rates, months)
+    growing = monthly_rates > 0
+    compound = np.where(growing, compound, 1.0)[:, 0]
+    annuity = np.where(growing, annuity, months)[:, 0]
+
+    grid = np.outer(annuity, savings)
+    grid += (float(initial_investment) * compound)[:, np.newaxis]
+    if metric == 'monthly_income':
+        grid *= (safe_withdrawal_rate / 100) / 12
+    return grid
+
+def _fi_portfolio_value(months, initial, contributions, monthly_rates, extras, extra_months):
+    """
+    Portfolio value after the given number of months for column-shaped scenario arrays.
+    Contributions are invested at the end of each month and the extra deposit at the end of its month.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + monthly_rates) ** months
+        annuity = np.where(monthly_rates != 0, (growth - 1) / monthly_rates, months)
+        extra = np.where(months >= extra_months, extras * (1 + monthly_rates) ** (months - extra_months), 0.0)
+    return initial * growth + contributions * annuity + extra
+
+def solve_time_to_fi(target_incomes, initial_investments, monthly_contributions, annual_rates, safe_withdrawal_rates, extra_deposits=0.0, extra_deposit_years=0, max_years=MAX_PROJECTION_YEARS, cash_flows=None):
+    """
+    Finds the first month in which the portfolio reaches R = target_income * 1200 / safe_withdrawal_rate.
+    Every argument is a scalar or a 1-D array (one value per scenario); an extra_deposit_year of 0 means no extra deposit.
+    Scenarios without an extra deposit are solved with the closed-form logarithm; the others
+    with a vectorized bisection over whole months bracketed by [0, max_years * 12].
+    With cash_flows (shared by every scenario, see cash_flow_values) the portfolio may shrink after a
+    withdrawal, so every month up to max_years is evaluated at once and the first one reaching R is taken.
+    Returns a dict with the required balance and the month count (NaN when not reached within max_years).
+    """
+    targets = np.asarray(target_incomes, dtype=float)
+    shape = np.broadcast_shapes(targets.shape, np.shape(initial_investments), np.shape(monthly_contributions),
+                                np.shape(annual_rates), np.shape(safe_withdrawal_rates),
+                                np.shape(extra_deposits), np.shape(extra_deposit_years))
+    targets, initial, contributions, rates, swr, extras, extra_years = (
+        np.broadcast_to(np.asarray(values, dtype=float), shape).reshape(-1)
+        for values in (target_incomes, initial_investments, monthly_contributions, annual_rates,
+                       safe_withdrawal_rates, extra_deposits, extra_deposit_years))
+
+    max_months = max_years * 12
+    R = targets * 1200 / swr
+    monthly_rates = (1 + rates / 100) ** (1 / 12) - 1
+    has_extra = (extras > 0) & (extra_years > 0)
+    extra_months = np.where(has_extra, extra_years * 12, np.inf)
+    months = np.full(R.shape, np.nan)
+
+    # Month-by-month scan when cash flows are given
+    if cash_flows:
+        grid = np.arange(max_months + 1, dtype=float)
+        with np.errstate(over='ignore'):
+            values = (_fi_portfolio_value(grid, initial[:, np.newaxis], contributions[:, np.newaxis],
+                                          monthly_rates[:, np.newaxis], extras[:, np.newaxis],
+                                          extra_months[:, np.newaxis])
+                      + cash_flow_values(cash_flows, monthly_rates, grid))
+        reached = values >= R[:, np.newaxis]
+        months = np.where(reached.any(axis=1), np.argmax(reached, axis=1), np.nan)
+        return {
+            "required_balance": R.reshape(shape),
+            "months": months.reshape(shape),
+        }
+
+    # Closed form: (P + c/r) * g^n - c/r >= R  <=>  n >= log((R + c/r) / (P + c/r)) / log(g)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = np.where(monthly_rates != 0, contributions / monthly_rates, 0.0)
+        exact = np.where(monthly_rates != 0,
+                         np.log((R + k) / (initial + k)) / np.log1p(monthly_rates),
+                         (R - initial) / contributions)
+    exact = np.ceil(np.round(exact, 9))
+    closed = ~has_extra & np.isfinite(exact)
+    months[closed] = np.maximum(exact[closed], 0)
+    months[initial >= R] = 0
+
+    # Bracketed bisection for the scenarios with an extra deposit
+    rows = has_extra & (initial < R)
+    if np.any(rows):
+        args = (initial[rows], contributions[rows], monthly_rates[rows], extras[rows], extra_months[rows])
+        lo = np.zeros(args[0].shape)
+        hi = np.full(args[0].shape, float(max_months))
+        reached = _fi_portfolio_value(hi, *args) >= R[rows]
+        while np.any(hi - lo > 1):
+            mid = np.floor((lo + hi) / 2)
+            above = _fi_portfolio_value(mid, *args) >= R[rows]
+            hi = np.where(above, mid, hi)
+            lo = np.where(above, lo, mid)
+        months[rows] = np.where(reached, hi, np.nan)
+
+    months[months > max_months] = np.nan
+    return {
+        "required_balance": R.reshape(shape),
+        "months": months.reshape(shape),
+    }
+
+@functools.lru_cache(maxsize=64)
+def _interval_months(durations, start_years=0.0):
+    """
+    Month counts between consecutive milestones, starting at start_years.
+    """
+    return tuple(float((years - prev) * 12) for prev, years in zip((start_years,) + durations[:-1], durations))
+
+def _calculator1_future_values(initial_investment, annual_rate, period_savings, period_extra_deposits, durations, start_years=0.0):
+    """
+    Scalar path of calculator1_engine for one scenario: the form routes evaluate a single scenario,
+    for which a plain loop over the milestones is cheaper than building the engine's matrices.
+    tests/test_engines.py checks both scalar paths against their engines.
+    Returns the future value at every milestone as a list of floats.
+    """
+    interval_months = _interval_months(tuple(durations), start_years)
+    monthly_rates, compound, annuity = growth_factor_cache.factors(annual_rate, interval_months)
+    growing = monthly_rates[0, 0] > 0
+    compound, annuity = compound[0].tolist(), annuity[0].tolist()
+
+    fv = float(initial_investment)
+    future_values = []
+    for i, months in enumerate(interval_months):
+        if growing:
+            fv = fv * compound[i] + period_savings[i] * annuity[i]
+        else:
+            fv = fv + period_savings[i] * months
+        fv += period_extra_deposits[i]
+        future_values.append(fv)
+    if not math.isfinite(fv):
+        raise ValueError("Non-finite result during calculation.")
+    return future_values
+
+def _calculator2_required_investments(target_income, initial_investment, annual_rate, safe_withdrawal_rate, cash_flows, durations):
+    """
+    Scalar path of calculator2_engine for one scenario (see _calculator1_future_values).
+    Returns the required monthly investment at every milestone as a list of floats.
+    """
+    R = target_income * 1200 / safe_withdrawal_rate
+    months = tuple(float(years * 12) for years in durations)
+    monthly_rate, growth, annuity = growth_factor_cache.factors(annual_rate, months)
+    flows = cash_flow_values(cash_flows, monthly_rate, months)[0].tolist() if cash_flows else [0.0] * len(months)
+
+    try:
+        pmts = [(R - initial_investment * g - flow) / a for g, a, flow in zip(growth[0].tolist(), annuity[0].tolist(), flows)]
+    except ZeroDivisionError:
+        raise ValueError("Zero division error during calculation.")
+    if not all(math.isfinite(pmt) for pmt in pmts):
+        raise ValueError("Non-finite result during calculation.")
+    return pmts
+
+def calculate_calculator1(monthly_savings, initial_investment, annual_rate, safe_withdrawal_rate, birth_year=None, current_year=None, period_extra_deposits=None, start_index=0, start_value=None):
     """
     Calculates future investment value and projected monthly passive income over various durations.
     Supports either a single monthly_savings float or a list of period-specific savings floats.
     Also supports a list of one-off extra deposits at the end of each period.
-    Returns a list of dictionaries with raw and formatted results.
+    With start_value (the future value at milestone start_index - 1, or the initial investment for 0),
+    only the milestones from start_index on are recomputed, since each one only depends on the previous one.
+    Single-scenario counterpart of calculator1_engine (see _calculator1_future_values).
+    Returns a list of dictionaries with raw and formatted results (from start_index on).
     """
-    monthly_rate = (1 + annual_rate / 100) ** (1 / 12) - 1
-    durations = [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
+    durations = DURATIONS
     
     if not isinstance(monthly_savings, list):
         monthly_savings = [monthly_savings] * len(durations)
         
     if period_extra_deposits is None:
         period_extra_deposits = [0.0] * len(durations)
-        
-    results = []
-    current_fv = initial_investment
 
-    for i, years in enumerate(durations):
-        prev_years = durations[i-1] if i > 0 else 0
-        interval_years = years - prev_years
-        n = interval_years * 12
-        
+    if start_value is None:
+        start_index, start_value = 0, initial_investment
+    start_years = durations[start_index - 1] if start_index > 0 else 0.0
+
+    future_values = _calculator1_future_values(start_value, annual_rate, monthly_savings[start_index:],
+                                               period_extra_deposits[start_index:], durations[start_index:], start_years)
+    monthly_withdrawal = (safe_withdrawal_rate / 100) / 12
+
+    results = []
+    for i, years in enumerate(durations[start_index:], start=start_index):
+        current_fv = future_values[i - start_index]
+        monthly_income = current_fv * monthly_withdrawal
         savings = monthly_savings[i]
         extra = period_extra_deposits[i]
         
-        try:
-            if monthly_rate > 0:
-                current_fv = current_fv * (1 + monthly_rate) ** n + \
-                             savings * (((1 + monthly_rate) ** n - 1) / monthly_rate)
-            else:
-                current_fv = current_fv + savings * n
-        except ZeroDivisionError:
-            raise ValueError("Zero division error during calculation.")
-            
-        # Add the one-time extra deposit at the end of the milestone period
-        current_fv += extra
-            
-        monthly_income = current_fv * ((safe_withdrawal_rate / 100) / 12)
-        
         age = None
         future_year = None
         if birth_year and current_year:
@@ -84,32 +603,74 @@ def calculate_calculator1(monthly_savings, initial_investment, annual_rate, safe
 
     return results
 
-def calculate_calculator2(target_income, initial_investment, annual_rate, safe_withdrawal_rate, birth_year=None, current_year=None, extra_deposit=0.0, extra_deposit_year=None):
+def calculate_calculator1_simulation(monthly_savings, initial_investment, annual_rate, safe_withdrawal_rate, annual_volatility, n_paths=10000, seed=None, birth_year=None, current_year=None, period_extra_deposits=None, processes=None, progress=None):
+    """
+    Runs the Monte Carlo mode of Calculator 1 using annual_rate as the mean annual return.
+    Accepts the same savings and extra deposit inputs as calculate_calculator1;
+    processes and progress are passed on to simulate_calculator1.
+    Returns a list of dictionaries with raw and formatted P10/P50/P90 bands per milestone.
+    """
+    durations = DURATIONS
+
+    if not isinstance(monthly_savings, list):
+        monthly_savings = [monthly_savings] * len(durations)
+
+    if period_extra_deposits is None:
+        period_extra_deposits = [0.0] * len(durations)
+
+    simulation = simulate_calculator1(initial_investment, monthly_savings, period_extra_deposits,
+                                      annual_rate, annual_volatility, safe_withdrawal_rate,
+                                      n_paths=n_paths, seed=seed, processes=processes, durations=durations,
+                                      progress=progress)
+    if not np.all(np.isfinite(simulation["future_value"])):
+        raise ValueError("Non-finite result during simulation.")
+
+    results = []
+    for i, years in enumerate(durations):
+        age = None
+        future_year = None
+        if birth_year and current_year:
+            future_year = current_year + years
+            age = (current_year - birth_year) + years
+
+        row = {"years": years, "age": age, "future_year": future_year}
+        for j, percentile in enumerate(simulation["percentiles"]):
+            future_value = float(simulation["future_value"][j, i])
+            monthly_income = float(simulation["monthly_income"][j, i])
+            row[f"p{percentile}_future_value_raw"] = future_value
+            row[f"p{percentile}_future_value"] = format_currency(future_value)
+            row[f"p{percentile}_monthly_income_raw"] = monthly_income
+            row[f"p{percentile}_monthly_income"] = format_currency(monthly_income)
+        results.append(row)
+
+    return results
+
+def legacy_cash_flows(extra_deposit=0.0, extra_deposit_year=None, cash_flows=None):
+    """
+    Merges the single extra deposit of the original Calculator 2 form (made at the end of extra_deposit_year)
+    into a list of (month, amount) cash flows.
+    """
+    flows = [tuple(flow) for flow in cash_flows or []]
+    if extra_deposit and extra_deposit > 0 and extra_deposit_year:
+        flows.append((extra_deposit_year * 12, extra_deposit))
+    return flows
+
+def calculate_calculator2(target_income, initial_investment, annual_rate, safe_withdrawal_rate, birth_year=None, current_year=None, extra_deposit=0.0, extra_deposit_year=None, cash_flows=None):
     """
     Calculates the required monthly investment (PMT) to achieve the target future monthly retirement income.
-    Supports a one-off extra deposit at a specific year in the future.
+    Supports dated cash flows as (month, amount) pairs, positive or negative; the one-off extra deposit
+    at a specific year is converted into one of them.
+    Single-scenario counterpart of calculator2_engine (see _calculator2_required_investments).
     Returns a list of dictionaries with raw and formatted results.
     """
-    monthly_rate = (1 + annual_rate / 100) ** (1 / 12) - 1
-    R = target_income * 1200 / safe_withdrawal_rate
-    durations = [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
-    results = []
+    durations = DURATIONS
+    pmts = _calculator2_required_investments(target_income, initial_investment, annual_rate, safe_withdrawal_rate,
+                                             legacy_cash_flows(extra_deposit, extra_deposit_year, cash_flows),
+                                             durations)
 
-    for years in durations:
-        n = years * 12
-        compounded_initial = initial_investment * (1 + monthly_rate) ** n
-        annuity_factor = ((1 + monthly_rate) ** n - 1) / monthly_rate
-        
-        # Deduct the compounded value of the one-off extra deposit if years >= extra_deposit_year
-        compounded_extra = 0.0
-        if extra_deposit > 0 and extra_deposit_year and years >= extra_deposit_year:
-            compounded_extra = extra_deposit * (1 + monthly_rate) ** ((years - extra_deposit_year) * 12)
-
-        try:
-            pmt = (R - compounded_initial - compounded_extra) / annuity_factor
-        except ZeroDivisionError:
-            raise ValueError("Zero division error during calculation.")
-            
+    results = []
+    for i, years in enumerate(durations):
+        pmt = pmts[i]
         pmt_raw = pmt if pmt > 0 else 0
         if pmt < 0:
             required_investment_display = "Já aposentado! (Nenhum investimento adicional necessário)"
@@ -132,6 +693,38 @@ def calculate_calculator2(target_income, initial_investment, annual_rate, safe_w
 
     return results
 
+def calculate_time_to_fi(target_income, initial_investment, monthly_contribution, annual_rate, safe_withdrawal_rate, birth_year=None, current_year=None, extra_deposit=0.0, extra_deposit_year=None, cash_flows=None):
+    """
+    Answers "when can I retire if I invest monthly_contribution per month?" for a single scenario.
+    Accepts the same extra deposit and cash flow inputs as calculate_calculator2.
+    Returns a dictionary with raw and formatted results, or None when the target is not reached within MAX_PROJECTION_YEARS.
+    """
+    cash_flows = legacy_cash_flows(extra_deposit, extra_deposit_year, cash_flows)
+    solution = solve_time_to_fi(target_income, initial_investment, monthly_contribution, annual_rate,
+                                safe_withdrawal_rate, cash_flows=cash_flows)
+    months = float(solution["months"])
+    if np.isnan(months):
+        return None
+
+    months = int(months)
+    years = months // 12
+    age = None
+    future_year = None
+    if birth_year and current_year:
+        future_year = current_year + years
+        age = (current_year - birth_year) + years
+
+    return {
+        "months_raw": months,
+        "years": years,
+        "remaining_months": months % 12,
+        "required_balance_raw": float(solution["required_balance"]),
+        "required_balance": format_currency(float(solution["required_balance"])),
+        "monthly_contribution": format_currency(monthly_contribution),
+        "age": age,
+        "future_year": future_year
+    }
+
 def calculate_calculator3(salary, expenses):
     """
     Calculates the available monthly savings by subtracting total expenses from the salary after taxes.